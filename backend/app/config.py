@@ -3,18 +3,126 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DEBUG: bool = False
+    # No longer used: each source now has its own *_FETCH_INTERVAL_MINUTES.
+    # Kept so existing .env files that still set it continue to load.
     FETCH_INTERVAL_HOURS: int = 24
     DATABASE_URL: str = "sqlite+aiosqlite:///./news.db"
     CORS_ORIGINS: str = "http://localhost:5173"
     LOG_LEVEL: str = "INFO"
+    # Of several workers (gunicorn -w N) on one host, only the one holding
+    # this file lock runs the scheduled fetch, retry and cleanup jobs
+    SCHEDULER_LOCK_FILE: str = "./scheduler.lock"
     GEMINI_API_KEY: str = ""
+    # Free tier limits; GEMINI_MAX_IN_FLIGHT batches may be rated concurrently
+    GEMINI_REQUESTS_PER_MINUTE: int = 5
+    GEMINI_REQUESTS_PER_DAY: int = 20
+    GEMINI_MAX_IN_FLIGHT: int = 3
+    GEMINI_MAX_RETRIES: int = 2  # after a 429
+    GEMINI_MODEL: str = "gemini-3-flash-preview"
+    # What answers rating prompts: "gemini", "heuristic" (local keyword
+    # scoring, no key needed) or "http" (a Gemini-compatible generateContent
+    # endpoint at RATER_HTTP_URL, such as `python -m benchmarks.standin`).
+    # Every backend goes through the GEMINI_* limits, with its own daily count.
+    RATER_BACKEND: str = "gemini"
+    RATER_HTTP_URL: str = "http://127.0.0.1:8765"
+    RATER_HTTP_TIMEOUT_SECONDS: float = 60.0
     RATING_THRESHOLD: int = 60
 
+    # Ingest pipeline: queue depth between stages, rows per commit, and how
+    # long a partial group may wait for more items before being flushed
+    PIPELINE_QUEUE_SIZE: int = 100
+    PIPELINE_COMMIT_SIZE: int = 25
+    PIPELINE_FLUSH_SECONDS: float = 1.0
+
+    # Near-duplicate detection: max SimHash bit distance, and how far back
+    # stored articles are compared against
+    NEAR_DUPLICATE_MAX_DISTANCE: int = 3
+    NEAR_DUPLICATE_WINDOW_HOURS: int = 72
+
+    # RSS feeds
+    RSS_ENABLED: bool = True
+    RSS_FETCH_INTERVAL_MINUTES: int = 15
+    RSS_MAX_CONCURRENCY: int = 5
+    RSS_TIMEOUT_SECONDS: float = 20.0
+
     # News API sources
     GUARDIAN_API_KEY: str = ""
     GUARDIAN_ENABLED: bool = True
+    GUARDIAN_FETCH_INTERVAL_MINUTES: int = 60
+    GUARDIAN_TIMEOUT_SECONDS: float = 30.0
+    GUARDIAN_MAX_CONCURRENCY: int = 6
+    GUARDIAN_PAGE_SIZE: int = 50  # API maximum is 200
+    GUARDIAN_MAX_PAGES_PER_SECTION: int = 5
+    GUARDIAN_INITIAL_LOOKBACK_HOURS: int = 24
     THENEWSAPI_KEY: str = ""
     THENEWSAPI_ENABLED: bool = True
+    THENEWSAPI_FETCH_INTERVAL_MINUTES: int = 480  # 3 requests/day
+    THENEWSAPI_TIMEOUT_SECONDS: float = 30.0
+
+    # Shared HTTP client pool
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 6
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_DEFAULT_TIMEOUT_SECONDS: float = 20.0
+    OG_IMAGE_TIMEOUT_SECONDS: float = 10.0
+
+    # og:image enrichment
+    OG_IMAGE_MAX_CONCURRENCY: int = 10
+    OG_IMAGE_CACHE_TTL_DAYS: int = 14
+    OG_IMAGE_NEGATIVE_TTL_HOURS: int = 24
+
+    # Local score predictor (train with train_predictor.py). Confident
+    # predictions skip Gemini; the confidence band is calibrated at training
+    # time to reach PREDICTOR_MIN_PRECISION on held-out ratings.
+    PREDICTOR_ENABLED: bool = True
+    PREDICTOR_MODEL_PATH: str = "artifacts/score_predictor.npz"
+    PREDICTOR_MIN_PRECISION: float = 0.95
+    PREDICTOR_MIN_TRAINING_ROWS: int = 200
+
+    # Rating batches are packed up to these estimated token budgets; the
+    # article cap adapts between the MIN and MAX to missing or broken answers
+    RATING_BATCH_MIN_ARTICLES: int = 3
+    RATING_BATCH_MAX_ARTICLES: int = 25
+    RATING_BATCH_INPUT_TOKENS: int = 4000
+    RATING_BATCH_OUTPUT_TOKENS: int = 2000
+    RATING_OUTPUT_TOKENS_PER_ARTICLE: int = 60
+    # Times an article missing from a batch answer (or answered invalidly) is
+    # carried into the next batch before it is left for the retry job
+    RATING_MAX_ROLLOVERS: int = 2
+
+    # Rating queue. Priority is the publication time in hours, plus up to
+    # HOPEFUL_BONUS_HOURS for a hopeful keyword score, minus
+    # SOURCE_PENALTY_HOURS per article already queued from the same source.
+    # The retry job claims CLAIM_SIZE entries at a time for LEASE_MINUTES; a
+    # failed attempt waits BACKOFF_MINUTES, doubling up to MAX_BACKOFF_HOURS.
+    RATING_QUEUE_HOPEFUL_BONUS_HOURS: float = 12.0
+    RATING_QUEUE_SOURCE_PENALTY_HOURS: float = 1.0
+    RATING_QUEUE_CLAIM_SIZE: int = 50
+    RATING_QUEUE_LEASE_MINUTES: int = 15
+    RATING_QUEUE_BACKOFF_MINUTES: float = 30.0
+    RATING_QUEUE_MAX_BACKOFF_HOURS: float = 24.0
+
+    # Gemini ratings cached by article text, source and prompt version; entries
+    # unused for RATING_CACHE_TTL_DAYS are purged by the daily cleanup
+    RATING_CACHE_ENABLED: bool = True
+    RATING_CACHE_TTL_DAYS: int = 30
+
+    # Keyword rules (pre-filter, score and category keywords). Each worker
+    # checks the file for changes every KEYWORD_RULES_CHECK_SECONDS and swaps
+    # it in without a restart; stored articles classified under an older "version"
+    # are then re-evaluated in chunks of RULES_REEVALUATE_CHUNK_SIZE rows.
+    KEYWORD_RULES_PATH: str = "app/rules/keyword_rules.json"
+    KEYWORD_RULES_CHECK_SECONDS: int = 60
+    RULES_REEVALUATE_CHUNK_SIZE: int = 1000
+
+    # Record/replay of external responses: "off", "record" (save every HTTP and
+    # Gemini response under REPLAY_FIXTURES_DIR) or "replay" (serve them back
+    # offline). REPLAY_LATENCY replays each response after its recorded delay.
+    REPLAY_MODE: str = "off"
+    REPLAY_FIXTURES_DIR: str = "fixtures"
+    REPLAY_LATENCY: bool = False
 
     class Config:
         env_file = ".env"
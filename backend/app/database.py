@@ -1,3 +1,7 @@
+import asyncio
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 from typing import AsyncGenerator
@@ -9,16 +13,55 @@ engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
+# Workers starting together race to create the schema; the losers retry
+# once the winner is done
+INIT_ATTEMPTS = 3
+
+
 class Base(DeclarativeBase):
     pass
 
 
+def insert(table):
+    """An INSERT with on_conflict_do_update/do_nothing for the configured database."""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(table)
+
+
 async def init_db() -> None:
     """Create all database tables."""
-    from app.models import Article  # noqa: F401
+    from app.models import ApiQuota, ApiRateWindow, Article, ImageCache, RatingCache, RatingCacheCounter, RatingQueue, SourceState  # noqa: F401
+
+    for attempt in range(INIT_ATTEMPTS):
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(_add_missing_columns)
+            return
+        except DBAPIError:
+            if attempt == INIT_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(1)
+
+
+def _add_missing_columns(conn) -> None:
+    """Add columns and indexes introduced after a table was first created.
 
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    create_all() only creates missing tables, so new columns on existing
+    tables are added here. Such columns must be nullable.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -8,7 +8,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.database import init_db
 from app.routers import articles_router
-from app.utils.scheduler import start_scheduler, shutdown_scheduler
+from app.services.http_client import http_clients
+from app.services.keyword_rules import get_rules
+from app.services.rating_queue import enqueue_unqueued
+from app.utils.scheduler import claim_scheduler, start_scheduler, shutdown_scheduler
 
 # Configure logging for production
 logging.basicConfig(
@@ -22,10 +25,17 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
-    start_scheduler()
+    # Fail at startup rather than on the first fetch if the rules file is invalid
+    get_rules()
+    await http_clients.start()
+    if claim_scheduler():
+        # Articles left pending before the rating queue existed
+        await enqueue_unqueued()
+        start_scheduler()
     logger.info("Application startup complete")
     yield
     shutdown_scheduler()
+    await http_clients.stop()
     logger.info("Application shutdown complete")
 
 
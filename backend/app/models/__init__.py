@@ -1,3 +1,10 @@
+from app.models.api_quota import ApiQuota
+from app.models.api_rate_window import ApiRateWindow
 from app.models.article import Article
+from app.models.image_cache import ImageCache
+from app.models.rating_cache import RatingCache
+from app.models.rating_cache_counter import RatingCacheCounter
+from app.models.rating_queue import RatingQueue
+from app.models.source_state import SourceState
 
-__all__ = ["Article"]
+__all__ = ["ApiQuota", "ApiRateWindow", "Article", "ImageCache", "RatingCache", "RatingCacheCounter", "RatingQueue", "SourceState"]
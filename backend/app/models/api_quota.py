@@ -0,0 +1,20 @@
+from datetime import date, datetime
+from sqlalchemy import String, Integer, Date, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class ApiQuota(Base):
+    """Requests made to a metered API on one day, shared by every worker (see app.services.quota_ledger).
+
+    reserved counts requests that have been allowed but not yet settled;
+    they count against the limit like used ones.
+    """
+
+    __tablename__ = "api_quota"
+
+    provider: Mapped[str] = mapped_column(String, primary_key=True)  # "gemini", "guardian" or "thenewsapi"
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    used: Mapped[int] = mapped_column(Integer, default=0)
+    reserved: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
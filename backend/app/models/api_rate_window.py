@@ -0,0 +1,14 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class ApiRateWindow(Base):
+    """Requests sent to an API in the current minute, shared by every worker (see app.services.quota_ledger)."""
+
+    __tablename__ = "api_rate_window"
+
+    provider: Mapped[str] = mapped_column(String, primary_key=True)
+    window_start: Mapped[datetime] = mapped_column(DateTime)  # start of the minute used counts
+    used: Mapped[int] = mapped_column(Integer, default=0)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, Text, Integer, Boolean, DateTime, Index
+from sqlalchemy import String, Text, Integer, BigInteger, Boolean, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from app.database import Base
 
@@ -11,7 +11,9 @@ class Article(Base):
     guid: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     headline: Mapped[str] = mapped_column(String, nullable=False)
     summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    normalized_text: Mapped[str | None] = mapped_column(Text, nullable=True)  # see app.utils.text.normalize_article
     source_url: Mapped[str] = mapped_column(String, nullable=False)
+    canonical_key: Mapped[str | None] = mapped_column(String(40), nullable=True)  # SHA-1 of the canonical URL
     source_name: Mapped[str] = mapped_column(String, nullable=False)
     image_url: Mapped[str | None] = mapped_column(String, nullable=True)
     published_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -22,9 +24,15 @@ class Article(Base):
     is_rated: Mapped[bool] = mapped_column(Boolean, default=False)
     rating_failed: Mapped[bool] = mapped_column(Boolean, default=False)
     excluded_reason: Mapped[str | None] = mapped_column(String, nullable=True)
+    rating_source: Mapped[str | None] = mapped_column(String, nullable=True)  # RATER_BACKEND ("gemini"), "local", "cache" or "duplicate"
+    rules_version: Mapped[str | None] = mapped_column(String, nullable=True)  # keyword rules version last applied
+    simhash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    duplicate_of: Mapped[str | None] = mapped_column(String, nullable=True)  # guid of the cluster representative
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     __table_args__ = (
         Index("ix_articles_published_at", "published_at"),
         Index("ix_articles_guid", "guid"),
+        Index("ix_articles_duplicate_of", "duplicate_of"),
+        Index("ix_articles_canonical_key", "canonical_key", unique=True),
     )
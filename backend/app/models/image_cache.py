@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class ImageCache(Base):
+    """Article URL -> og:image lookup results, including misses (image_url is NULL)."""
+
+    __tablename__ = "image_cache"
+
+    url: Mapped[str] = mapped_column(String, primary_key=True)
+    image_url: Mapped[str | None] = mapped_column(String, nullable=True)
+    checked_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_image_cache_checked_at", "checked_at"),
+    )
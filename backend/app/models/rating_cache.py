@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import String, Text, Integer, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class RatingCache(Base):
+    """Gemini ratings keyed by article content and prompt version (see app.services.rating_cache)."""
+
+    __tablename__ = "rating_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)  # SHA-256 hex
+    prompt_version: Mapped[str] = mapped_column(String(16), nullable=False)
+    score: Mapped[int] = mapped_column(Integer, nullable=False)
+    excluded_reason: Mapped[str | None] = mapped_column(String, nullable=True)
+    rationale: Mapped[str | None] = mapped_column(Text, nullable=True)
+    hits: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_hit_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_rating_cache_created_at", "created_at"),
+    )
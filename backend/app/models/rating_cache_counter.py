@@ -0,0 +1,13 @@
+from sqlalchemy import String, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class RatingCacheCounter(Base):
+    """Rating cache lookups per prompt version, shared by every worker (see app.services.rating_cache)."""
+
+    __tablename__ = "rating_cache_counter"
+
+    prompt_version: Mapped[str] = mapped_column(String(16), primary_key=True)
+    hits: Mapped[int] = mapped_column(Integer, default=0)
+    misses: Mapped[int] = mapped_column(Integer, default=0)
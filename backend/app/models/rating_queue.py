@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, Float, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class RatingQueue(Base):
+    """Articles waiting for a rating, best first (see app.services.rating_queue).
+
+    available_at is when the entry may next be claimed: now for fresh
+    entries, later while it is leased to a worker or backing off after a
+    failed attempt.
+    """
+
+    __tablename__ = "rating_queue"
+
+    article_id: Mapped[int] = mapped_column(Integer, primary_key=True)  # articles.id
+    source_name: Mapped[str] = mapped_column(String, nullable=False)
+    priority: Mapped[float] = mapped_column(Float, nullable=False)  # higher is rated first
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    available_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    lease_token: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    enqueued_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_rating_queue_dequeue", "priority", "available_at"),
+        Index("ix_rating_queue_source_name", "source_name"),
+        Index("ix_rating_queue_lease_token", "lease_token"),
+    )
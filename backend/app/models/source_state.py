@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class SourceState(Base):
+    """Per-source fetch state, keyed by e.g. "rss:<url>" or "guardian:<section>".
+
+    Holds HTTP cache validators and, for paginated APIs, the high-water mark
+    (latest publication time seen).
+    """
+
+    __tablename__ = "source_state"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    etag: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String, nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String, nullable=True)
+    watermark: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
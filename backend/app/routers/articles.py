@@ -12,6 +12,9 @@ from app.services.news_fetcher import fetch_and_store
 from app.services.guardian_fetcher import get_guardian_usage
 from app.services.thenewsapi_fetcher import get_thenewsapi_usage
 from app.services.article_rater import get_gemini_usage
+from app.services.rating_cache import get_cache_stats
+from app.services.rating_queue import get_queue_stats
+from app.services.source_registry import get_source_registry
 
 router = APIRouter(prefix="/articles", tags=["articles"])
 
@@ -143,6 +146,24 @@ async def get_stats(session: AsyncSession = Depends(get_session)):
     )
     prefiltered_count = filtered_result.scalar_one()
 
+    # Count near-duplicates (score inherited from their cluster)
+    duplicate_result = await session.execute(
+        select(func.count(Article.id)).where(Article.duplicate_of.isnot(None))
+    )
+    duplicate_count = duplicate_result.scalar_one()
+
+    # Count articles scored by the local predictor instead of Gemini
+    predicted_result = await session.execute(
+        select(func.count(Article.id)).where(Article.rating_source == "local")
+    )
+    predicted_count = predicted_result.scalar_one()
+
+    # Count articles answered from the rating cache
+    cached_result = await session.execute(
+        select(func.count(Article.id)).where(Article.rating_source == "cache")
+    )
+    cached_count = cached_result.scalar_one()
+
     # Count articles above threshold
     above_threshold_result = await session.execute(
         select(func.count(Article.id)).where(
@@ -185,20 +206,34 @@ async def get_stats(session: AsyncSession = Depends(get_session)):
             "rated": rated_count,
             "pending_rating": pending_count,
             "prefiltered": prefiltered_count,
+            "near_duplicates": duplicate_count,
+            "predicted_locally": predicted_count,
+            "rated_from_cache": cached_count,
             "above_threshold": above_threshold_count,
             "fetched_today": today_count,
         },
         "score_distribution": score_distribution,
         "sources": sources,
         "api_usage": {
-            "guardian": get_guardian_usage(),
-            "thenewsapi": get_thenewsapi_usage(),
-            "gemini": get_gemini_usage(),
+            "guardian": await get_guardian_usage(),
+            "thenewsapi": await get_thenewsapi_usage(),
+            "gemini": await get_gemini_usage(),
         },
+        "rating_cache": await get_cache_stats(),
+        "rating_queue": await get_queue_stats(),
         "config": {
             "rating_threshold": settings.RATING_THRESHOLD,
             "guardian_enabled": settings.GUARDIAN_ENABLED,
             "thenewsapi_enabled": settings.THENEWSAPI_ENABLED,
+            "sources": [
+                {
+                    "name": spec.name,
+                    "enabled": spec.enabled,
+                    "interval_minutes": spec.interval_minutes,
+                    "daily_quota": spec.daily_quota,
+                }
+                for spec in get_source_registry()
+            ],
         },
     }
 
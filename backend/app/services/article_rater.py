@@ -1,51 +1,49 @@
+import asyncio
 import json
 import logging
-from datetime import date
+import time
 from typing import TypedDict
 
-import google.generativeai as genai
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
 from app.config import settings
-from app.services.rating_prompt import RATING_SYSTEM_PROMPT, ARTICLE_PROMPT_TEMPLATE, BATCH_PROMPT_TEMPLATE
+from app.services import quota_ledger
+from app.services.batch_planner import get_planner
+from app.services.rater_backends import RaterBackend, get_backend
+from app.services.rating_cache import cache_ratings, rating_key
+from app.services.rating_prompt import (
+    RATING_SYSTEM_PROMPT, ARTICLE_ID_LENGTH, ARTICLE_PROMPT_TEMPLATE, BATCH_ARTICLE_TEMPLATE, BATCH_PROMPT_TEMPLATE,
+)
+from app.services.quota_ledger import QuotaExhausted
+from app.utils.rate_limiter import RateLimiter, TokenBucket, is_rate_limited, retry_after
+from app.utils.replay import replay_mode, replay_ratings, save_ratings
 
 logger = logging.getLogger(__name__)
 
-# Track daily Gemini API usage (resets each day)
-_usage_tracker = {
-    "date": None,
-    "requests": 0,
-}
-MAX_DAILY_REQUESTS = 20  # Gemini free tier RPD limit
+# Names the backend's daily count in the quota ledger and the rating_source
+# of its ratings, so load tests neither use up Gemini's quota nor pass for it
+BACKEND = settings.RATER_BACKEND.lower()
+MAX_DAILY_REQUESTS = settings.GEMINI_REQUESTS_PER_DAY
+MISSING_RATIONALE = "Missing from batch response"
+INVALID_RATIONALE = "Invalid item in batch response"
+# Not sent at all: the daily quota ran out first
+QUOTA_RATIONALE = "Daily limit reached"
+# Backoff after a 429 that names no delay, doubled on each retry
+RATE_LIMIT_BACKOFF_SECONDS = 20.0
 
+# Every rating request in the process goes through this limiter; the daily
+# quota and the per-minute window are shared with other workers through the
+# quota ledger
+_limiter = RateLimiter(
+    "Gemini",
+    {"rpm": TokenBucket(settings.GEMINI_REQUESTS_PER_MINUTE, 60.0)},
+    max_in_flight=settings.GEMINI_MAX_IN_FLIGHT,
+)
 
-def _check_rate_limit() -> bool:
-    """Check if we're within the daily rate limit."""
-    today = date.today()
-    if _usage_tracker["date"] != today:
-        _usage_tracker["date"] = today
-        _usage_tracker["requests"] = 0
-    return _usage_tracker["requests"] < MAX_DAILY_REQUESTS
 
-
-def _increment_usage():
-    """Increment the daily usage counter."""
-    _usage_tracker["requests"] += 1
-    remaining = MAX_DAILY_REQUESTS - _usage_tracker["requests"]
-    logger.info(f"Gemini API usage: {_usage_tracker['requests']}/{MAX_DAILY_REQUESTS} today ({remaining} remaining)")
-
-
-def get_gemini_usage() -> dict:
-    """Get current Gemini API usage stats."""
-    today = date.today()
-    if _usage_tracker["date"] != today:
-        return {"requests": 0, "limit": MAX_DAILY_REQUESTS, "remaining": MAX_DAILY_REQUESTS}
-
-    remaining = MAX_DAILY_REQUESTS - _usage_tracker["requests"]
-    return {
-        "requests": _usage_tracker["requests"],
-        "limit": MAX_DAILY_REQUESTS,
-        "remaining": remaining,
-    }
+async def get_gemini_usage() -> dict:
+    """Get current Gemini API usage stats (of whichever backend stands in for it)."""
+    return {"backend": BACKEND, **await quota_ledger.get_usage(BACKEND, MAX_DAILY_REQUESTS)}
 
 
 class RatingResult(TypedDict):
@@ -54,42 +52,188 @@ class RatingResult(TypedDict):
     rationale: str
 
 
+class BatchItem(BaseModel):
+    """Schema of one object in a batch answer."""
+
+    id: str
+    score: int = Field(ge=0, le=100)
+    excluded_reason: str | None = None
+    rationale: str = ""
+
+    @field_validator("id", mode="before")
+    @classmethod
+    def _id_as_text(cls, value):
+        # Models sometimes answer an all-digit ID as a number
+        return str(value).strip().lower() if isinstance(value, (str, int)) else value
+
+
+def article_id(article: dict) -> str:
+    """The short ID an article gets in batch prompts; derived from its content, so stable across batches."""
+    return rating_key(article.get("title"), article.get("summary"), article.get("source"))[:ARTICLE_ID_LENGTH]
+
+
+def needs_rerating(rating: RatingResult) -> bool:
+    """Whether a rating is a gap in a batch answer, worth sending again with the next batch."""
+    return rating["score"] is None and rating["rationale"] in (MISSING_RATIONALE, INVALID_RATIONALE)
+
+
+def build_batch_prompt(articles: list[dict]) -> str:
+    """The user prompt rating several articles (dicts with 'title', 'summary', 'source')."""
+    articles_text = "\n\n".join(format_batch_article(article_id(a), a) for a in articles)
+    return BATCH_PROMPT_TEMPLATE.format(articles=articles_text)
+
+
+def format_batch_article(id: str, article: dict) -> str:
+    """One article's entry in a batch prompt."""
+    return BATCH_ARTICLE_TEMPLATE.format(
+        id=id,
+        title=article.get("title", ""),
+        summary=article.get("summary") or "No summary available",
+        source=article.get("source", ""),
+    )
+
+
+def parse_batch_response(text: str, articles: list[dict]) -> list[RatingResult]:
+    """Match a batch answer's items to the articles by ID, one RatingResult per article.
+
+    Items are validated against BatchItem one by one, so a malformed item only
+    costs its own article. Articles without a valid item get MISSING_RATIONALE
+    or INVALID_RATIONALE (see needs_rerating). Raises ValueError if the answer
+    is not JSON or holds no array of items.
+    """
+    results = json.loads(text)
+
+    # A lone object, or the array wrapped in an object
+    if isinstance(results, dict):
+        results = next((value for value in results.values() if isinstance(value, list)), [results])
+    if not isinstance(results, list):
+        raise ValueError(f"expected a JSON array, got {type(results).__name__}")
+
+    ids = [article_id(a) for a in articles]
+    wanted = set(ids)
+    items: dict[str, BatchItem] = {}
+    invalid: set[str] = set()
+    for raw in results:
+        try:
+            item = BatchItem.model_validate(raw)
+        except ValidationError as e:
+            raw_id = raw.get("id") if isinstance(raw, dict) else None
+            if raw_id is not None:
+                invalid.add(str(raw_id).strip().lower())
+            logger.debug(f"Invalid batch item {str(raw)[:100]}: {e.errors()[0]['msg']}")
+            continue
+        if item.id not in wanted:
+            logger.debug(f"Batch answer has an item for unknown article ID {item.id!r}")
+            continue
+        items.setdefault(item.id, item)
+
+    ratings = []
+    for id, article in zip(ids, articles):
+        item = items.get(id)
+        if item is not None:
+            ratings.append(RatingResult(score=item.score, excluded_reason=item.excluded_reason, rationale=item.rationale))
+        elif id in invalid:
+            logger.warning(f"Invalid rating returned for article {id}: {article.get('title', '')[:50]}")
+            ratings.append(RatingResult(score=None, excluded_reason=None, rationale=INVALID_RATIONALE))
+        else:
+            logger.warning(f"No rating returned for article {id}: {article.get('title', '')[:50]}")
+            ratings.append(RatingResult(score=None, excluded_reason=None, rationale=MISSING_RATIONALE))
+    return ratings
+
+
 class ArticleRater:
     _instance: "ArticleRater | None" = None
-    _model: genai.GenerativeModel | None = None
+    _backend: RaterBackend | None = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def _get_model(self) -> genai.GenerativeModel:
-        """Lazy initialization of the model."""
-        if self._model is None:
-            if not settings.GEMINI_API_KEY:
-                raise ValueError("GEMINI_API_KEY not configured")
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self._model = genai.GenerativeModel("gemini-3-flash-preview")
-        return self._model
+    def _get_backend(self) -> RaterBackend:
+        """Lazy initialization of the RATER_BACKEND backend."""
+        if self._backend is None:
+            self._backend = get_backend()
+            logger.info(f"Rating with the {self._backend.name} backend")
+        return self._backend
+
+    async def _generate(self, prompt: str, articles: list[dict]) -> str:
+        """Send a prompt about the given articles to the backend and return the raw JSON text.
+
+        In replay mode the recorded answers for these articles are returned
+        instead and no API key is needed; in record mode each answer is saved.
+        """
+        if replay_mode() == "replay":
+            # Recorded answers are per article; label them with today's IDs
+            items = await replay_ratings(articles)
+            return json.dumps([{**item, "id": article_id(a)} if item else item for a, item in zip(articles, items)])
+
+        started = time.perf_counter()
+        text = await self._get_backend().generate(RATING_SYSTEM_PROMPT, prompt)
+        if replay_mode() == "record":
+            try:
+                items = json.loads(text)
+            except ValueError:
+                items = []
+            if not isinstance(items, list):
+                items = [items]
+            by_id = {str(item.get("id", "")).strip().lower(): item for item in items if isinstance(item, dict)}
+            answered = [(a, by_id[article_id(a)]) for a in articles if article_id(a) in by_id]
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            await asyncio.to_thread(save_ratings, [a for a, _ in answered], [item for _, item in answered], elapsed_ms)
+        return text
+
+    async def _request(self, prompt: str, articles: list[dict]) -> str:
+        """_generate within the shared rate limits, retrying 429s after the delay they ask for.
+
+        Raises QuotaExhausted once the daily quota is used up.
+        """
+        for attempt in range(settings.GEMINI_MAX_RETRIES + 1):
+            # Don't queue for a per-minute slot once the day's quota is gone
+            if not await self.can_rate():
+                raise QuotaExhausted("Gemini daily quota exhausted")
+            async with _limiter.slot():
+                # The process's bucket only paces this worker; the ledger's
+                # window holds the per-minute limit across all of them
+                while (wait := await quota_ledger.take_minute_slot(BACKEND, settings.GEMINI_REQUESTS_PER_MINUTE)) > 0:
+                    await asyncio.sleep(wait)
+                reservation = await quota_ledger.reserve(BACKEND, MAX_DAILY_REQUESTS)
+                if reservation is None:
+                    # Used up while waiting; nothing is sent, so the slot's token is unused
+                    _limiter.refund("rpm")
+                    raise QuotaExhausted("Gemini daily quota exhausted")
+                try:
+                    text = await self._generate(prompt, articles)
+                except Exception as e:
+                    limited = is_rate_limited(e)
+                    # A rejected request does not use up the daily quota
+                    if limited:
+                        await quota_ledger.refund(reservation)
+                    else:
+                        await quota_ledger.commit(reservation)
+                    if not limited or attempt == settings.GEMINI_MAX_RETRIES:
+                        raise
+                    _limiter.backoff(retry_after(e) or RATE_LIMIT_BACKOFF_SECONDS * 2 ** attempt)
+                    continue
+                await quota_ledger.commit(reservation)
+
+            logger.info(
+                f"Rating API usage ({BACKEND}): {reservation.count}/{MAX_DAILY_REQUESTS} today "
+                f"({MAX_DAILY_REQUESTS - reservation.count} remaining)"
+            )
+            return text
+        raise AssertionError("unreachable")
 
-    def can_rate(self) -> bool:
+    async def can_rate(self) -> bool:
         """Check if we can make another rating request today."""
-        return _check_rate_limit()
+        return await self.get_remaining_requests() > 0
 
-    def get_remaining_requests(self) -> int:
-        """Get number of remaining requests for today."""
-        today = date.today()
-        if _usage_tracker["date"] != today:
-            return MAX_DAILY_REQUESTS
-        return MAX_DAILY_REQUESTS - _usage_tracker["requests"]
+    async def get_remaining_requests(self) -> int:
+        """Get number of remaining requests for today, across all workers."""
+        return await quota_ledger.remaining(BACKEND, MAX_DAILY_REQUESTS)
 
     async def rate_article(self, title: str, summary: str, source: str) -> RatingResult:
         """Rate a single article."""
-        # Check rate limit before making request
-        if not _check_rate_limit():
-            logger.warning("Gemini API daily limit reached, skipping rating")
-            return RatingResult(score=None, excluded_reason=None, rationale="Daily limit reached")
-
         prompt = ARTICLE_PROMPT_TEMPLATE.format(
             title=title,
             summary=summary or "No summary available",
@@ -97,20 +241,18 @@ class ArticleRater:
         )
 
         try:
-            model = self._get_model()
-            response = await model.generate_content_async(
-                [RATING_SYSTEM_PROMPT, prompt],
-                generation_config=genai.GenerationConfig(
-                    response_mime_type="application/json"
-                ),
-            )
-            _increment_usage()
-            result = json.loads(response.text)
+            text = await self._request(prompt, [{"title": title, "summary": summary, "source": source}])
+            result = json.loads(text)
+            if isinstance(result, list):
+                result = result[0] if result else {}
             return RatingResult(
                 score=int(result["score"]) if result.get("score") is not None else None,
                 excluded_reason=result.get("excluded_reason"),
                 rationale=result.get("rationale", ""),
             )
+        except QuotaExhausted:
+            logger.warning("Gemini API daily limit reached, skipping rating")
+            return RatingResult(score=None, excluded_reason=None, rationale=QUOTA_RATIONALE)
         except Exception as e:
             logger.error(f"Rating failed for '{title}': {e}")
             return RatingResult(score=None, excluded_reason=None, rationale=f"Error: {e}")
@@ -122,61 +264,39 @@ class ArticleRater:
             articles: List of dicts with 'title', 'summary', 'source' keys
 
         Returns:
-            List of RatingResult in same order as input
+            List of RatingResult in same order as input; articles the answer
+            skipped or got wrong are marked as needs_rerating()
         """
         if not articles:
             return []
 
-        # Check rate limit before making request
-        if not _check_rate_limit():
-            logger.warning("Gemini API daily limit reached, skipping batch rating")
-            return [RatingResult(score=None, excluded_reason=None, rationale="Daily limit reached") for _ in articles]
-
-        # Format articles for the prompt
-        articles_text = "\n\n".join(
-            f"Article {i+1}:\nTitle: {a.get('title', '')}\nSummary: {a.get('summary') or 'No summary available'}\nSource: {a.get('source', '')}"
-            for i, a in enumerate(articles)
-        )
-        prompt = BATCH_PROMPT_TEMPLATE.format(articles=articles_text)
+        prompt = build_batch_prompt(articles)
 
         try:
-            model = self._get_model()
-            response = await model.generate_content_async(
-                [RATING_SYSTEM_PROMPT, prompt],
-                generation_config=genai.GenerationConfig(
-                    response_mime_type="application/json"
-                ),
-            )
-            _increment_usage()
-            results = json.loads(response.text)
-
-            # Ensure we got an array
-            if not isinstance(results, list):
-                results = [results]
-
-            # Map results to RatingResult objects
-            ratings = []
-            for i, article in enumerate(articles):
-                if i < len(results):
-                    r = results[i]
-                    ratings.append(RatingResult(
-                        score=int(r["score"]) if r.get("score") is not None else None,
-                        excluded_reason=r.get("excluded_reason"),
-                        rationale=r.get("rationale", ""),
-                    ))
-                else:
-                    # Missing result for this article
-                    logger.warning(f"No rating returned for article {i+1}: {article.get('title', '')[:50]}")
-                    ratings.append(RatingResult(score=None, excluded_reason=None, rationale="Missing from batch response"))
-
-            logger.info(f"Batch rated {len(articles)} articles in single API call")
-            return ratings
-
+            text = await self._request(prompt, articles)
+        except QuotaExhausted:
+            logger.warning("Gemini API daily limit reached, skipping batch rating")
+            return [RatingResult(score=None, excluded_reason=None, rationale=QUOTA_RATIONALE) for _ in articles]
         except Exception as e:
             logger.error(f"Batch rating failed: {e}")
             # Return failed results for all articles
             return [RatingResult(score=None, excluded_reason=None, rationale=f"Batch error: {e}") for _ in articles]
 
+        # Only answers Gemini produced feed the batch size; API errors say nothing about it
+        try:
+            ratings = parse_batch_response(text, articles)
+        except Exception as e:
+            # Nothing usable: every article is a gap the caller can send again
+            logger.error(f"Batch rating response unusable: {e}")
+            get_planner().record(len(articles), None)
+            return [RatingResult(score=None, excluded_reason=None, rationale=INVALID_RATIONALE) for _ in articles]
+
+        rated = sum(r["score"] is not None for r in ratings)
+        get_planner().record(len(articles), rated)
+        await cache_ratings(articles, ratings)
+        logger.info(f"Batch rated {rated} of {len(articles)} articles in single API call")
+        return ratings
+
 
 # Lazy singleton
 def get_rater() -> ArticleRater:
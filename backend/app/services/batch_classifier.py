@@ -0,0 +1,220 @@
+"""Vectorized keyword classification over many articles at once.
+
+Articles' normalized text is scanned into a sparse term-presence matrix
+(articles x keyword vocabulary of the shared matcher). Pre-filter verdicts, categories and
+heuristic scores are then computed with matrix products over every article
+at once. The results match pre_filter_article, detect_category,
+calculate_hopefulness_score and should_include for each article. This is used
+by the retry job and by reclassify_articles(), which re-evaluates stored rows
+classified under an older keyword rules version.
+"""
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import or_, select, update
+
+from app.database import async_session
+from app.models import Article
+from app.services import rating_queue
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.keyword_rules import RuleSet, get_rules
+from app.utils.text import normalize_article
+
+logger = logging.getLogger(__name__)
+
+# Rows loaded and written per transaction by reclassify.py
+RECLASSIFY_CHUNK_SIZE = 5000
+
+
+@dataclass
+class BatchClassification:
+    rules_version: str
+    passed: np.ndarray  # bool, one per article
+    reasons: list[str | None]  # pre-filter reason, None when passed
+    categories: list[str]
+    scores: np.ndarray  # heuristic hopefulness score in [0, 1]
+    include: np.ndarray  # bool, fewer than two negative score keywords
+
+
+@dataclass
+class _Weights:
+    """Vocabulary-by-output matrices derived from the keyword lists."""
+
+    filter_groups: list[tuple[str, np.ndarray]]  # (reason prefix, columns sorted by rank)
+    filter_matrix: sparse.csc_matrix  # vocabulary x filter groups, presence
+    category_names: list[str]
+    category_matrix: sparse.csc_matrix  # vocabulary x categories, presence
+    score_weights: np.ndarray  # per vocabulary column
+    negative_mask: np.ndarray  # per vocabulary column
+
+
+# Keyed by RuleSet identity; the previous entry covers batches that started before a reload
+@lru_cache(maxsize=2)
+def _weights(rules: RuleSet) -> _Weights:
+    matcher = rules.matcher
+    size = len(matcher.vocabulary)
+    by_group: dict[str, list[int]] = {}
+    for column, (group, _) in enumerate(matcher.vocabulary):
+        by_group.setdefault(group, []).append(column)
+
+    def indicator(groups: list[str]) -> sparse.csc_matrix:
+        rows = [c for g in groups for c in by_group.get(g, [])]
+        cols = [j for j, g in enumerate(groups) for _ in by_group.get(g, [])]
+        return sparse.csc_matrix((np.ones(len(rows)), (rows, cols)), shape=(size, len(groups)))
+
+    # Same order as pre_filter_article: negative categories, then trivial ones
+    filter_keys = [(f"negative:{c}", f"keyword_{c}") for c in rules.negative]
+    filter_keys += [(f"trivial:{c}", "keyword_trivial") for c in rules.trivial]
+    categories = rules.categories
+
+    score_weights = np.zeros(size)
+    for level, weight in rules.positive_weights.items():
+        score_weights[by_group.get(f"positive:{level}", [])] += weight
+    negative_mask = np.zeros(size, dtype=bool)
+    negative_mask[by_group.get("score_negative", [])] = True
+    score_weights[negative_mask] -= rules.negative_weight
+
+    return _Weights(
+        # Columns are assigned in list order, so ascending column means ascending rank
+        filter_groups=[(prefix, np.array(by_group.get(g, []), dtype=np.int64)) for g, prefix in filter_keys],
+        filter_matrix=indicator([g for g, _ in filter_keys]),
+        category_names=categories,
+        category_matrix=indicator([f"category:{c}" for c in categories]),
+        score_weights=score_weights,
+        negative_mask=negative_mask,
+    )
+
+
+def presence_matrix(texts: list[str], matcher: KeywordMatcher) -> sparse.csr_matrix:
+    """Articles x vocabulary 0/1 matrix for normalized texts, with sorted indices."""
+    indptr = [0]
+    indices: list[int] = []
+    for text in texts:
+        indices.extend(sorted(matcher.scan_columns(text.split())))
+        indptr.append(len(indices))
+    return sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+        shape=(len(texts), len(matcher.vocabulary)),
+    )
+
+
+def classify_batch(texts: list[str], rules: RuleSet | None = None) -> BatchClassification:
+    """Classify normalized article texts in one pass of matrix operations (default: current rules)."""
+    rules = rules or get_rules()
+    weights = _weights(rules)
+    vocabulary = rules.matcher.vocabulary
+    presence = presence_matrix(texts, rules.matcher)
+    n = presence.shape[0]
+
+    # Pre-filter: the first group with any hit decides, reporting its lowest-rank keyword
+    group_hits = (presence @ weights.filter_matrix).toarray() > 0
+    failed = group_hits.any(axis=1)
+    first_group = group_hits.argmax(axis=1)
+    reasons: list[str | None] = [None] * n
+    for g, (prefix, columns) in enumerate(weights.filter_groups):
+        rows = np.flatnonzero(failed & (first_group == g))
+        if not rows.size:
+            continue
+        sub = presence[rows][:, columns].tocsr()
+        sub.sort_indices()
+        first_columns = columns[sub.indices[sub.indptr[:-1]]]
+        for row, column in zip(rows, first_columns):
+            reasons[row] = f"{prefix}:{vocabulary[column][1]}"
+
+    # Category: most distinct keyword hits, ties to the first listed category
+    counts = (presence @ weights.category_matrix).toarray()
+    best = counts.argmax(axis=1)
+    names = np.array(weights.category_names + ["general"], dtype=object)
+    best[counts.max(axis=1, initial=0) == 0] = len(weights.category_names)
+
+    scores = np.clip(presence @ weights.score_weights, 0.0, 1.0)
+    negatives = presence @ weights.negative_mask.astype(np.float32)
+
+    return BatchClassification(
+        rules_version=rules.version,
+        passed=~failed,
+        reasons=reasons,
+        categories=names[best].tolist(),
+        scores=scores,
+        include=negatives < 2,
+    )
+
+
+async def reclassify_articles(chunk_size: int = RECLASSIFY_CHUNK_SIZE, only_stale: bool = True) -> dict:
+    """Re-apply the current keyword rules to stored articles.
+
+    Only rows classified under another rules version (or none) are read,
+    unless only_stale is False. Categories are recomputed. Articles the current
+    pre-filter would reject are marked filtered if they are not rated yet.
+    Articles that were only keyword-filtered but now pass go back to the
+    rating retry queue. Rows stored before normalized_text existed get it
+    filled in. Every row read is stamped with the rules version.
+
+    Rows are read by id keyset, one short transaction per chunk, so writers
+    are never blocked for long. The rules are fetched once, so a reload while
+    this runs leaves the rest for the next run.
+    """
+    rules = get_rules()
+    totals = {"scanned": 0, "normalized": 0, "recategorized": 0, "filtered": 0, "unfiltered": 0}
+    last_id = 0
+    query = select(
+        Article.id, Article.headline, Article.summary, Article.normalized_text, Article.category,
+        Article.excluded_reason, Article.is_rated, Article.duplicate_of, Article.source_name, Article.published_at,
+    )
+    if only_stale:
+        query = query.where(or_(Article.rules_version.is_(None), Article.rules_version != rules.version))
+
+    while True:
+        async with async_session() as session:
+            result = await session.execute(
+                query.where(Article.id > last_id).order_by(Article.id).limit(chunk_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            texts = [row.normalized_text or normalize_article(row.headline, row.summary) for row in rows]
+            outcome = classify_batch(texts, rules)
+            changes = []
+            queued, dequeued = [], []
+            for i, row in enumerate(rows):
+                values: dict = {"rules_version": rules.version}
+                if row.normalized_text is None:
+                    values["normalized_text"] = texts[i]
+                    totals["normalized"] += 1
+                if outcome.categories[i] != row.category:
+                    values["category"] = outcome.categories[i]
+                    totals["recategorized"] += 1
+
+                was_filtered = (row.excluded_reason or "").startswith("keyword_")
+                reason = outcome.reasons[i]
+                if reason and not row.is_rated and not row.duplicate_of:
+                    values.update(excluded_reason=reason, is_rated=True, rating_failed=False, hopefulness_score=None)
+                    dequeued.append(row.id)
+                    totals["filtered"] += 1
+                elif reason and was_filtered and reason != row.excluded_reason:
+                    values["excluded_reason"] = reason
+                elif not reason and was_filtered:
+                    values.update(excluded_reason=None, is_rated=False, rating_failed=True)
+                    queued.append(row)
+                    totals["unfiltered"] += 1
+
+                changes.append({"id": row.id, **values})
+
+            await session.execute(update(Article), changes)
+            await rating_queue.remove(session, dequeued)
+            await rating_queue.enqueue(session, queued)
+            await session.commit()
+            totals["scanned"] += len(rows)
+
+    if totals["scanned"]:
+        logger.info(
+            f"Reclassify (rules {rules.version}): {totals['scanned']} articles scanned, "
+            f"{totals['normalized']} normalized, {totals['recategorized']} recategorized, "
+            f"{totals['filtered']} newly filtered, {totals['unfiltered']} returned to the rating queue"
+        )
+    return totals
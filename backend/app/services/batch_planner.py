@@ -0,0 +1,107 @@
+"""Token-budget batch planning for Gemini ratings.
+
+A batch is filled until the next article would push the estimated prompt
+past RATING_BATCH_INPUT_TOKENS, the expected answer past
+RATING_BATCH_OUTPUT_TOKENS, or the article count past the planner's current
+cap. Short articles therefore share a request in larger numbers, and long
+Guardian standfirsts in smaller ones.
+
+The cap adapts to how Gemini copes, additive increase / multiplicative
+decrease. It starts at INITIAL_BATCH_ARTICLES and grows by one after each
+complete answer to a batch that was limited by the cap. It drops to the
+number of usable items returned when some are missing or invalid, and halves
+when the answer cannot be parsed at all. It stays within
+RATING_BATCH_MIN_ARTICLES..RATING_BATCH_MAX_ARTICLES.
+"""
+import logging
+import math
+from typing import TypeVar
+
+from app.config import settings
+from app.services.rating_prompt import (
+    ARTICLE_ID_LENGTH, BATCH_ARTICLE_TEMPLATE, BATCH_PROMPT_TEMPLATE, RATING_SYSTEM_PROMPT,
+)
+
+logger = logging.getLogger(__name__)
+
+# The batch size used before any outcome has been observed
+INITIAL_BATCH_ARTICLES = 10
+
+# Gemini averages about four characters per token for English text
+CHARS_PER_TOKEN = 4
+
+T = TypeVar("T")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of English text, without calling the tokenizer API."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+_PROMPT_OVERHEAD = estimate_tokens(RATING_SYSTEM_PROMPT + BATCH_PROMPT_TEMPLATE.format(articles=""))
+_ARTICLE_OVERHEAD = estimate_tokens(BATCH_ARTICLE_TEMPLATE.format(id="0" * ARTICLE_ID_LENGTH, title="", summary="", source="") + "\n\n")
+
+
+def article_tokens(article: dict) -> int:
+    """Estimated prompt tokens of one rater input dict ('title', 'summary', 'source')."""
+    text = f"{article.get('title', '')}{article.get('summary') or 'No summary available'}{article.get('source', '')}"
+    return _ARTICLE_OVERHEAD + estimate_tokens(text)
+
+
+class BatchPlanner:
+    """Shared batch-size state; see the module docstring."""
+
+    def __init__(self):
+        initial = min(INITIAL_BATCH_ARTICLES, settings.RATING_BATCH_MAX_ARTICLES)
+        self.max_articles = max(settings.RATING_BATCH_MIN_ARTICLES, initial)
+
+    def fits(self, count: int, input_tokens: int) -> bool:
+        """Whether a batch of count articles with input_tokens estimated article tokens is within budget."""
+        return (
+            count <= self.max_articles
+            and _PROMPT_OVERHEAD + input_tokens <= settings.RATING_BATCH_INPUT_TOKENS
+            and count * settings.RATING_OUTPUT_TOKENS_PER_ARTICLE <= settings.RATING_BATCH_OUTPUT_TOKENS
+        )
+
+    def pack(self, items: list[T], inputs: list[dict]) -> list[list[T]]:
+        """Split items into consecutive batches; inputs are their rater input dicts.
+
+        An article too long for the budget on its own still gets a batch by itself.
+        """
+        batches: list[list[T]] = []
+        batch: list[T] = []
+        tokens = 0
+        for item, article in zip(items, inputs):
+            cost = article_tokens(article)
+            if batch and not self.fits(len(batch) + 1, tokens + cost):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(item)
+            tokens += cost
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def record(self, size: int, returned: int | None) -> None:
+        """Adapt to the answer to a batch of size articles; returned (usable items) is None if it was unusable."""
+        previous = self.max_articles
+        if returned is None:
+            self.max_articles = max(settings.RATING_BATCH_MIN_ARTICLES, min(self.max_articles, size) // 2)
+        elif returned < size:
+            self.max_articles = max(settings.RATING_BATCH_MIN_ARTICLES, min(self.max_articles, returned))
+        elif size >= self.max_articles:
+            self.max_articles = min(settings.RATING_BATCH_MAX_ARTICLES, self.max_articles + 1)
+
+        if self.max_articles != previous:
+            logger.info(f"Rating batch size {previous} -> {self.max_articles} after {returned} of {size} answered")
+
+
+_planner: BatchPlanner | None = None
+
+
+def get_planner() -> BatchPlanner:
+    """The planner shared by the ingest pipeline and the retry job."""
+    global _planner
+    if _planner is None:
+        _planner = BatchPlanner()
+    return _planner
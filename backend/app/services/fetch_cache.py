@@ -0,0 +1,118 @@
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import httpx
+
+from app.database import async_session
+from app.models import SourceState
+
+logger = logging.getLogger(__name__)
+
+
+def hash_content(content: bytes) -> str:
+    """Return a stable digest of a response body."""
+    return hashlib.sha256(content).hexdigest()
+
+
+async def get_source_state(key: str) -> SourceState | None:
+    """Load the stored validators for a source, if any."""
+    async with async_session() as session:
+        return await session.get(SourceState, key)
+
+
+def conditional_headers(state: SourceState | None) -> dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from stored validators."""
+    headers = {}
+    if state is None:
+        return headers
+    if state.etag:
+        headers["If-None-Match"] = state.etag
+    if state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+    return headers
+
+
+def is_unchanged(state: SourceState | None, response: httpx.Response, content_hash: str | None) -> bool:
+    """True if the server answered 304 or the body matches the last stored hash."""
+    if response.status_code == 304:
+        return True
+    return state is not None and content_hash is not None and state.content_hash == content_hash
+
+
+@dataclass(frozen=True)
+class SourceStateUpdate:
+    """Validators (and a watermark) from a fetch, to be saved once its articles are stored."""
+
+    key: str
+    etag: str | None
+    last_modified: str | None
+    content_hash: str | None
+    watermark: datetime | None = None
+
+
+@dataclass
+class FetchResult:
+    """What a source fetcher returns: new articles and the state to save after they are stored.
+
+    Saving the state only after the pipeline has committed the articles means
+    a run that fails midway fetches them again, instead of a 304, a matching
+    hash or a moved watermark skipping them for good.
+    """
+
+    articles: list[dict] = field(default_factory=list)
+    states: list[SourceStateUpdate] = field(default_factory=list)
+
+
+def source_state_update(
+    key: str,
+    response: httpx.Response,
+    content_hash: str | None,
+    watermark: datetime | None = None,
+) -> SourceStateUpdate:
+    """The state to save for a successful response, and the watermark if given."""
+    return SourceStateUpdate(
+        key=key,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        content_hash=content_hash,
+        watermark=watermark,
+    )
+
+
+def unchanged_state_update(key: str, state: SourceState | None, response: httpx.Response) -> SourceStateUpdate | None:
+    """The validators to save when a fetch found nothing new, or None if the stored ones still hold.
+
+    A 200 whose body matches the stored hash carries the full set of
+    validators. A 304 need only repeat the ones that changed, so a missing
+    one keeps its stored value. The hash and watermark are left as stored.
+    """
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if response.status_code == 304 and state is not None:
+        etag = etag or state.etag
+        last_modified = last_modified or state.last_modified
+    if state is not None and (etag, last_modified) == (state.etag, state.last_modified):
+        return None
+    return SourceStateUpdate(key=key, etag=etag, last_modified=last_modified, content_hash=None)
+
+
+async def save_source_state(update: SourceStateUpdate) -> None:
+    """Persist the validators from a fetch, and its watermark and hash if set."""
+    try:
+        async with async_session() as session:
+            state = await session.get(SourceState, update.key)
+            if state is None:
+                state = SourceState(key=update.key)
+                session.add(state)
+            state.etag = update.etag
+            state.last_modified = update.last_modified
+            if update.content_hash is not None:
+                state.content_hash = update.content_hash
+            if update.watermark is not None:
+                state.watermark = update.watermark
+            await session.commit()
+    except Exception as e:
+        # A lost validator only costs one full download next cycle
+        logger.warning(f"Could not save fetch cache for {update.key}: {e}")
@@ -1,9 +1,22 @@
+import asyncio
 import logging
-from datetime import datetime, date
+import time
+from datetime import datetime, timedelta, timezone
 
 import httpx
 
 from app.config import settings
+from app.services import quota_ledger
+from app.services.fetch_cache import (
+    FetchResult,
+    conditional_headers,
+    get_source_state,
+    hash_content,
+    is_unchanged,
+    source_state_update,
+    unchanged_state_update,
+)
+from app.services.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -17,48 +30,28 @@ GUARDIAN_SECTIONS = [
     "technology",
 ]
 
-# Track daily usage (resets each day)
-_usage_tracker = {
-    "date": None,
-    "requests": 0,
-}
+QUOTA_PROVIDER = "guardian"
 MAX_DAILY_REQUESTS = 500
 WARNING_THRESHOLD = 400  # Warn when approaching limit
 
 
-def _check_rate_limit() -> bool:
-    """Check if we're within the daily rate limit."""
-    today = date.today()
-    if _usage_tracker["date"] != today:
-        _usage_tracker["date"] = today
-        _usage_tracker["requests"] = 0
-
-    return _usage_tracker["requests"] < MAX_DAILY_REQUESTS
-
-
-def _increment_usage():
-    """Increment the daily usage counter."""
-    _usage_tracker["requests"] += 1
+async def _reserve_request() -> quota_ledger.Reservation | None:
+    """Reserve one request against the daily limit shared by all workers, or None if it is used up."""
+    reservation = await quota_ledger.reserve(QUOTA_PROVIDER, MAX_DAILY_REQUESTS)
+    if reservation is None:
+        return None
 
-    if _usage_tracker["requests"] >= WARNING_THRESHOLD:
-        remaining = MAX_DAILY_REQUESTS - _usage_tracker["requests"]
-        logger.warning(f"Guardian API approaching limit: {_usage_tracker['requests']}/{MAX_DAILY_REQUESTS} ({remaining} remaining)")
+    if reservation.count >= WARNING_THRESHOLD:
+        remaining = MAX_DAILY_REQUESTS - reservation.count
+        logger.warning(f"Guardian API approaching limit: {reservation.count}/{MAX_DAILY_REQUESTS} ({remaining} remaining)")
     else:
-        logger.debug(f"Guardian API usage: {_usage_tracker['requests']}/{MAX_DAILY_REQUESTS} today")
+        logger.debug(f"Guardian API usage: {reservation.count}/{MAX_DAILY_REQUESTS} today")
+    return reservation
 
 
-def get_guardian_usage() -> dict:
+async def get_guardian_usage() -> dict:
     """Get current Guardian API usage stats."""
-    today = date.today()
-    if _usage_tracker["date"] != today:
-        return {"requests": 0, "limit": MAX_DAILY_REQUESTS, "remaining": MAX_DAILY_REQUESTS}
-
-    remaining = MAX_DAILY_REQUESTS - _usage_tracker["requests"]
-    return {
-        "requests": _usage_tracker["requests"],
-        "limit": MAX_DAILY_REQUESTS,
-        "remaining": remaining,
-    }
+    return await quota_ledger.get_usage(QUOTA_PROVIDER, MAX_DAILY_REQUESTS)
 
 
 def parse_guardian_date(date_str: str | None) -> datetime | None:
@@ -71,67 +64,153 @@ def parse_guardian_date(date_str: str | None) -> datetime | None:
         return None
 
 
-async def fetch_guardian_section(client: httpx.AsyncClient, section: str) -> list[dict]:
-    """Fetch articles from a single Guardian section."""
-    # Check rate limit before making request
-    if not _check_rate_limit():
-        logger.warning(f"Guardian API daily limit reached, skipping section {section}")
-        return []
-
-    try:
-        response = await client.get(
-            f"{GUARDIAN_BASE_URL}/{section}",
-            params={
-                "api-key": settings.GUARDIAN_API_KEY,
-                "show-fields": "headline,standfirst,thumbnail",
-                "page-size": 50,
-                "order-by": "newest",
-            },
-        )
+def _to_watermark(published: datetime | None) -> datetime | None:
+    """Normalize a publication time to naive UTC for storage."""
+    if published is None:
+        return None
+    if published.tzinfo is not None:
+        published = published.astimezone(timezone.utc).replace(tzinfo=None)
+    return published
+
+
+def _parse_results(data: dict) -> list[dict]:
+    """Convert a Guardian results page into article dicts."""
+    articles = []
+    for item in data.get("response", {}).get("results", []):
+        fields = item.get("fields", {})
+        articles.append({
+            "guid": item.get("id", ""),
+            "title": fields.get("headline") or item.get("webTitle", ""),
+            "summary": fields.get("standfirst", ""),
+            "link": item.get("webUrl", ""),
+            "source_name": "The Guardian",
+            "image_url": fields.get("thumbnail"),
+            "published": parse_guardian_date(item.get("webPublicationDate")),
+        })
+    return articles
+
+
+async def _fetch_page(
+    section: str, params: dict, headers: dict, semaphore: asyncio.Semaphore
+) -> httpx.Response | None:
+    """Request one results page, or None if the daily quota is used up."""
+    async with semaphore:
+        # Reserve quota before making request
+        reservation = await _reserve_request()
+        if reservation is None:
+            logger.warning(f"Guardian API daily limit reached, stopping section {section}")
+            return None
+
+        try:
+            response = await get_http_client().get(
+                f"{GUARDIAN_BASE_URL}/{section}",
+                source="guardian",
+                params=params,
+                headers=headers,
+            )
+        except httpx.TransportError:
+            # The request never reached the API
+            await quota_ledger.refund(reservation)
+            raise
+        await quota_ledger.commit(reservation)
+
+    if response.status_code != 304:
         response.raise_for_status()
-        _increment_usage()
-        data = response.json()
+    return response
 
+
+async def fetch_guardian_section(section: str, semaphore: asyncio.Semaphore) -> FetchResult:
+    """Fetch articles published in a section since its high-water mark.
+
+    Pages oldest-first from the stored watermark (or GUARDIAN_INITIAL_LOOKBACK_HOURS
+    ago on the first run), so if the page cap or daily quota cuts a run short,
+    the next run resumes where this one stopped instead of leaving a gap.
+    """
+    cache_key = f"guardian:{section}"
+
+    try:
+        state = await get_source_state(cache_key)
+        watermark = state.watermark if state else None
+        from_date = watermark or datetime.utcnow() - timedelta(hours=settings.GUARDIAN_INITIAL_LOOKBACK_HOURS)
+
+        params = {
+            "api-key": settings.GUARDIAN_API_KEY,
+            "show-fields": "headline,standfirst,thumbnail",
+            "page-size": settings.GUARDIAN_PAGE_SIZE,
+            "order-by": "oldest",
+            "from-date": from_date.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+
+        response = await _fetch_page(section, params, conditional_headers(state), semaphore)
+        if response is None:
+            return FetchResult()
+
+        # Nothing new since last fetch: skip parsing and dedupe
+        digest = hash_content(response.content) if response.status_code != 304 else None
+        if is_unchanged(state, response, digest):
+            logger.debug(f"Guardian {section}: unchanged since last fetch")
+            update = unchanged_state_update(cache_key, state, response)
+            return FetchResult(states=[update] if update else [])
+
+        first_response = response
         articles = []
-        for item in data.get("response", {}).get("results", []):
-            fields = item.get("fields", {})
-            articles.append({
-                "guid": item.get("id", ""),
-                "title": fields.get("headline") or item.get("webTitle", ""),
-                "summary": fields.get("standfirst", ""),
-                "link": item.get("webUrl", ""),
-                "source_name": "The Guardian",
-                "image_url": fields.get("thumbnail"),
-                "published": parse_guardian_date(item.get("webPublicationDate")),
-            })
-        return articles
+        page = 1
+        while True:
+            data = response.json()
+            articles.extend(_parse_results(data))
+
+            total_pages = data.get("response", {}).get("pages", 1)
+            if page >= total_pages:
+                break
+            if page >= settings.GUARDIAN_MAX_PAGES_PER_SECTION:
+                logger.info(f"Guardian {section}: page cap reached at {page}/{total_pages}, resuming next run")
+                break
+
+            page += 1
+            response = await _fetch_page(section, {**params, "page": page}, {}, semaphore)
+            if response is None:
+                break
+
+        newest = max((a["published"] for a in articles if a["published"]), default=None)
+        new_watermark = _to_watermark(newest)
+        if new_watermark is not None and watermark is not None:
+            new_watermark = max(new_watermark, watermark)
+
+        logger.debug(f"Guardian {section}: {len(articles)} articles over {page} page(s) since {from_date}")
+        return FetchResult(articles, [source_state_update(cache_key, first_response, digest, watermark=new_watermark)])
 
     except httpx.HTTPStatusError as e:
         logger.error(f"Guardian API error for section {section}: {e.response.status_code}")
-        return []
+        return FetchResult()
     except Exception as e:
         logger.error(f"Guardian fetch failed for section {section}: {e}")
-        return []
+        return FetchResult()
 
 
-async def fetch_guardian_articles() -> list[dict]:
+async def fetch_guardian_articles() -> FetchResult:
     """Fetch articles from all Guardian sections."""
     if not settings.GUARDIAN_ENABLED:
         logger.debug("Guardian API is disabled")
-        return []
+        return FetchResult()
 
     if not settings.GUARDIAN_API_KEY:
         logger.warning("Guardian API key not configured")
-        return []
+        return FetchResult()
 
     logger.info("Fetching articles from The Guardian API")
-    all_articles = []
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(settings.GUARDIAN_MAX_CONCURRENCY)
+
+    results = await asyncio.gather(
+        *(fetch_guardian_section(section, semaphore) for section in GUARDIAN_SECTIONS)
+    )
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for section in GUARDIAN_SECTIONS:
-            articles = await fetch_guardian_section(client, section)
-            all_articles.extend(articles)
-            logger.debug(f"Guardian {section}: {len(articles)} articles")
+    all_articles = []
+    states = []
+    for section, result in zip(GUARDIAN_SECTIONS, results):
+        all_articles.extend(result.articles)
+        states.extend(result.states)
+        logger.debug(f"Guardian {section}: {len(result.articles)} articles")
 
     # Deduplicate by guid (same article can appear in multiple sections)
     seen_guids = set()
@@ -141,5 +220,8 @@ async def fetch_guardian_articles() -> list[dict]:
             seen_guids.add(article["guid"])
             unique_articles.append(article)
 
-    logger.info(f"Guardian API: fetched {len(unique_articles)} unique articles")
-    return unique_articles
+    logger.info(
+        f"Guardian API: fetched {len(unique_articles)} unique articles "
+        f"in {(time.perf_counter() - started) * 1000:.0f}ms"
+    )
+    return FetchResult(unique_articles, states)
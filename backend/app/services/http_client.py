@@ -0,0 +1,119 @@
+import asyncio
+import importlib.util
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import settings
+from app.utils.replay import build_transport
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (compatible; BrightWorldNews/1.0)"
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class HTTPClientManager:
+    """Application-scoped pooled httpx client shared by every fetcher.
+
+    Started and stopped by the FastAPI lifespan. Scripts that never run the
+    lifespan get a client lazily on first use and should call stop() when done.
+    """
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self._timeouts: dict[str, float] = {"og_image": settings.OG_IMAGE_TIMEOUT_SECONDS}
+
+    async def start(self) -> None:
+        """Open the shared connection pool."""
+        if self._client is not None and not self._client.is_closed:
+            return
+
+        http2 = settings.HTTP2_ENABLED and _http2_available()
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            timeout=httpx.Timeout(settings.HTTP_DEFAULT_TIMEOUT_SECONDS, connect=10.0),
+            limits=limits,
+            # Record/replay stand-in when REPLAY_MODE is set, else httpx's default
+            transport=build_transport(http2, limits),
+        )
+        logger.info(
+            f"HTTP client started (http2={http2}, max_connections={settings.HTTP_MAX_CONNECTIONS}, "
+            f"per_host={settings.HTTP_MAX_CONNECTIONS_PER_HOST}, replay={settings.REPLAY_MODE})"
+        )
+
+    async def stop(self) -> None:
+        """Close the pool and drop all idle connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_slots.clear()
+        logger.info("HTTP client stopped")
+
+    async def client(self) -> httpx.AsyncClient:
+        """Return the shared client, starting it if needed."""
+        if self._client is None or self._client.is_closed:
+            await self.start()
+        return self._client
+
+    def register_timeout(self, source: str, seconds: float) -> None:
+        """Set the read timeout used for requests made on behalf of a source."""
+        self._timeouts[source] = seconds
+
+    def timeout_for(self, source: str) -> httpx.Timeout:
+        """Timeout for a named source, falling back to the default."""
+        seconds = self._timeouts.get(source, settings.HTTP_DEFAULT_TIMEOUT_SECONDS)
+        return httpx.Timeout(seconds, connect=min(seconds, 10.0))
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(settings.HTTP_MAX_CONNECTIONS_PER_HOST)
+            self._host_slots[host] = slot
+        return slot
+
+    async def get(self, url: str, *, source: str, **kwargs) -> httpx.Response:
+        """GET through the shared pool, limited per host and timed out per source."""
+        client = await self.client()
+        kwargs.setdefault("timeout", self.timeout_for(source))
+        async with self._host_slot(url):
+            return await client.get(url, **kwargs)
+
+    async def post(self, url: str, *, source: str, **kwargs) -> httpx.Response:
+        """POST through the shared pool, limited per host and timed out per source."""
+        client = await self.client()
+        kwargs.setdefault("timeout", self.timeout_for(source))
+        async with self._host_slot(url):
+            return await client.post(url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, *, source: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Stream a response through the shared pool, holding the host slot until closed."""
+        client = await self.client()
+        kwargs.setdefault("timeout", self.timeout_for(source))
+        async with self._host_slot(url):
+            async with client.stream(method, url, **kwargs) as response:
+                yield response
+
+
+http_clients = HTTPClientManager()
+
+
+def get_http_client() -> HTTPClientManager:
+    return http_clients
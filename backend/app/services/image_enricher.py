@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, or_, select
+
+from app.config import settings
+from app.database import async_session, insert
+from app.models import ImageCache
+from app.services.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# Never read more than this much of a page looking for </head>
+MAX_HEAD_BYTES = 50_000
+
+OG_IMAGE_PATTERNS = [
+    re.compile(r'<meta[^>]+property=["\']og:image["\'][^>]+content=["\']([^"\']+)["\']', re.IGNORECASE),
+    re.compile(r'<meta[^>]+content=["\']([^"\']+)["\'][^>]+property=["\']og:image["\']', re.IGNORECASE),
+]
+HEAD_END = re.compile(rb"</head\s*>", re.IGNORECASE)
+
+
+def extract_og_image(html: str) -> str | None:
+    """Find the og:image meta tag in an HTML fragment."""
+    for pattern in OG_IMAGE_PATTERNS:
+        match = pattern.search(html)
+        if match:
+            return match.group(1)
+    return None
+
+
+async def fetch_og_image(url: str) -> str | None:
+    """Fetch og:image from an article URL, reading only up to </head>."""
+    try:
+        async with get_http_client().stream("GET", url, source="og_image") as response:
+            if response.status_code != 200:
+                return None
+
+            head = bytearray()
+            async for chunk in response.aiter_bytes():
+                # Only rescan the tail that could contain a split "</head>"
+                scan_from = max(0, len(head) - 8)
+                head.extend(chunk)
+                if HEAD_END.search(head, scan_from) or len(head) >= MAX_HEAD_BYTES:
+                    break
+
+            encoding = response.charset_encoding or "utf-8"
+            html = bytes(head[:MAX_HEAD_BYTES]).decode(encoding, errors="ignore")
+            return extract_og_image(html)
+    except Exception:
+        return None
+
+
+def _is_fresh(entry: ImageCache, now: datetime) -> bool:
+    """Hits live as long as articles do; misses expire sooner so they get retried."""
+    if entry.image_url:
+        ttl = timedelta(days=settings.OG_IMAGE_CACHE_TTL_DAYS)
+    else:
+        ttl = timedelta(hours=settings.OG_IMAGE_NEGATIVE_TTL_HOURS)
+    return entry.checked_at >= now - ttl
+
+
+async def enrich_images(articles: list[dict]) -> int:
+    """Fill in image_url for articles that lack one, in place.
+
+    Cached lookups are served from the image_cache table; the rest are fetched
+    concurrently (OG_IMAGE_MAX_CONCURRENCY) and written back to the cache,
+    including misses. Returns the number of images found.
+    """
+    pending: dict[str, list[dict]] = {}
+    for article in articles:
+        link = article.get("link")
+        if not article.get("image_url") and link:
+            pending.setdefault(link, []).append(article)
+
+    if not pending:
+        return 0
+
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    found = 0
+
+    async with async_session() as session:
+        result = await session.execute(select(ImageCache).where(ImageCache.url.in_(list(pending))))
+        cached = {entry.url: entry for entry in result.scalars().all()}
+
+        to_fetch = []
+        for link, waiting in pending.items():
+            entry = cached.get(link)
+            if entry is not None and _is_fresh(entry, now):
+                if entry.image_url:
+                    found += 1
+                    for article in waiting:
+                        article["image_url"] = entry.image_url
+            else:
+                to_fetch.append(link)
+
+        semaphore = asyncio.Semaphore(settings.OG_IMAGE_MAX_CONCURRENCY)
+
+        async def lookup(link: str) -> str | None:
+            async with semaphore:
+                return await fetch_og_image(link)
+
+        images = await asyncio.gather(*(lookup(link) for link in to_fetch))
+
+        for link, image_url in zip(to_fetch, images):
+            if image_url:
+                found += 1
+                for article in pending[link]:
+                    article["image_url"] = image_url
+
+        if to_fetch:
+            # Another run may have looked up the same link meanwhile; keep the newer answer
+            statement = insert(ImageCache).values([
+                {"url": link, "image_url": image_url, "checked_at": now}
+                for link, image_url in zip(to_fetch, images)
+            ])
+            await session.execute(statement.on_conflict_do_update(
+                index_elements=[ImageCache.url],
+                set_={"image_url": statement.excluded.image_url, "checked_at": statement.excluded.checked_at},
+            ))
+            await session.commit()
+
+    logger.info(
+        f"Image enrichment: {len(pending)} articles, {len(pending) - len(to_fetch)} cached, "
+        f"{len(to_fetch)} fetched, {found} images found in {(time.perf_counter() - started) * 1000:.0f}ms"
+    )
+    return found
+
+
+async def purge_image_cache() -> int:
+    """Delete cache entries that are past their TTL."""
+    now = datetime.utcnow()
+    async with async_session() as session:
+        result = await session.execute(
+            delete(ImageCache).where(
+                or_(
+                    ImageCache.checked_at < now - timedelta(days=settings.OG_IMAGE_CACHE_TTL_DAYS),
+                    ImageCache.image_url.is_(None)
+                    & (ImageCache.checked_at < now - timedelta(hours=settings.OG_IMAGE_NEGATIVE_TTL_HOURS)),
+                )
+            )
+        )
+        await session.commit()
+        return result.rowcount
@@ -0,0 +1,509 @@
+"""Streaming ingest pipeline.
+
+Articles flow through async generator stages connected by bounded queues:
+
+    fetch -> dedupe -> pre-filter -> near-dup -> categorize -> enrich -> predict -> rate -> persist
+
+Each stage runs in its own task and blocks once its output queue is full, so
+memory stays flat as sources grow, and rows are committed as soon as they
+reach the persist stage instead of in one transaction at the end.
+
+Each stage adds the time spent on its own work (not waiting on neighbours) to
+PipelineStats.stage_seconds, so runs replayed from fixtures can be compared.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import aclosing, contextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Iterator
+
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models import Article
+from app.services import rating_queue
+from app.services.article_rater import BACKEND as RATER_BACKEND, get_rater, needs_rerating
+from app.services.batch_planner import article_tokens, get_planner
+from app.services.content_filter import detect_category
+from app.services.fetch_cache import FetchResult, SourceStateUpdate, save_source_state
+from app.services.image_enricher import enrich_images
+from app.services.keyword_filter import pre_filter_article
+from app.services.keyword_matcher import scan_normalized
+from app.services.keyword_rules import get_rules
+from app.services.rating_cache import get_cached_ratings
+from app.services.score_predictor import get_predictor
+from app.services.near_duplicates import load_recent_index, resolve_waiting_duplicates, simhash_normalized, to_signed
+from app.utils.streams import batched, buffered
+from app.utils.text import clean_text, normalize_article
+from app.utils.urls import canonical_url_key, clean_url
+
+logger = logging.getLogger(__name__)
+
+# Typical rating batch size, used to size buffers and lookup groups; actual
+# batches are planned by app.services.batch_planner
+ARTICLES_PER_BATCH = 10
+
+# A source is a display name plus a coroutine factory returning its articles
+# and the fetch state to save once they are stored
+SourceFetcher = tuple[str, Callable[[], Awaitable[FetchResult]]]
+
+
+@dataclass
+class PipelineStats:
+    fetched: int = 0
+    new: int = 0
+    filtered: int = 0
+    duplicates: int = 0
+    predicted: int = 0
+    cached: int = 0
+    rated: int = 0
+    pending: int = 0
+    stored: int = 0
+    by_source: dict[str, int] = field(default_factory=dict)
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+
+
+@contextmanager
+def _timed(stats: PipelineStats, stage: str) -> Iterator[None]:
+    """Add the time spent in the block to the stage's total."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.stage_seconds[stage] = stats.stage_seconds.get(stage, 0.0) + time.perf_counter() - started
+
+
+async def fetch_stage(
+    sources: list[SourceFetcher], stats: PipelineStats, states: list[SourceStateUpdate]
+) -> AsyncIterator[list[dict]]:
+    """Run every source concurrently and yield each one's articles as soon as it finishes.
+
+    Their fetch state is collected in states, for run_pipeline to save once
+    the articles are stored.
+    """
+
+    async def run(name: str, fetch: Callable[[], Awaitable[FetchResult]]) -> tuple[str, FetchResult]:
+        try:
+            return name, await fetch()
+        except Exception as e:
+            logger.error(f"Source {name} failed: {e}")
+            return name, FetchResult()
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(run(name, fetch)) for name, fetch in sources]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            name, result = await next_done
+            articles = result.articles
+            states.extend(result.states)
+            stats.stage_seconds["fetch"] = time.perf_counter() - started
+            stats.by_source[name] = stats.by_source.get(name, 0) + len(articles)
+            stats.fetched += len(articles)
+            if articles:
+                yield articles
+    finally:
+        # If a later stage failed, let in-flight fetches finish (they are bounded
+        # by per-source timeouts) rather than cancel them mid database write
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def dedupe_stage(chunks: AsyncIterator[list[dict]], stats: PipelineStats) -> AsyncIterator[dict]:
+    """Drop articles already seen in this run or already stored, one DB query per chunk.
+
+    Links are cleaned of tracking parameters, and articles are matched on guid
+    and on the hashed canonical URL, so the same page reached through different
+    feeds or tracking links is stored (and rated) once.
+    """
+    seen_guids: set[str] = set()
+    seen_keys: set[str] = set()
+
+    async for chunk in chunks:
+        with _timed(stats, "dedupe"):
+            candidates = []
+            for article in chunk:
+                guid = article.get("guid")
+                if not guid or guid in seen_guids:
+                    continue
+
+                link = article.get("link") or ""
+                article["link"] = clean_url(link)
+                key = canonical_url_key(link)
+                if key is not None and key in seen_keys:
+                    continue
+
+                seen_guids.add(guid)
+                if key is not None:
+                    seen_keys.add(key)
+                article["canonical_key"] = key
+                candidates.append(article)
+
+            if not candidates:
+                continue
+
+            keys = [a["canonical_key"] for a in candidates if a["canonical_key"]]
+            async with async_session() as session:
+                result = await session.execute(
+                    select(Article.guid, Article.canonical_key).where(
+                        or_(
+                            Article.guid.in_([a["guid"] for a in candidates]),
+                            Article.canonical_key.in_(keys),
+                        )
+                    )
+                )
+                rows = result.all()
+        existing_guids = {row.guid for row in rows}
+        existing_keys = {row.canonical_key for row in rows if row.canonical_key}
+
+        for article in candidates:
+            if article["guid"] in existing_guids or article["canonical_key"] in existing_keys:
+                continue
+            stats.new += 1
+            yield article
+
+
+async def filter_stage(articles: AsyncIterator[dict], stats: PipelineStats) -> AsyncIterator[dict]:
+    """Normalize each article's text once and apply the keyword pre-filter.
+
+    Filtered articles are tagged and skip rating. The normalized text is
+    stored with the article and reused by every later stage, and the keyword
+    scan is kept so categorization reuses it. The keyword rules are taken once
+    per article, so a reload mid-run never mixes two versions on one article.
+    """
+    async for article in articles:
+        with _timed(stats, "filter"):
+            rules = get_rules()
+            title, summary = article.get("title", ""), article.get("summary") or ""
+            article["normalized_text"] = normalize_article(title, summary)
+            article["_rules"] = rules
+            article["_matches"] = scan_normalized(article["normalized_text"], rules.matcher)
+            filter_result = pre_filter_article(title, summary, article["_matches"], rules)
+        if not filter_result["passed"]:
+            article["_filter_reason"] = filter_result["reason"]
+            stats.filtered += 1
+        yield article
+
+
+async def near_duplicate_stage(articles: AsyncIterator[dict], stats: PipelineStats) -> AsyncIterator[dict]:
+    """Fingerprint articles and tag near-duplicates of recent stories so they skip rating.
+
+    Only articles that passed the pre-filter are matched and indexed; a tagged
+    duplicate inherits its representative's score once that one is rated.
+    """
+    with _timed(stats, "near_duplicate"):
+        index = await load_recent_index()
+
+    async for article in articles:
+        with _timed(stats, "near_duplicate"):
+            fingerprint = simhash_normalized(article["normalized_text"])
+            article["simhash"] = to_signed(fingerprint)
+
+            if not article.get("_filter_reason"):
+                representative = index.find(fingerprint)
+                if representative is not None:
+                    article["_duplicate_of"] = representative
+                    stats.duplicates += 1
+                    logger.debug(f"Near-duplicate: '{article.get('title', '')[:50]}' -> {representative}")
+                else:
+                    index.add(article["guid"], fingerprint)
+
+        yield article
+
+
+async def categorize_stage(articles: AsyncIterator[dict], stats: PipelineStats) -> AsyncIterator[dict]:
+    """Attach a keyword-based category."""
+    async for article in articles:
+        with _timed(stats, "categorize"):
+            article["category"] = detect_category(
+                article.get("title", ""), article.get("summary") or "", article.get("_matches"), article.get("_rules")
+            )
+        yield article
+
+
+async def enrich_stage(articles: AsyncIterator[dict], stats: PipelineStats) -> AsyncIterator[dict]:
+    """Look up missing og:images in small concurrent groups."""
+    group_size = settings.OG_IMAGE_MAX_CONCURRENCY * 2
+    async for group in batched(articles, group_size, max_wait=settings.PIPELINE_FLUSH_SECONDS):
+        with _timed(stats, "enrich"):
+            await enrich_images(group)
+        for article in group:
+            yield article
+
+
+async def predict_stage(articles: AsyncIterator[dict], stats: PipelineStats) -> AsyncIterator[dict]:
+    """Score articles locally when the trained predictor is confident, so they skip Gemini."""
+    predictor = get_predictor()
+
+    async for article in articles:
+        if predictor is not None and not article.get("_filter_reason") and not article.get("_duplicate_of"):
+            with _timed(stats, "predict"):
+                prediction = predictor.predict(article["normalized_text"], article.get("source_name", ""))
+            if prediction.confident:
+                article["hopefulness_score"] = prediction.score
+                article["is_rated"] = True
+                article["rating_failed"] = False
+                article["rating_source"] = "local"
+                stats.predicted += 1
+        yield article
+
+
+def _rater_input(article: dict) -> dict:
+    """The dict the rater and rating cache take for an article."""
+    # Prompts get the text without markup, which also keeps them short
+    return {
+        "title": clean_text(article.get("title")),
+        "summary": clean_text(article.get("summary")),
+        "source": article.get("source_name", ""),
+    }
+
+
+def _needs_rating(article: dict) -> bool:
+    """Whether an article still has to go to Gemini."""
+    if article.get("_filter_reason") or article.get("_duplicate_of"):
+        return False
+    return article.get("rating_source") not in ("local", "cache")
+
+
+async def cache_stage(articles: AsyncIterator[dict], stats: PipelineStats) -> AsyncIterator[dict]:
+    """Answer articles whose text was already rated from the rating cache, so they skip Gemini."""
+    async for group in batched(articles, ARTICLES_PER_BATCH * 5, max_wait=settings.PIPELINE_FLUSH_SECONDS):
+        lookup = [article for article in group if _needs_rating(article)]
+        with _timed(stats, "cache"):
+            ratings = await get_cached_ratings([_rater_input(article) for article in lookup])
+        for article, rating in zip(lookup, ratings):
+            if rating is not None:
+                article["hopefulness_score"] = rating["score"]
+                article["excluded_reason"] = rating["excluded_reason"]
+                article["is_rated"] = True
+                article["rating_failed"] = False
+                article["rating_source"] = "cache"
+                stats.cached += 1
+        for article in group:
+            yield article
+
+
+async def _rate_batch(batch: list[dict], stats: PipelineStats) -> list[dict]:
+    """Rate one batch with a single Gemini call and record the outcome on each article.
+
+    The rater's shared limiter paces the call; out of quota, the batch is left
+    pending. Returns the articles the answer skipped or got wrong that may
+    still be carried into another batch (see RATING_MAX_ROLLOVERS).
+    """
+    rater = get_rater()
+    if not await rater.can_rate():
+        for article in batch:
+            _mark_pending(article, stats)
+        return []
+
+    batch_input = [_rater_input(a) for a in batch]
+
+    logger.info(f"Batch rating {len(batch)} articles in single API call")
+    ratings = await rater.rate_articles_batch(batch_input)
+
+    rollover = []
+    for article, rating in zip(batch, ratings):
+        if needs_rerating(rating) and article.get("_rollovers", 0) < settings.RATING_MAX_ROLLOVERS:
+            article["_rollovers"] = article.get("_rollovers", 0) + 1
+            rollover.append(article)
+            continue
+
+        score = rating.get("score")
+        article["hopefulness_score"] = score
+        article["excluded_reason"] = rating.get("excluded_reason")
+        article["is_rated"] = score is not None
+        article["rating_failed"] = score is None
+        if score is not None:
+            article["rating_source"] = RATER_BACKEND
+            stats.rated += 1
+            logger.debug(f"Rated '{article.get('title', '')[:50]}': {score}")
+        else:
+            stats.pending += 1
+
+    if rollover:
+        logger.info(f"Carrying {len(rollover)} unanswered articles into the next batch")
+    return rollover
+
+
+def _mark_pending(article: dict, stats: PipelineStats) -> None:
+    """Leave an article for the retry job."""
+    article["is_rated"] = False
+    article["rating_failed"] = True
+    stats.pending += 1
+
+
+async def rate_stage(articles: AsyncIterator[dict], stats: PipelineStats) -> AsyncIterator[dict]:
+    """Rate articles that passed the pre-filter in batches packed to the planner's budget.
+
+    Filtered articles, near-duplicates, locally predicted and cached ones pass
+    straight through. Articles waiting for a batch are carried over until the
+    next one would not fit, so no daily request is spent on a partial batch
+    except the last one of the run. Up to GEMINI_MAX_IN_FLIGHT batches are
+    rated concurrently while more articles arrive; rated batches are passed
+    on in the order they were sent. Articles an answer skips or gets wrong
+    join the next batch, up to RATING_MAX_ROLLOVERS times. Once the daily
+    quota runs out the rest are stored as pending for the retry job.
+    """
+    planner = get_planner()
+    waiting: list[dict] = []
+    waiting_tokens = 0
+    in_flight: deque[tuple[asyncio.Task, list[dict]]] = deque()
+
+    async def rate(batch: list[dict]) -> list[dict]:
+        with _timed(stats, "rate"):
+            return await _rate_batch(batch, stats)
+
+    def send() -> None:
+        nonlocal waiting, waiting_tokens
+        in_flight.append((asyncio.create_task(rate(waiting)), waiting))
+        waiting, waiting_tokens = [], 0
+
+    def add(article: dict) -> None:
+        """Queue an article, first sending the waiting batch if the article would not fit."""
+        nonlocal waiting_tokens
+        tokens = article_tokens(_rater_input(article))
+        if waiting and not planner.fits(len(waiting) + 1, waiting_tokens + tokens):
+            send()
+        waiting.append(article)
+        waiting_tokens += tokens
+
+    async def finished(limit: int) -> AsyncIterator[dict]:
+        """Wait for the oldest batches until at most limit are in flight.
+
+        Articles an answer skipped go back into the waiting batch.
+        """
+        while len(in_flight) > limit:
+            task, batch = in_flight.popleft()
+            rollover = {id(article) for article in await task}
+            for article in batch:
+                if id(article) in rollover:
+                    add(article)
+                else:
+                    yield article
+
+    try:
+        async for article in articles:
+            if not _needs_rating(article):
+                yield article
+                continue
+
+            sent = len(in_flight)
+            add(article)
+            if len(in_flight) > sent:
+                async for rated in finished(settings.GEMINI_MAX_IN_FLIGHT - 1):
+                    yield rated
+
+        # Rolled-over articles can leave a new partial batch after each drain
+        while waiting or in_flight:
+            if waiting:
+                send()
+            async for rated in finished(0):
+                yield rated
+    finally:
+        for task, _ in in_flight:
+            task.cancel()
+
+
+def _to_model(article: dict) -> Article:
+    """Build an Article row from a pipeline article dict."""
+    filter_reason = article.get("_filter_reason")
+    duplicate_of = None if filter_reason else article.get("_duplicate_of")
+    if duplicate_of:
+        # Waits (neither rated nor queued for retry) until its cluster is rated
+        article["is_rated"] = False
+        article["rating_failed"] = False
+
+    return Article(
+        guid=article.get("guid"),
+        headline=article.get("title", ""),
+        summary=article.get("summary") or "",
+        normalized_text=article.get("normalized_text"),
+        source_url=article.get("link", ""),
+        canonical_key=article.get("canonical_key"),
+        source_name=article.get("source_name", ""),
+        image_url=article.get("image_url"),
+        published_at=article.get("published"),
+        hopefulness_score=None if filter_reason else article.get("hopefulness_score"),
+        category=article.get("category"),
+        # Filtered articles count as rated so they don't go to the retry queue
+        is_rated=True if filter_reason else article.get("is_rated", False),
+        rating_failed=False if filter_reason else article.get("rating_failed", True),
+        excluded_reason=filter_reason or article.get("excluded_reason"),
+        rating_source=None if filter_reason or duplicate_of else article.get("rating_source"),
+        rules_version=article["_rules"].version if article.get("_rules") else None,
+        simhash=article.get("simhash"),
+        duplicate_of=duplicate_of,
+    )
+
+
+async def _queue_pending(session: AsyncSession, models: list[Article]) -> None:
+    """Flush the rows and queue the ones left for the retry job, in the same transaction."""
+    await session.flush()
+    await rating_queue.enqueue(session, [m for m in models if m.rating_failed])
+
+
+async def persist_stage(articles: AsyncIterator[dict], session: AsyncSession, stats: PipelineStats) -> None:
+    """Insert articles and commit in small groups as they arrive."""
+    async for group in batched(articles, settings.PIPELINE_COMMIT_SIZE, max_wait=settings.PIPELINE_FLUSH_SECONDS):
+        with _timed(stats, "persist"):
+            models = [_to_model(a) for a in group]
+            session.add_all(models)
+            try:
+                await _queue_pending(session, models)
+                await session.commit()
+                stats.stored += len(group)
+            except IntegrityError:
+                # Another run stored some of these first; insert the rest one by one
+                await session.rollback()
+                for article in group:
+                    model = _to_model(article)
+                    session.add(model)
+                    try:
+                        await _queue_pending(session, [model])
+                        await session.commit()
+                        stats.stored += 1
+                    except IntegrityError:
+                        await session.rollback()
+
+            if stats.duplicates:
+                await resolve_waiting_duplicates(session)
+        logger.debug(f"Committed {len(group)} articles ({stats.stored} so far)")
+
+
+async def run_pipeline(sources: list[SourceFetcher], session: AsyncSession) -> PipelineStats:
+    """Stream articles from the given sources through every stage into the database."""
+    stats = PipelineStats()
+    started = time.perf_counter()
+    size = settings.PIPELINE_QUEUE_SIZE
+
+    states: list[SourceStateUpdate] = []
+    stream = buffered(fetch_stage(sources, stats, states), max(1, size // ARTICLES_PER_BATCH))
+    stream = buffered(dedupe_stage(stream, stats), size)
+    stream = buffered(filter_stage(stream, stats), size)
+    stream = buffered(near_duplicate_stage(stream, stats), size)
+    stream = buffered(categorize_stage(stream, stats), size)
+    stream = buffered(enrich_stage(stream, stats), size)
+    stream = buffered(predict_stage(stream, stats), size)
+    stream = buffered(cache_stage(stream, stats), size)
+    stream = buffered(rate_stage(stream, stats), size)
+    async with aclosing(stream):
+        await persist_stage(stream, session, stats)
+
+    # Only now that every article is committed may the next run skip them
+    for state in states:
+        await save_source_state(state)
+
+    for name, count in stats.by_source.items():
+        logger.info(f"  {name}: {count} articles")
+    logger.info(
+        f"Pipeline: {stats.fetched} fetched, {stats.new} new, {stats.filtered} pre-filtered, "
+        f"{stats.duplicates} near-duplicates, {stats.predicted} predicted locally, "
+        f"{stats.cached} from the rating cache, {stats.rated} rated, {stats.pending} pending, {stats.stored} stored "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    logger.info("Stage time: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stats.stage_seconds.items()))
+    return stats
+
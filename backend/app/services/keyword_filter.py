@@ -1,41 +1,11 @@
-import re
+from functools import lru_cache
 from typing import TypedDict
 
-NEGATIVE_KEYWORDS = {
-    "violence": [
-        "killed", "murder", "shooting", "stabbing", "assault", "robbery",
-        "rape", "massacre", "gunman", "homicide", "manslaughter", "arson",
-        "kidnap", "terrorist", "terrorism", "bomb", "explosion",
-    ],
-    "death": [
-        "death toll", "dead", "dies", "died", "fatal", "fatality",
-        "tragedy", "devastating", "catastrophe", "casualties",
-        "obituary", "passes away", "passed away", "rest in peace", "rip",
-        "mourns", "mourning", "in memoriam", "tribute to the late",
-    ],
-    "conflict": [
-        "slams", "blasts", "rips", "clashes", "controversy", "scandal",
-        "impeach", "indicted", "accused", "alleged fraud", "corruption",
-    ],
-    "negativity": [
-        "shocking", "outrage", "fury", "backlash", "sparks anger",
-        "horrifying", "gruesome", "horrific", "disturbing",
-    ],
-}
+from app.services.keyword_matcher import KeywordMatcher, KeywordMatches, scan_article
+from app.services.keyword_rules import RuleSet, get_rules
 
-TRIVIAL_KEYWORDS = {
-    "celebrity": [
-        "celebrity gossip", "influencer drama", "viral video",
-        "tiktok trend", "selfie", "paparazzi", "reality tv", "red carpet",
-        "award show", "box office", "blockbuster", "premiere",
-        "celebrity couple", "breakup", "baby bump",
-        "net worth", "mansion", "lavish", "glamour",
-    ],
-    "clickbait": [
-        "you won't believe", "shocking reason", "this one trick",
-        "gone wrong", "epic fail", "what happens next", "doctors hate",
-    ],
-}
+# Negative and trivial keyword lists are loaded from the keyword rules file
+# (see app.services.keyword_rules).
 
 
 class FilterResult(TypedDict):
@@ -43,25 +13,33 @@ class FilterResult(TypedDict):
     reason: str | None
 
 
+@lru_cache(maxsize=32)
+def _keywords_matcher(keywords: tuple[str, ...]) -> KeywordMatcher:
+    # Inflected like the rules matcher, so this matches what ingest matches
+    return KeywordMatcher({"keywords": list(keywords)}, inflect=True)
+
+
 def check_keywords(text: str, keywords: list[str]) -> str | None:
-    """Check if text contains any keywords. Returns matched keyword or None."""
-    text_lower = text.lower()
-    for keyword in keywords:
-        if keyword.lower() in text_lower:
-            return keyword
-    return None
+    """Check if text contains any keywords as whole words. Returns matched keyword or None."""
+    return _keywords_matcher(tuple(keywords)).scan(text).first("keywords")
 
 
-def pre_filter_article(title: str, summary: str) -> FilterResult:
+def pre_filter_article(
+    title: str, summary: str, matches: KeywordMatches | None = None, rules: RuleSet | None = None
+) -> FilterResult:
     """
     Pre-filter article based on keywords before sending to Gemini.
+    Pass matches from scan_article() or scan_normalized() to reuse an existing scan,
+    with the rules whose matcher produced them (default: the current rules).
     Returns { "passed": bool, "reason": str or None }
     """
-    text = f"{title} {summary}"
+    rules = rules or get_rules()
+    if matches is None:
+        matches = scan_article(title, summary, rules.matcher)
 
     # Check negative keywords
-    for category, keywords in NEGATIVE_KEYWORDS.items():
-        matched = check_keywords(text, keywords)
+    for category in rules.negative:
+        matched = matches.first(f"negative:{category}")
         if matched:
             return FilterResult(
                 passed=False,
@@ -69,8 +47,8 @@ def pre_filter_article(title: str, summary: str) -> FilterResult:
             )
 
     # Check trivial keywords
-    for category, keywords in TRIVIAL_KEYWORDS.items():
-        matched = check_keywords(text, keywords)
+    for category in rules.trivial:
+        matched = matches.first(f"trivial:{category}")
         if matched:
             return FilterResult(
                 passed=False,
@@ -0,0 +1,153 @@
+"""Single-pass keyword matching shared by the pre-filter and content classifier.
+
+Every keyword list (negative, trivial, positive, category) is compiled into one
+token index, so an article's normalized text (see app.utils.text) is scanned
+once regardless of how many keywords there are. The resulting KeywordMatches are passed to
+pre_filter_article, detect_category and calculate_hopefulness_score instead of
+each of them rescanning the text.
+
+Keywords match whole words only ("rip" does not match "trip"), and multi-word
+keywords match as phrases ("passed away").
+"""
+from dataclasses import dataclass, field
+
+from app.utils.text import normalize_article, tokenize
+
+# Shorter words are not inflected: "new" must not match "news"
+MIN_INFLECT_LENGTH = 4
+
+_VOWELS = set("aeiou")
+
+
+def _inflections(word: str) -> set[str]:
+    """Regular inflections of a word: plural/3rd person, past tense and -ing."""
+    forms = {word}
+    if len(word) < MIN_INFLECT_LENGTH or not word.isalpha():
+        return forms
+
+    if word.endswith("e"):
+        forms |= {word + "s", word + "d", word[:-1] + "ing"}
+    elif word.endswith("y") and word[-2] not in _VOWELS:
+        forms |= {word[:-1] + "ies", word[:-1] + "ied", word + "ing"}
+    else:
+        forms |= {word + "s", word + "es", word + "ed", word + "ing"}
+        # kidnap -> kidnapped
+        if word[-1] not in _VOWELS | {"w", "x", "y"} and word[-2] in _VOWELS and word[-3] not in _VOWELS:
+            forms |= {word + word[-1] + "ed", word + word[-1] + "ing"}
+    return forms
+
+
+@dataclass(frozen=True, slots=True)
+class KeywordHit:
+    """A keyword occurrence; start and end are token offsets (end exclusive)."""
+
+    keyword: str
+    group: str
+    start: int
+    end: int
+
+
+@dataclass
+class KeywordMatches:
+    """Every keyword hit in one text, plus a per-group index of what matched."""
+
+    hits: list[KeywordHit] = field(default_factory=list)
+    # group -> keyword -> its position in the group's keyword list
+    _found: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def keywords(self, group: str) -> set[str]:
+        """Distinct keywords of a group found in the text."""
+        return set(self._found.get(group, ()))
+
+    def count(self, group: str) -> int:
+        """Number of distinct keywords of a group found in the text."""
+        return len(self._found.get(group, ()))
+
+    def first(self, group: str) -> str | None:
+        """The matched keyword listed earliest in its group, if any."""
+        found = self._found.get(group)
+        if not found:
+            return None
+        return min(found, key=found.__getitem__)
+
+
+class KeywordMatcher:
+    """Token index over keywords, tagged with their group.
+
+    Keywords are indexed by their first token; a lookup per text token finds
+    the few keywords starting with it, and multi-word keywords then compare
+    their remaining tokens. Scanning costs O(tokens) however many keywords
+    there are. With inflect=True the last word of each keyword also matches
+    its regular inflections ("improve" matches "improved").
+    """
+
+    def __init__(self, groups: dict[str, list[str]], inflect: bool = False):
+        # One column per distinct (group, keyword), in group then list order
+        self.vocabulary: list[tuple[str, str]] = []
+        columns: dict[tuple[str, str], int] = {}
+        # first token -> [(remaining tokens, keyword, group, rank, column)]
+        self._index: dict[str, list[tuple[tuple[str, ...], str, str, int, int]]] = {}
+
+        for group, keywords in groups.items():
+            for rank, keyword in enumerate(keywords):
+                tokens = tokenize(keyword)
+                if not tokens or (group, keyword) in columns:
+                    continue
+                column = columns[(group, keyword)] = len(self.vocabulary)
+                self.vocabulary.append((group, keyword))
+                last_forms = _inflections(tokens[-1]) if inflect else {tokens[-1]}
+                for last in last_forms:
+                    phrase = (*tokens[:-1], last)
+                    self._index.setdefault(phrase[0], []).append((phrase[1:], keyword, group, rank, column))
+
+    def scan(self, text: str) -> KeywordMatches:
+        """Find every keyword occurrence in raw text."""
+        return self.scan_tokens(tokenize(text))
+
+    def scan_tokens(self, tokens: list[str]) -> KeywordMatches:
+        """Find every keyword occurrence in already tokenized text in a single pass."""
+        matches = KeywordMatches()
+        index = self._index
+
+        for i, token in enumerate(tokens):
+            entries = index.get(token)
+            if entries is None:
+                continue
+            for rest, keyword, group, rank, _ in entries:
+                last = i + len(rest)
+                if rest and tuple(tokens[i + 1:last + 1]) != rest:
+                    continue
+                matches.hits.append(KeywordHit(keyword, group, i, last + 1))
+                matches._found.setdefault(group, {}).setdefault(keyword, rank)
+        return matches
+
+    def scan_columns(self, tokens: list[str]) -> set[int]:
+        """Vocabulary columns present in a token list, without building hit objects."""
+        found: set[int] = set()
+        index = self._index
+        for i, token in enumerate(tokens):
+            entries = index.get(token)
+            if entries is None:
+                continue
+            for rest, _, _, _, column in entries:
+                if not rest or tuple(tokens[i + 1:i + 1 + len(rest)]) == rest:
+                    found.add(column)
+        return found
+
+
+def get_article_matcher() -> KeywordMatcher:
+    """The matcher of the keyword rules currently in use (see app.services.keyword_rules)."""
+    # Imported here because keyword_rules builds KeywordMatchers
+    from app.services.keyword_rules import get_rules
+
+    return get_rules().matcher
+
+
+def scan_normalized(normalized: str, matcher: KeywordMatcher | None = None) -> KeywordMatches:
+    """Scan an article's stored normalized text once for every keyword list."""
+    return (matcher or get_article_matcher()).scan_tokens(normalized.split())
+
+
+def scan_article(title: str, summary: str, matcher: KeywordMatcher | None = None) -> KeywordMatches:
+    """Normalize and scan an article's title and summary once for every keyword list."""
+    return scan_normalized(normalize_article(title, summary), matcher)
@@ -0,0 +1,141 @@
+"""Versioned keyword rule sets loaded from KEYWORD_RULES_PATH.
+
+The rules file (app/rules/keyword_rules.json by default) holds the pre-filter
+keywords, the hopefulness score keywords and weights, and the category
+keywords, plus a "version" string. Loading compiles everything into one
+KeywordMatcher, and the resulting RuleSet is never modified afterwards.
+reload_rules() swaps in a new RuleSet by rebinding a single module reference,
+so callers that hold on to get_rules() keep a consistent rule set for the whole
+article or batch they are working on. get_rules() itself checks the file again
+once KEYWORD_RULES_CHECK_SECONDS have passed, so every worker picks up edits,
+not only the one running the scheduler.
+
+Each article records the version it was classified with (Article.rules_version).
+Bump the version when editing the file so the re-evaluation job picks up stored
+rows.
+"""
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+from app.config import settings
+from app.services.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, eq=False)
+class RuleSet:
+    version: str
+    negative: dict[str, list[str]]  # pre-filter category -> keywords
+    trivial: dict[str, list[str]]
+    positive_weights: dict[str, float]  # score level -> weight per keyword hit
+    negative_weight: float
+    categories: list[str]
+    matcher: KeywordMatcher
+
+
+def _keywords(value, name: str) -> list[str]:
+    if not isinstance(value, list) or not all(isinstance(k, str) and k.strip() for k in value):
+        raise ValueError(f"'{name}' must be a list of keywords")
+    return value
+
+
+def _keyword_map(data: dict, name: str) -> dict[str, list[str]]:
+    value = data.get(name, {})
+    if not isinstance(value, dict):
+        raise ValueError(f"'{name}' must map names to lists of keywords")
+    return {key: _keywords(keywords, f"{name}.{key}") for key, keywords in value.items()}
+
+
+def parse_rules(data: dict) -> RuleSet:
+    """Validate a rules document and compile its matcher."""
+    version = data.get("version")
+    if not isinstance(version, (str, int)) or not str(version).strip():
+        raise ValueError("Rules file needs a 'version'")
+
+    filter_rules = data.get("filter", {})
+    negative = _keyword_map(filter_rules, "negative")
+    trivial = _keyword_map(filter_rules, "trivial")
+    categories = _keyword_map(data, "categories")
+
+    score = data.get("score", {})
+    positive_weights: dict[str, float] = {}
+    groups: dict[str, list[str]] = {}
+    for category, keywords in negative.items():
+        groups[f"negative:{category}"] = keywords
+    for category, keywords in trivial.items():
+        groups[f"trivial:{category}"] = keywords
+    for level, entry in score.get("positive", {}).items():
+        positive_weights[level] = float(entry["weight"])
+        groups[f"positive:{level}"] = _keywords(entry["keywords"], f"score.positive.{level}")
+    score_negative = score.get("negative", {"weight": 0.0, "keywords": []})
+    groups["score_negative"] = _keywords(score_negative["keywords"], "score.negative")
+    for category, keywords in categories.items():
+        groups[f"category:{category}"] = keywords
+
+    return RuleSet(
+        version=str(version).strip(),
+        negative=negative,
+        trivial=trivial,
+        positive_weights=positive_weights,
+        negative_weight=float(score_negative["weight"]),
+        categories=list(categories),
+        matcher=KeywordMatcher(groups, inflect=True),
+    )
+
+
+def load_rules(path: str) -> RuleSet:
+    with open(path, encoding="utf-8") as f:
+        return parse_rules(json.load(f))
+
+
+_current: RuleSet | None = None
+_loaded_stat: tuple[float, int] | None = None
+_checked_at = 0.0  # time.monotonic() of the last check
+
+
+def reload_rules() -> bool:
+    """Load the rules file if it changed since the last load. Returns True when swapped.
+
+    An invalid file is logged and ignored, keeping the rules already in use.
+    """
+    global _current, _loaded_stat, _checked_at
+    _checked_at = time.monotonic()
+    path = settings.KEYWORD_RULES_PATH
+    key = None
+    try:
+        stat = os.stat(path)
+        key = (stat.st_mtime, stat.st_size)
+        if _current is not None and key == _loaded_stat:
+            return False
+        rules = load_rules(path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        if _current is None:
+            raise
+        logger.error(f"Keeping keyword rules {_current.version}: could not load {path}: {e}")
+        _loaded_stat = key
+        return False
+
+    previous = _current
+    _current, _loaded_stat = rules, key
+    if previous is None:
+        logger.info(f"Keyword rules {rules.version} loaded ({len(rules.matcher.vocabulary)} keywords)")
+        return True
+    if previous.version == rules.version:
+        logger.warning(
+            f"Keyword rules file changed but version is still {rules.version}; "
+            "stored articles will not be re-evaluated"
+        )
+    else:
+        logger.info(f"Keyword rules updated from {previous.version} to {rules.version}")
+    return True
+
+
+def get_rules() -> RuleSet:
+    """The rule set currently in use; loaded on first use and re-checked every KEYWORD_RULES_CHECK_SECONDS."""
+    if _current is None or time.monotonic() - _checked_at >= settings.KEYWORD_RULES_CHECK_SECONDS:
+        reload_rules()
+    return _current
@@ -0,0 +1,196 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.config import settings
+from app.database import async_session
+from app.models import Article
+from app.services import rating_queue
+from app.utils.text import normalize_article, split_normalized
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+_MASK = (1 << FINGERPRINT_BITS) - 1
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "was",
+    "were", "will", "with",
+}
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+
+
+def simhash(headline: str, summary: str) -> int:
+    """64-bit SimHash over the normalized headline and summary."""
+    return simhash_normalized(normalize_article(headline, summary))
+
+
+def simhash_normalized(normalized: str) -> int:
+    """64-bit SimHash of an article's stored normalized text.
+
+    Features are word unigrams and bigrams; headline features count double,
+    since wire copies share headlines more reliably than standfirsts.
+    """
+    headline, summary = split_normalized(normalized)
+    weights = [0] * FINGERPRINT_BITS
+    for tokens, weight in ((headline, 2), (summary, 1)):
+        tokens = [t for t in tokens if t not in STOP_WORDS]
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            h = _feature_hash(feature)
+            for bit in range(FINGERPRINT_BITS):
+                weights[bit] += weight if h >> bit & 1 else -weight
+
+    fingerprint = 0
+    for bit, total in enumerate(weights):
+        if total > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def to_signed(fingerprint: int) -> int:
+    """Store an unsigned 64-bit fingerprint in a signed BIGINT column."""
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >= 1 << (FINGERPRINT_BITS - 1) else fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+
+class NearDuplicateIndex:
+    """Banded SimHash index.
+
+    Fingerprints are split into max_distance + 1 bands. Two fingerprints within
+    max_distance bits must agree exactly on at least one band (pigeonhole), so
+    a lookup only compares against the bucket for each of its bands.
+    """
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        band_count = max_distance + 1
+        width = FINGERPRINT_BITS // band_count
+        self._bands = [
+            (i * width, FINGERPRINT_BITS - i * width if i == band_count - 1 else width)
+            for i in range(band_count)
+        ]
+        self._buckets: list[dict[int, list[str]]] = [{} for _ in self._bands]
+        self._fingerprints: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def _band_keys(self, fingerprint: int) -> list[int]:
+        return [(fingerprint >> shift) & ((1 << width) - 1) for shift, width in self._bands]
+
+    def add(self, guid: str, fingerprint: int) -> None:
+        fingerprint &= _MASK
+        self._fingerprints[guid] = fingerprint
+        for bucket, key in zip(self._buckets, self._band_keys(fingerprint)):
+            bucket.setdefault(key, []).append(guid)
+
+    def find(self, fingerprint: int) -> str | None:
+        """Return the guid of the closest indexed article within max_distance, if any."""
+        fingerprint &= _MASK
+        best_guid, best_distance = None, self.max_distance + 1
+        seen: set[str] = set()
+        for bucket, key in zip(self._buckets, self._band_keys(fingerprint)):
+            for guid in bucket.get(key, ()):
+                if guid in seen:
+                    continue
+                seen.add(guid)
+                distance = hamming_distance(fingerprint, self._fingerprints[guid])
+                if distance < best_distance:
+                    best_guid, best_distance = guid, distance
+        return best_guid
+
+
+async def load_recent_index() -> NearDuplicateIndex:
+    """Build an index of recently stored cluster representatives.
+
+    Only articles that passed the keyword pre-filter and are not themselves
+    duplicates are indexed, so every match points at a rated (or ratable) story.
+    """
+    index = NearDuplicateIndex(settings.NEAR_DUPLICATE_MAX_DISTANCE)
+    cutoff = datetime.utcnow() - timedelta(hours=settings.NEAR_DUPLICATE_WINDOW_HOURS)
+
+    async with async_session() as session:
+        result = await session.execute(
+            select(Article.guid, Article.simhash).where(
+                Article.simhash.isnot(None),
+                Article.duplicate_of.is_(None),
+                Article.fetched_at >= cutoff,
+                or_(Article.excluded_reason.is_(None), Article.excluded_reason.notlike("keyword_%")),
+            )
+        )
+        for guid, fingerprint in result.all():
+            index.add(guid, fingerprint)
+
+    return index
+
+
+async def resolve_waiting_duplicates(session: AsyncSession) -> int:
+    """Copy cluster scores onto stored duplicates whose representative is now rated.
+
+    Duplicates whose representative has been deleted, or was rated without a
+    score (keyword-filtered after the fact), have nothing to inherit. They
+    leave the cluster and join the rating queue as articles of their own.
+    """
+    representative = aliased(Article)
+    waiting = (
+        Article.duplicate_of.isnot(None),
+        Article.is_rated == False,
+        Article.rating_failed == False,
+    )
+    result = await session.execute(
+        select(Article.id, representative.hopefulness_score, representative.excluded_reason)
+        .join(representative, Article.duplicate_of == representative.guid)
+        .where(
+            *waiting,
+            representative.is_rated == True,
+            representative.hopefulness_score.isnot(None),
+        )
+    )
+    rows = result.all()
+
+    for article_id, score, excluded_reason in rows:
+        await session.execute(
+            update(Article)
+            .where(Article.id == article_id)
+            .values(hopefulness_score=score, excluded_reason=excluded_reason, is_rated=True, rating_source="duplicate")
+        )
+
+    result = await session.execute(
+        select(Article.id, Article.headline, Article.summary, Article.source_name, Article.published_at)
+        .outerjoin(representative, Article.duplicate_of == representative.guid)
+        .where(
+            *waiting,
+            or_(
+                representative.id.is_(None),
+                and_(representative.is_rated == True, representative.hopefulness_score.is_(None)),
+            ),
+        )
+    )
+    orphans = result.all()
+    if orphans:
+        await session.execute(
+            update(Article)
+            .where(Article.id.in_([row.id for row in orphans]))
+            .values(duplicate_of=None, rating_failed=True)
+        )
+        await rating_queue.enqueue(session, orphans)
+
+    if rows or orphans:
+        await session.commit()
+    if rows:
+        logger.info(f"Near-duplicates: {len(rows)} articles inherited their cluster's score")
+    if orphans:
+        logger.info(f"Near-duplicates: {len(orphans)} articles queued for rating, their representative has no score")
+    return len(rows)
@@ -0,0 +1,150 @@
+"""Daily API quotas kept in the api_quota table, shared by all workers and processes.
+
+Before a metered request, a caller reserves one request for its provider.
+The reservation is a single conditional UPDATE, so workers racing for the
+last request cannot both get it. After the request the caller commits the
+reservation, or refunds it if the provider never counted the request (a
+transport error, or a 429 that was rejected before it was metered).
+
+Counts survive restarts and deploys. A reservation left open by a worker
+that died mid-request counts as used until the day ends. That errs on the
+side of the provider's limit.
+
+Per-minute limits are shared the same way (take_minute_slot()): the
+api_rate_window table counts the requests sent in the current calendar
+minute, so N workers together stay within one per-minute budget rather than
+N of them.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from sqlalchemy import and_, case, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.database import async_session
+from app.models import ApiQuota, ApiRateWindow
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExhausted(Exception):
+    """A provider's daily quota is used up."""
+
+
+@dataclass(frozen=True)
+class Reservation:
+    """One reserved request; count is the day's total including it."""
+
+    provider: str
+    day: date
+    count: int
+
+
+def _row(provider: str, day: date):
+    return (ApiQuota.provider == provider) & (ApiQuota.day == day)
+
+
+async def reserve(provider: str, limit: int) -> Reservation | None:
+    """Reserve one of today's limit requests for provider, or None if none are left."""
+    day = date.today()
+    # Two passes: if another worker creates today's row first, update that one
+    for _ in range(2):
+        async with async_session() as session:
+            result = await session.execute(
+                update(ApiQuota)
+                .where(_row(provider, day), ApiQuota.used + ApiQuota.reserved < limit)
+                .values(reserved=ApiQuota.reserved + 1, updated_at=datetime.utcnow())
+            )
+            if result.rowcount == 1:
+                count = (
+                    await session.execute(select(ApiQuota.used + ApiQuota.reserved).where(_row(provider, day)))
+                ).scalar_one()
+                await session.commit()
+                return Reservation(provider, day, count)
+
+            if limit <= 0 or await session.get(ApiQuota, (provider, day)) is not None:
+                return None
+            session.add(ApiQuota(provider=provider, day=day, used=0, reserved=1))
+            try:
+                await session.commit()
+                return Reservation(provider, day, 1)
+            except IntegrityError:
+                continue
+    return None
+
+
+async def _settle(reservation: Reservation, used: int) -> None:
+    async with async_session() as session:
+        await session.execute(
+            update(ApiQuota)
+            .where(_row(reservation.provider, reservation.day), ApiQuota.reserved > 0)
+            .values(reserved=ApiQuota.reserved - 1, used=ApiQuota.used + used, updated_at=datetime.utcnow())
+        )
+        await session.commit()
+
+
+async def commit(reservation: Reservation) -> None:
+    """Record a reserved request as made."""
+    await _settle(reservation, 1)
+
+
+async def refund(reservation: Reservation) -> None:
+    """Give back a reserved request the provider did not count."""
+    await _settle(reservation, 0)
+
+
+async def get_usage(provider: str, limit: int) -> dict:
+    """Today's requests (made or in flight) against limit, across all workers."""
+    async with async_session() as session:
+        row = await session.get(ApiQuota, (provider, date.today()))
+    requests = row.used + row.reserved if row else 0
+    return {
+        "requests": requests,
+        "limit": limit,
+        "remaining": max(0, limit - requests),
+        "in_flight": row.reserved if row else 0,
+    }
+
+
+async def remaining(provider: str, limit: int) -> int:
+    """Requests provider can still be sent today."""
+    return (await get_usage(provider, limit))["remaining"]
+
+
+async def take_minute_slot(provider: str, limit: int) -> float:
+    """Count one request against provider's per-minute limit, across all workers.
+
+    Returns 0 if the request may be sent now, otherwise the seconds until the
+    current minute ends; the caller waits that long and asks again.
+    """
+    now = datetime.utcnow()
+    minute = now.replace(second=0, microsecond=0)
+    wait = 60 - (now - minute).total_seconds()
+    if limit <= 0:
+        return wait
+    # Two passes: if another worker creates the row first, update that one
+    for _ in range(2):
+        async with async_session() as session:
+            window = ApiRateWindow.window_start
+            result = await session.execute(
+                update(ApiRateWindow)
+                .where(
+                    ApiRateWindow.provider == provider,
+                    or_(window < minute, and_(window == minute, ApiRateWindow.used < limit)),
+                )
+                .values(used=case((window == minute, ApiRateWindow.used + 1), else_=1), window_start=minute)
+            )
+            if result.rowcount == 1:
+                await session.commit()
+                return 0.0
+
+            if await session.get(ApiRateWindow, provider) is not None:
+                return wait
+            session.add(ApiRateWindow(provider=provider, window_start=minute, used=1))
+            try:
+                await session.commit()
+                return 0.0
+            except IntegrityError:
+                continue
+    return wait
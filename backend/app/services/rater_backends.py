@@ -0,0 +1,156 @@
+"""What answers the rating prompts, chosen by RATER_BACKEND.
+
+A backend turns the system prompt and one rating prompt into the raw JSON
+text of the answer. ArticleRater keeps everything around that: rate limits,
+the quota ledger, retries, parsing and caching. Any backend can therefore
+stand in for Gemini without the rest of the rating path noticing.
+
+- "gemini": the Gemini API through google.generativeai.
+- "heuristic": deterministic keyword scoring with content_filter, computed
+  from the prompt text alone. No key or network needed, e.g. for CI.
+- "http": POSTs to a Gemini-compatible generateContent endpoint at
+  RATER_HTTP_URL. That can be the stand-in server in benchmarks/standin.py,
+  which answers with the heuristic after Gemini-like latency, errors and
+  429s, for load tests.
+"""
+import json
+import logging
+import re
+from typing import Protocol
+
+import google.generativeai as genai
+
+from app.config import settings
+from app.services.content_filter import calculate_hopefulness_score
+from app.services.http_client import get_http_client
+from app.services.keyword_matcher import scan_article
+from app.services.keyword_rules import get_rules
+from app.services.rating_prompt import ARTICLE_PROMPT_TEMPLATE, BATCH_ARTICLE_TEMPLATE
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("gemini", "heuristic", "http")
+
+# Points the heuristic takes off per negative keyword
+HEURISTIC_NEGATIVE_PENALTY = 15
+
+
+class RaterBackend(Protocol):
+    name: str
+
+    async def generate(self, system: str, prompt: str) -> str:
+        """The raw JSON text answering prompt."""
+        ...
+
+
+class GeminiBackend:
+    name = "gemini"
+
+    def __init__(self):
+        self._model: genai.GenerativeModel | None = None
+
+    def _get_model(self) -> genai.GenerativeModel:
+        """Lazy initialization of the model."""
+        if self._model is None:
+            if not settings.GEMINI_API_KEY:
+                raise ValueError("GEMINI_API_KEY not configured")
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self._model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        return self._model
+
+    async def generate(self, system: str, prompt: str) -> str:
+        response = await self._get_model().generate_content_async(
+            [system, prompt],
+            generation_config=genai.GenerationConfig(
+                response_mime_type="application/json"
+            ),
+        )
+        return response.text
+
+
+def _template_pattern(template: str) -> str:
+    """A regex matching a filled-in article template, one named group per field."""
+    pattern = re.escape(template)
+    for field in ("id", "title", "summary", "source"):
+        pattern = pattern.replace(re.escape(f"{{{field}}}"), rf"(?P<{field}>[^\n]*)")
+    return pattern
+
+
+_BATCH_ARTICLE_RE = re.compile(_template_pattern(BATCH_ARTICLE_TEMPLATE))
+_SINGLE_ARTICLE_RE = re.compile(_template_pattern(ARTICLE_PROMPT_TEMPLATE))
+
+
+def heuristic_rating(title: str, summary: str) -> dict:
+    """A deterministic rating from keyword matches: 50, moved up by hopeful and down by negative keywords."""
+    rules = get_rules()
+    matches = scan_article(title, summary, rules.matcher)
+    hopeful = calculate_hopefulness_score(title, summary, matches, rules)
+    negatives = matches.count("score_negative")
+    score = round(50 + 50 * hopeful) - HEURISTIC_NEGATIVE_PENALTY * negatives
+    return {
+        "score": max(0, min(100, score)),
+        "excluded_reason": None,
+        "rationale": f"Keyword heuristic: hopefulness {hopeful:.2f}, {negatives} negative keywords",
+    }
+
+
+def heuristic_answer(prompt: str) -> str:
+    """Answer a batch or single-article rating prompt the way Gemini would, from its text alone."""
+    items = []
+    for match in _BATCH_ARTICLE_RE.finditer(prompt):
+        summary = match["summary"] if match["summary"] != "No summary available" else ""
+        items.append({"id": match["id"], **heuristic_rating(match["title"], summary)})
+    if items:
+        return json.dumps(items)
+
+    match = _SINGLE_ARTICLE_RE.search(prompt)
+    if match is None:
+        raise ValueError("prompt holds no article to rate")
+    summary = match["summary"] if match["summary"] != "No summary available" else ""
+    return json.dumps(heuristic_rating(match["title"], summary))
+
+
+class HeuristicBackend:
+    name = "heuristic"
+
+    async def generate(self, system: str, prompt: str) -> str:
+        return heuristic_answer(prompt)
+
+
+class HttpBackend:
+    """Gemini's generateContent REST call, sent to RATER_HTTP_URL.
+
+    Error statuses are raised as httpx.HTTPStatusError, so 429s and their
+    Retry-After header reach the rater's retry handling.
+    """
+
+    name = "http"
+
+    def __init__(self):
+        get_http_client().register_timeout("rater", settings.RATER_HTTP_TIMEOUT_SECONDS)
+
+    async def generate(self, system: str, prompt: str) -> str:
+        headers = {"x-goog-api-key": settings.GEMINI_API_KEY} if settings.GEMINI_API_KEY else {}
+        response = await get_http_client().post(
+            f"{settings.RATER_HTTP_URL.rstrip('/')}/v1beta/models/{settings.GEMINI_MODEL}:generateContent",
+            source="rater",
+            headers=headers,
+            json={
+                "contents": [{"role": "user", "parts": [{"text": system}, {"text": prompt}]}],
+                "generationConfig": {"responseMimeType": "application/json"},
+            },
+        )
+        response.raise_for_status()
+        return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+
+def get_backend() -> RaterBackend:
+    """A new backend of the configured RATER_BACKEND kind."""
+    name = settings.RATER_BACKEND.lower()
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "heuristic":
+        return HeuristicBackend()
+    if name == "http":
+        return HttpBackend()
+    raise ValueError(f"Unknown RATER_BACKEND {settings.RATER_BACKEND!r}; expected one of {', '.join(BACKENDS)}")
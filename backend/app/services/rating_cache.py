@@ -0,0 +1,156 @@
+"""Content-addressed cache of Gemini ratings.
+
+Ratings are keyed by a SHA-256 of the article's normalized title and summary,
+its source and PROMPT_VERSION, so a re-fetched, cross-posted or retried
+article with the same text is answered from the rating_cache table instead of
+spending one of the daily Gemini requests. PROMPT_VERSION is derived from the
+rating prompts and RATER_BACKEND, so editing the prompts starts a fresh cache
+and ratings from a stand-in backend are never served as Gemini's.
+
+Only successful ratings are stored. Callers look articles up before batching
+(get_cached_ratings) so only misses are sent to Gemini; rate_articles_batch
+stores every new rating (cache_ratings). Each lookup also adds its hits and
+misses to the prompt version's rating_cache_counter row, so the hit rate
+covers every worker and survives restarts.
+"""
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.database import async_session, insert
+from app.models import RatingCache, RatingCacheCounter
+from app.services.rating_prompt import BATCH_ARTICLE_TEMPLATE, BATCH_PROMPT_TEMPLATE, RATING_SYSTEM_PROMPT
+from app.utils.text import normalize_article
+
+logger = logging.getLogger(__name__)
+
+PROMPT_VERSION = hashlib.sha256(
+    f"{settings.RATER_BACKEND.lower()}\0{RATING_SYSTEM_PROMPT}\0{BATCH_PROMPT_TEMPLATE}\0{BATCH_ARTICLE_TEMPLATE}".encode()
+).hexdigest()[:12]
+
+
+def rating_key(title: str | None, summary: str | None, source: str | None) -> str:
+    """Cache key of an article as sent to the rater."""
+    content = f"{PROMPT_VERSION}\0{normalize_article(title, summary)}\0{source or ''}"
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+async def get_cached_ratings(items: list[dict]) -> list[dict | None]:
+    """Cached RatingResults for rater input dicts ('title', 'summary', 'source'); None for misses."""
+    if not settings.RATING_CACHE_ENABLED or not items:
+        return [None] * len(items)
+
+    keys = [rating_key(item.get("title"), item.get("summary"), item.get("source")) for item in items]
+    async with async_session() as session:
+        result = await session.execute(select(RatingCache).where(RatingCache.key.in_(set(keys))))
+        cached = {entry.key: entry for entry in result.scalars().all()}
+        hits = sum(key in cached for key in keys)
+        if cached:
+            await session.execute(
+                update(RatingCache)
+                .where(RatingCache.key.in_(list(cached)))
+                .values(hits=RatingCache.hits + 1, last_hit_at=datetime.utcnow())
+            )
+        counter = insert(RatingCacheCounter).values(prompt_version=PROMPT_VERSION, hits=hits, misses=len(keys) - hits)
+        await session.execute(
+            counter.on_conflict_do_update(
+                index_elements=[RatingCacheCounter.prompt_version],
+                set_={
+                    "hits": RatingCacheCounter.hits + counter.excluded.hits,
+                    "misses": RatingCacheCounter.misses + counter.excluded.misses,
+                },
+            )
+        )
+        await session.commit()
+
+    ratings: list[dict | None] = []
+    for key in keys:
+        entry = cached.get(key)
+        if entry is None:
+            ratings.append(None)
+        else:
+            ratings.append({"score": entry.score, "excluded_reason": entry.excluded_reason, "rationale": entry.rationale or ""})
+
+    if hits:
+        logger.info(f"Rating cache: {hits} of {len(ratings)} articles already rated")
+    return ratings
+
+
+async def cache_ratings(items: list[dict], ratings: list[dict]) -> None:
+    """Store successful ratings of rater input dicts; failed ones are skipped."""
+    if not settings.RATING_CACHE_ENABLED:
+        return
+    rated = {
+        rating_key(item.get("title"), item.get("summary"), item.get("source")): rating
+        for item, rating in zip(items, ratings)
+        if rating.get("score") is not None
+    }
+    if not rated:
+        return
+
+    # Concurrent batches (or workers) may rate the same text; the last write wins
+    statement = insert(RatingCache).values([
+        {
+            "key": key,
+            "prompt_version": PROMPT_VERSION,
+            "score": rating["score"],
+            "excluded_reason": rating.get("excluded_reason"),
+            "rationale": rating.get("rationale"),
+        }
+        for key, rating in rated.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[RatingCache.key],
+        set_={
+            "score": statement.excluded.score,
+            "excluded_reason": statement.excluded.excluded_reason,
+            "rationale": statement.excluded.rationale,
+        },
+    )
+    try:
+        async with async_session() as session:
+            await session.execute(statement)
+            await session.commit()
+    except SQLAlchemyError as e:
+        # The ratings themselves are already made; only reuse is lost
+        logger.warning(f"Rating cache: could not store {len(rated)} ratings: {e}")
+
+
+async def get_cache_stats() -> dict:
+    """Entries and their hits, plus hits and misses of every lookup, for the current prompt version."""
+    async with async_session() as session:
+        entries, total_hits = (
+            await session.execute(
+                select(func.count(), func.coalesce(func.sum(RatingCache.hits), 0))
+                .where(RatingCache.prompt_version == PROMPT_VERSION)
+            )
+        ).one()
+        counter = await session.get(RatingCacheCounter, PROMPT_VERSION)
+    hits, misses = (counter.hits, counter.misses) if counter else (0, 0)
+    return {
+        "prompt_version": PROMPT_VERSION,
+        "entries": entries,
+        "total_hits": total_hits,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+    }
+
+
+async def purge_rating_cache() -> int:
+    """Delete entries unused for RATING_CACHE_TTL_DAYS and entries from older prompt versions."""
+    cutoff = datetime.utcnow() - timedelta(days=settings.RATING_CACHE_TTL_DAYS)
+    async with async_session() as session:
+        result = await session.execute(
+            delete(RatingCache).where(
+                (func.coalesce(RatingCache.last_hit_at, RatingCache.created_at) < cutoff)
+                | (RatingCache.prompt_version != PROMPT_VERSION)
+            )
+        )
+        await session.execute(delete(RatingCacheCounter).where(RatingCacheCounter.prompt_version != PROMPT_VERSION))
+        await session.commit()
+        return result.rowcount
@@ -33,6 +33,16 @@ Title: {title}
 Summary: {summary}
 Source: {source}"""
 
-BATCH_PROMPT_TEMPLATE = """Rate each article. Return a JSON array with one object per article in order:
+# Batch prompts name each article by this many hex characters of its rating
+# cache key, so answers are matched by ID rather than position
+ARTICLE_ID_LENGTH = 8
+
+BATCH_ARTICLE_TEMPLATE = """Article {id}:
+Title: {title}
+Summary: {summary}
+Source: {source}"""
+
+BATCH_PROMPT_TEMPLATE = """Rate each article. Return a JSON array with one object per article, each with the article's ID:
+{{"id": "<article ID>", "score": <0-100>, "excluded_reason": <string or null>, "rationale": "<brief explanation>"}}
 
 {articles}"""
@@ -0,0 +1,220 @@
+"""Persistent priority queue of articles waiting for a rating.
+
+Every article stored with rating_failed set gets a rating_queue entry in the
+same transaction (enqueue). Its priority is fixed when it is queued and
+measured in hours:
+
+- the publication time, so newer articles come first;
+- plus up to RATING_QUEUE_HOPEFUL_BONUS_HOURS, scaled by the keyword
+  hopefulness score, so likely keepers are rated before likely rejects;
+- minus RATING_QUEUE_SOURCE_PENALTY_HOURS for each article already queued
+  from the same source, so one busy source cannot crowd out the others.
+
+Workers claim() the best available entries. A claim leases them with a
+random token for RATING_QUEUE_LEASE_MINUTES by moving their available_at
+forward. The conditional UPDATE means two workers never hold the same entry.
+A worker that dies simply lets its lease run out. Rated entries are ack()ed
+(deleted). The others are release()d, either at once (never attempted, e.g.
+out of quota) or after an exponential backoff per failed attempt. Claiming
+walks the (priority, available_at) index, so the cost per item does not grow
+with the backlog.
+"""
+import logging
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Protocol
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session, insert
+from app.models import Article, RatingQueue
+from app.services.content_filter import calculate_hopefulness_score
+
+logger = logging.getLogger(__name__)
+
+# Rounds of select-then-lease a claim makes when other workers take its candidates
+CLAIM_ATTEMPTS = 3
+
+
+class Queueable(Protocol):
+    """What enqueue() reads from an article: an Article or a result row with these columns."""
+
+    id: int
+    headline: str
+    summary: str | None
+    source_name: str
+    published_at: datetime | None
+
+
+def _hours(moment: datetime | None) -> float:
+    """Hours since the epoch of a (naive UTC or aware) time; now if unknown."""
+    if moment is None:
+        moment = datetime.utcnow()
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - datetime(1970, 1, 1)).total_seconds() / 3600
+
+
+def priority(article: Queueable, queued_from_source: int) -> float:
+    """Queue priority of an article, given how many from its source are already queued."""
+    hopeful = calculate_hopefulness_score(article.headline, article.summary or "")
+    return (
+        _hours(article.published_at)
+        + settings.RATING_QUEUE_HOPEFUL_BONUS_HOURS * hopeful
+        - settings.RATING_QUEUE_SOURCE_PENALTY_HOURS * queued_from_source
+    )
+
+
+async def enqueue(session: AsyncSession, articles: Iterable[Queueable]) -> int:
+    """Add entries for articles (which must have ids) to session; already queued ones are skipped.
+
+    The caller commits, so entries are stored together with the articles.
+    """
+    articles = list(articles)
+    if not articles:
+        return 0
+
+    queued = set(
+        (await session.execute(
+            select(RatingQueue.article_id).where(RatingQueue.article_id.in_([a.id for a in articles]))
+        )).scalars().all()
+    )
+    articles = [a for a in articles if a.id not in queued]
+    if not articles:
+        return 0
+
+    sources = {a.source_name for a in articles}
+    per_source = Counter(dict(
+        (await session.execute(
+            select(RatingQueue.source_name, func.count())
+            .where(RatingQueue.source_name.in_(sources))
+            .group_by(RatingQueue.source_name)
+        )).all()
+    ))
+    # Newest first, so within one batch the source penalty falls on older articles
+    articles.sort(key=lambda a: _hours(a.published_at), reverse=True)
+    rows = []
+    for article in articles:
+        rows.append({
+            "article_id": article.id,
+            "source_name": article.source_name,
+            "priority": priority(article, per_source[article.source_name]),
+        })
+        per_source[article.source_name] += 1
+    # Another worker may queue the same article meanwhile (e.g. a released duplicate)
+    await session.execute(
+        insert(RatingQueue).values(rows).on_conflict_do_nothing(index_elements=[RatingQueue.article_id])
+    )
+    return len(articles)
+
+
+async def remove(session: AsyncSession, article_ids: Iterable[int]) -> None:
+    """Drop entries for articles that no longer need a rating; the caller commits."""
+    article_ids = list(article_ids)
+    if article_ids:
+        await session.execute(delete(RatingQueue).where(RatingQueue.article_id.in_(article_ids)))
+
+
+async def enqueue_unqueued() -> int:
+    """Queue articles waiting for a rating that have no entry, e.g. rows stored before the queue existed."""
+    async with async_session() as session:
+        result = await session.execute(
+            select(Article.id, Article.headline, Article.summary, Article.source_name, Article.published_at)
+            .where(
+                Article.rating_failed == True,
+                ~select(RatingQueue.article_id).where(RatingQueue.article_id == Article.id).exists(),
+            )
+        )
+        added = await enqueue(session, result.all())
+        await session.commit()
+    if added:
+        logger.info(f"Rating queue: queued {added} articles waiting for a rating")
+    return added
+
+
+async def claim(limit: int) -> tuple[str, list[RatingQueue]]:
+    """Lease up to limit available entries, best first; returns the lease token and the entries."""
+    token = uuid.uuid4().hex
+    claimed = 0
+    async with async_session() as session:
+        # Entries another worker claims between our select and update are
+        # skipped by the update; look again for replacements a few times
+        for _ in range(CLAIM_ATTEMPTS):
+            now = datetime.utcnow()
+            candidates = (await session.execute(
+                select(RatingQueue.article_id)
+                .where(RatingQueue.available_at <= now)
+                .order_by(RatingQueue.priority.desc())
+                .limit(limit - claimed)
+            )).scalars().all()
+            if not candidates:
+                break
+            result = await session.execute(
+                update(RatingQueue)
+                .where(RatingQueue.article_id.in_(candidates), RatingQueue.available_at <= now)
+                .values(lease_token=token, available_at=now + timedelta(minutes=settings.RATING_QUEUE_LEASE_MINUTES))
+            )
+            await session.commit()
+            claimed += result.rowcount
+            if result.rowcount == len(candidates):
+                break
+
+        entries = (await session.execute(
+            select(RatingQueue).where(RatingQueue.lease_token == token).order_by(RatingQueue.priority.desc())
+        )).scalars().all()
+    return token, list(entries)
+
+
+async def ack(article_ids: Iterable[int]) -> None:
+    """Remove entries whose articles have been rated (or no longer need to be)."""
+    async with async_session() as session:
+        await remove(session, article_ids)
+        await session.commit()
+
+
+def backoff(attempts: int) -> timedelta:
+    """Wait before the next try after attempts failed attempts."""
+    minutes = settings.RATING_QUEUE_BACKOFF_MINUTES * 2 ** (attempts - 1)
+    return timedelta(minutes=min(minutes, settings.RATING_QUEUE_MAX_BACKOFF_HOURS * 60))
+
+
+async def release(token: str, entries: list[RatingQueue], failed: set[int]) -> None:
+    """End a lease. Entries in failed count an attempt and back off; the rest are available again at once."""
+    if not entries:
+        return
+    now = datetime.utcnow()
+    by_attempts: dict[int, list[int]] = defaultdict(list)
+    for entry in entries:
+        by_attempts[entry.attempts + 1 if entry.article_id in failed else entry.attempts].append(entry.article_id)
+
+    async with async_session() as session:
+        for attempts, article_ids in by_attempts.items():
+            retried = [i for i in article_ids if i in failed]
+            untried = [i for i in article_ids if i not in failed]
+            for ids, available_at in ((retried, now + backoff(attempts)), (untried, now)):
+                if ids:
+                    # A lease that ran out may already belong to another worker
+                    await session.execute(
+                        update(RatingQueue)
+                        .where(RatingQueue.article_id.in_(ids), RatingQueue.lease_token == token)
+                        .values(lease_token=None, attempts=attempts, available_at=available_at)
+                    )
+        await session.commit()
+
+
+async def get_queue_stats() -> dict:
+    """Entries in the queue: available now, leased to a worker, and backing off after failures."""
+    now = datetime.utcnow()
+    waiting = RatingQueue.available_at > now
+    async with async_session() as session:
+        total, available, leased = (await session.execute(
+            select(
+                func.count(),
+                func.count().filter(~waiting),
+                func.count().filter(waiting, RatingQueue.lease_token.isnot(None)),
+            )
+        )).one()
+    return {"queued": total, "available": available, "leased": leased, "backing_off": total - available - leased}
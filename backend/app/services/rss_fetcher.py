@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+import feedparser
+import httpx
+from datetime import datetime
+from time import struct_time
+
+from app.services.fetch_cache import (
+    FetchResult,
+    conditional_headers,
+    get_source_state,
+    hash_content,
+    is_unchanged,
+    source_state_update,
+    unchanged_state_update,
+)
+from app.services.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+
+RSS_SOURCES = [
+    {"name": "Positive News", "url": "https://www.positive.news/feed/"},
+    {"name": "Good News Network", "url": "https://www.goodnewsnetwork.org/feed/"},
+    {"name": "Reasons to be Cheerful", "url": "https://reasonstobecheerful.world/feed/"},
+]
+
+
+def parse_published_date(date_parsed: struct_time | None) -> datetime | None:
+    """Convert feedparser's time tuple to datetime."""
+    if date_parsed is None:
+        return None
+    try:
+        return datetime(*date_parsed[:6])
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_image_url(entry: dict) -> str | None:
+    """Extract image URL from RSS entry using various methods."""
+    # Try media:content
+    if hasattr(entry, "media_content") and entry.media_content:
+        for media in entry.media_content:
+            if media.get("medium") == "image" or media.get("type", "").startswith("image/"):
+                return media.get("url")
+        # If no explicit image type, take first media_content with url
+        if entry.media_content[0].get("url"):
+            return entry.media_content[0].get("url")
+
+    # Try media:thumbnail
+    if hasattr(entry, "media_thumbnail") and entry.media_thumbnail:
+        return entry.media_thumbnail[0].get("url")
+
+    # Try enclosures
+    if hasattr(entry, "enclosures") and entry.enclosures:
+        for enclosure in entry.enclosures:
+            if enclosure.get("type", "").startswith("image/"):
+                return enclosure.get("href") or enclosure.get("url")
+
+    # Try links with image type
+    if hasattr(entry, "links"):
+        for link in entry.links:
+            if link.get("type", "").startswith("image/"):
+                return link.get("href")
+
+    return None
+
+
+def parse_rss_entries(content: bytes) -> list[dict]:
+    """Parse raw feed bytes into a list of article dicts (CPU-bound, run off the event loop)."""
+    feed = feedparser.parse(content)
+    articles = []
+
+    for entry in feed.entries:
+        article = {
+            "title": entry.get("title", ""),
+            "link": entry.get("link", ""),
+            "summary": entry.get("summary") or entry.get("description", ""),
+            "published": parse_published_date(entry.get("published_parsed")),
+            "guid": entry.get("id") or entry.get("link", ""),
+            "image_url": extract_image_url(entry),
+        }
+        articles.append(article)
+
+    return articles
+
+
+async def fetch_rss_feed(source: dict, semaphore: asyncio.Semaphore) -> FetchResult:
+    """Download one RSS feed and parse it in a worker thread."""
+    name = source["name"]
+    cache_key = f"rss:{source['url']}"
+    started = time.perf_counter()
+
+    try:
+        state = await get_source_state(cache_key)
+        async with semaphore:
+            response = await get_http_client().get(
+                source["url"], source="rss", headers=conditional_headers(state)
+            )
+            if response.status_code != 304:
+                response.raise_for_status()
+        downloaded = time.perf_counter()
+
+        # Skip parsing and dedupe entirely when the feed has not changed
+        digest = hash_content(response.content) if response.status_code != 304 else None
+        if is_unchanged(state, response, digest):
+            logger.info(f"RSS {name}: unchanged in {(downloaded - started) * 1000:.0f}ms")
+            update = unchanged_state_update(cache_key, state, response)
+            return FetchResult(states=[update] if update else [])
+
+        articles = await asyncio.to_thread(parse_rss_entries, response.content)
+        finished = time.perf_counter()
+
+        for article in articles:
+            article["source_name"] = name
+
+        logger.info(
+            f"RSS {name}: {len(articles)} articles in {(finished - started) * 1000:.0f}ms "
+            f"(download {(downloaded - started) * 1000:.0f}ms, parse {(finished - downloaded) * 1000:.0f}ms)"
+        )
+        return FetchResult(articles, [source_state_update(cache_key, response, digest)])
+
+    except httpx.HTTPStatusError as e:
+        logger.error(f"RSS {name}: HTTP {e.response.status_code} after {(time.perf_counter() - started) * 1000:.0f}ms")
+        return FetchResult()
+    except Exception as e:
+        logger.error(f"RSS {name}: fetch failed after {(time.perf_counter() - started) * 1000:.0f}ms: {e}")
+        return FetchResult()
@@ -0,0 +1,279 @@
+"""Local hopefulness predictor trained from stored Gemini ratings.
+
+Articles are turned into hashed TF-IDF vectors (title and summary unigrams
+and bigrams, plus the source) and scored by two linear heads: a logistic
+classifier for "score >= RATING_THRESHOLD" and a ridge regression for the
+score itself. Training runs offline (train_predictor.py) and saves an .npz
+file. Prediction is a sparse dot product, a few microseconds per article.
+
+Only predictions whose probability falls outside the uncertainty band are
+used. The band is calibrated on held-out ratings to reach
+PREDICTOR_MIN_PRECISION. Everything else still goes to Gemini.
+"""
+import logging
+import math
+import os
+import random
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import minimize
+from sqlalchemy import or_, select
+
+from app.config import settings
+from app.database import async_session
+from app.models import Article
+from app.utils.text import normalize_article, split_normalized
+
+logger = logging.getLogger(__name__)
+
+FEATURE_BITS = 18
+N_FEATURES = 1 << FEATURE_BITS
+MODEL_VERSION = 1
+
+# Fewest held-out articles a confidence threshold may be based on
+MIN_CALIBRATION_SUPPORT = 20
+L2_PENALTY = 1e-3  # chosen on held-out data; weaker penalties overfit small rating sets
+
+_TITLE_SEED = zlib.crc32(b"t:")
+_SUMMARY_SEED = zlib.crc32(b"s:")
+
+
+def _hashed_counts(normalized: str, source: str) -> Counter[int]:
+    """Hashed unigram and bigram counts; feature "t:a b" hashes to crc32(b"t:a b")."""
+    mask = N_FEATURES - 1
+    crc32 = zlib.crc32
+    indices: list[int] = []
+    title, summary = split_normalized(normalized)
+    for seed, tokens in ((_TITLE_SEED, title), (_SUMMARY_SEED, summary)):
+        previous = None
+        for token in tokens:
+            token = token.encode()
+            # CRC continuation: crc32(b" b", crc32(b"t:a")) == crc32(b"t:a b")
+            unigram = crc32(token, seed)
+            indices.append(unigram & mask)
+            if previous is not None:
+                indices.append(crc32(b" " + token, previous) & mask)
+            previous = unigram
+    counts = Counter(indices)
+    counts[zlib.crc32(f"src:{source}".encode()) & mask] += 1
+    return counts
+
+
+@dataclass
+class Prediction:
+    score: int
+    probability: float  # P(score >= threshold)
+    confident: bool
+
+
+class ScorePredictor:
+    """A trained model loaded from an .npz file."""
+
+    def __init__(self, path: str):
+        data = np.load(path)
+        if int(data["version"]) != MODEL_VERSION:
+            raise ValueError(f"Unsupported predictor model version {int(data['version'])}")
+        # Plain lists index faster than numpy arrays one element at a time
+        self._idf = data["idf"].tolist()
+        self._w_cls = data["w_cls"].tolist()
+        self._w_reg = data["w_reg"].tolist()
+        self._b_cls = float(data["b_cls"])
+        self._b_reg = float(data["b_reg"])
+        self.threshold = int(data["threshold"])
+        self.lower = float(data["lower"])
+        self.upper = float(data["upper"])
+        self.trained_at = str(data["trained_at"])
+
+    def predict(self, normalized: str, source: str) -> Prediction:
+        """Predict from an article's normalized text (see app.utils.text.normalize_article)."""
+        idf, w_cls, w_reg = self._idf, self._w_cls, self._w_reg
+        z_cls = z_reg = norm = 0.0
+        for index, count in _hashed_counts(normalized, source).items():
+            value = idf[index] if count == 1 else (1.0 + math.log(count)) * idf[index]
+            norm += value * value
+            z_cls += w_cls[index] * value
+            z_reg += w_reg[index] * value
+        norm = math.sqrt(norm) or 1.0
+        z_cls = self._b_cls + z_cls / norm
+        z_reg = self._b_reg + z_reg / norm
+
+        probability = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z_cls))))
+        confident = probability >= self.upper or probability <= self.lower
+
+        # Keep the score on the side of the threshold the classifier chose
+        score = int(round(max(0.0, min(100.0, z_reg))))
+        if probability >= 0.5:
+            score = max(score, self.threshold)
+        else:
+            score = min(score, self.threshold - 1)
+        return Prediction(score=score, probability=probability, confident=confident)
+
+
+_loaded: tuple[float, ScorePredictor] | None = None
+
+
+def get_predictor() -> ScorePredictor | None:
+    """The current model, reloaded when the file changes; None if disabled or untrained."""
+    global _loaded
+    if not settings.PREDICTOR_ENABLED:
+        return None
+    try:
+        mtime = os.stat(settings.PREDICTOR_MODEL_PATH).st_mtime
+    except FileNotFoundError:
+        return None
+
+    if _loaded is None or _loaded[0] != mtime:
+        try:
+            _loaded = (mtime, ScorePredictor(settings.PREDICTOR_MODEL_PATH))
+            logger.info(f"Score predictor loaded (trained {_loaded[1].trained_at})")
+        except Exception as e:
+            logger.error(f"Could not load score predictor: {e}")
+            return None
+    return _loaded[1]
+
+
+def _tfidf_matrix(rows: list[tuple[str, str]], idf: np.ndarray | None = None) -> tuple[sparse.csr_matrix, np.ndarray]:
+    """Row-normalized TF-IDF matrix of (normalized text, source) rows; idf is computed from them if not given."""
+    indptr, indices, data = [0], [], []
+    for normalized, source in rows:
+        counts = _hashed_counts(normalized, source)
+        indices.extend(counts)
+        data.extend(counts.values())
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix((np.array(data, dtype=np.float64), indices, indptr), shape=(len(rows), N_FEATURES))
+
+    if idf is None:
+        df = np.bincount(matrix.indices, minlength=N_FEATURES)
+        idf = np.log((1 + len(rows)) / (1 + df)) + 1.0
+    matrix.data = 1.0 + np.log(matrix.data)
+    matrix = sparse.csr_matrix(matrix.multiply(idf))
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix), idf
+
+
+def _fit(x: sparse.csr_matrix, y: np.ndarray, logistic: bool) -> tuple[np.ndarray, float]:
+    """L2-regularized logistic or least-squares fit with L-BFGS."""
+    n = x.shape[0]
+
+    def objective(params: np.ndarray) -> tuple[float, np.ndarray]:
+        w, b = params[:-1], params[-1]
+        z = x @ w + b
+        if logistic:
+            p = 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+            loss = -np.mean(y * np.log(p + 1e-12) + (1 - y) * np.log(1 - p + 1e-12))
+            residual = p - y
+        else:
+            residual = z - y
+            loss = 0.5 * np.mean(residual ** 2)
+        grad_w = x.T @ residual / n + L2_PENALTY * w
+        loss += 0.5 * L2_PENALTY * float(w @ w)
+        return loss, np.append(grad_w, residual.mean())
+
+    start = np.zeros(x.shape[1] + 1)
+    if not logistic:
+        start[-1] = y.mean()
+    result = minimize(objective, start, jac=True, method="L-BFGS-B", options={"maxiter": 300})
+    return result.x[:-1], float(result.x[-1])
+
+
+def _calibrate(probability: np.ndarray, positive: np.ndarray, min_precision: float) -> tuple[float, float]:
+    """Widest (lower, upper) cut-offs whose held-out predictions reach min_precision."""
+    upper, lower = 1.01, -0.01  # never confident
+
+    order = np.argsort(-probability)
+    correct = np.cumsum(positive[order])
+    support = np.arange(1, len(order) + 1)
+    ok = (correct / support >= min_precision) & (support >= MIN_CALIBRATION_SUPPORT)
+    if ok.any():
+        upper = max(0.5, float(probability[order][np.flatnonzero(ok)[-1]]))
+
+    order = np.argsort(probability)
+    correct = np.cumsum(~positive[order])
+    ok = (correct / support >= min_precision) & (support >= MIN_CALIBRATION_SUPPORT)
+    if ok.any():
+        lower = min(0.5, float(probability[order][np.flatnonzero(ok)[-1]]))
+    return lower, upper
+
+
+async def load_training_rows() -> list[tuple[str, str, int]]:
+    """(normalized text, source, score) for every article rated by Gemini.
+
+    Rows from before rating_source existed count when they were rated, are not
+    near-duplicates and were not keyword-filtered.
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            select(
+                Article.normalized_text, Article.headline, Article.summary, Article.source_name, Article.hopefulness_score
+            ).where(
+                Article.hopefulness_score.isnot(None),
+                or_(
+                    Article.rating_source == "gemini",
+                    (Article.rating_source.is_(None))
+                    & (Article.is_rated == True)
+                    & Article.duplicate_of.is_(None)
+                    & or_(Article.excluded_reason.is_(None), Article.excluded_reason.notlike("keyword_%")),
+                ),
+            )
+        )
+        return [
+            (row.normalized_text or normalize_article(row.headline, row.summary), row.source_name, int(row.hopefulness_score))
+            for row in result.all()
+        ]
+
+
+def train(rows: list[tuple[str, str, int]], threshold: int, min_precision: float, path: str) -> dict:
+    """Fit on 80% of rows, calibrate confidence on the rest, and save the model."""
+    rows = list(rows)
+    random.Random(0).shuffle(rows)
+    split = int(len(rows) * 0.8)
+    train_rows, holdout_rows = rows[:split], rows[split:]
+
+    x_train, idf = _tfidf_matrix([r[:2] for r in train_rows])
+    scores = np.array([r[2] for r in train_rows], dtype=np.float64)
+    w_cls, b_cls = _fit(x_train, (scores >= threshold).astype(np.float64), logistic=True)
+    w_reg, b_reg = _fit(x_train, scores, logistic=False)
+
+    x_holdout, _ = _tfidf_matrix([r[:2] for r in holdout_rows], idf)
+    holdout_scores = np.array([r[2] for r in holdout_rows], dtype=np.float64)
+    positive = holdout_scores >= threshold
+    probability = 1.0 / (1.0 + np.exp(-np.clip(x_holdout @ w_cls + b_cls, -30, 30)))
+    lower, upper = _calibrate(probability, positive, min_precision)
+
+    confident = (probability >= upper) | (probability <= lower)
+    predicted_positive = probability >= 0.5
+    report = {
+        "train_rows": len(train_rows),
+        "holdout_rows": len(holdout_rows),
+        "holdout_accuracy": float((predicted_positive == positive).mean()) if len(holdout_rows) else 0.0,
+        "lower": lower,
+        "upper": upper,
+        "coverage": float(confident.mean()) if len(holdout_rows) else 0.0,
+        "confident_accuracy": float((predicted_positive == positive)[confident].mean()) if confident.any() else 0.0,
+        "score_mae": float(np.abs(np.clip(x_holdout @ w_reg + b_reg, 0, 100) - holdout_scores).mean()) if len(holdout_rows) else 0.0,
+    }
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = f"{path}.tmp.npz"
+    np.savez_compressed(
+        temporary,
+        version=MODEL_VERSION,
+        idf=idf.astype(np.float32),
+        w_cls=w_cls.astype(np.float32),
+        b_cls=b_cls,
+        w_reg=w_reg.astype(np.float32),
+        b_reg=b_reg,
+        threshold=threshold,
+        lower=lower,
+        upper=upper,
+        trained_at=datetime.utcnow().isoformat(timespec="seconds"),
+    )
+    # Replace atomically so running workers never load a partial file
+    os.replace(temporary, path)
+    return report
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+
+from app.config import settings
+from app.services import guardian_fetcher, thenewsapi_fetcher
+from app.services.http_client import get_http_client
+from app.services.ingest_pipeline import SourceFetcher
+from app.services.rss_fetcher import RSS_SOURCES, fetch_rss_feed
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    """A news source and how often, and within what limits, it may be fetched."""
+
+    name: str
+    label: str
+    fetchers: Callable[[], list[SourceFetcher]]
+    interval_minutes: int
+    requests_per_run: int
+    daily_quota: int | None  # API requests per day; None means unmetered
+    timeout_seconds: float
+    enabled: bool
+
+    def runs_per_day(self) -> float:
+        return 24 * 60 / self.interval_minutes
+
+
+def _rss_fetchers() -> list[SourceFetcher]:
+    """One fetcher per feed, sharing a bounded download fan-out."""
+    semaphore = asyncio.Semaphore(settings.RSS_MAX_CONCURRENCY)
+    return [
+        (f"RSS {source['name']}", partial(fetch_rss_feed, source, semaphore))
+        for source in RSS_SOURCES
+    ]
+
+
+def get_source_registry() -> list[SourceSpec]:
+    """Every known source, configured from settings."""
+    registry = [
+        SourceSpec(
+            name="rss",
+            label="RSS Feeds",
+            fetchers=_rss_fetchers,
+            interval_minutes=settings.RSS_FETCH_INTERVAL_MINUTES,
+            requests_per_run=len(RSS_SOURCES),
+            daily_quota=None,
+            timeout_seconds=settings.RSS_TIMEOUT_SECONDS,
+            enabled=settings.RSS_ENABLED,
+        ),
+        SourceSpec(
+            name="guardian",
+            label="The Guardian",
+            fetchers=lambda: [("The Guardian", guardian_fetcher.fetch_guardian_articles)],
+            interval_minutes=settings.GUARDIAN_FETCH_INTERVAL_MINUTES,
+            requests_per_run=len(guardian_fetcher.GUARDIAN_SECTIONS),
+            daily_quota=guardian_fetcher.MAX_DAILY_REQUESTS,
+            timeout_seconds=settings.GUARDIAN_TIMEOUT_SECONDS,
+            enabled=settings.GUARDIAN_ENABLED and bool(settings.GUARDIAN_API_KEY),
+        ),
+        SourceSpec(
+            name="thenewsapi",
+            label="TheNewsAPI",
+            fetchers=lambda: [("TheNewsAPI", thenewsapi_fetcher.fetch_thenewsapi_articles)],
+            interval_minutes=settings.THENEWSAPI_FETCH_INTERVAL_MINUTES,
+            requests_per_run=1,
+            daily_quota=thenewsapi_fetcher.MAX_DAILY_REQUESTS,
+            timeout_seconds=settings.THENEWSAPI_TIMEOUT_SECONDS,
+            enabled=settings.THENEWSAPI_ENABLED and bool(settings.THENEWSAPI_KEY),
+        ),
+    ]
+
+    http_clients = get_http_client()
+    for spec in registry:
+        http_clients.register_timeout(spec.name, spec.timeout_seconds)
+    return registry
+
+
+def get_enabled_sources() -> list[SourceSpec]:
+    return [spec for spec in get_source_registry() if spec.enabled]
+
+
+def get_source(name: str) -> SourceSpec:
+    for spec in get_source_registry():
+        if spec.name == name:
+            return spec
+    raise KeyError(f"Unknown source: {name}")
+
+
+def check_quota_budget(spec: SourceSpec) -> None:
+    """Warn if a source's schedule would need more requests per day than its quota allows."""
+    if spec.daily_quota is None:
+        return
+    needed = spec.runs_per_day() * spec.requests_per_run
+    if needed > spec.daily_quota:
+        logger.warning(
+            f"Source {spec.name}: every {spec.interval_minutes} min needs ~{needed:.0f} requests/day, "
+            f"above its quota of {spec.daily_quota}; runs past the limit will be skipped"
+        )
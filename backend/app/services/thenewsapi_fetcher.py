@@ -1,52 +1,25 @@
 import logging
 import hashlib
-from datetime import datetime, date
+from datetime import datetime
 
 import httpx
 
 from app.config import settings
+from app.services import quota_ledger
+from app.services.fetch_cache import FetchResult
+from app.services.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
 THENEWSAPI_BASE_URL = "https://api.thenewsapi.com/v1/news/top"
 
-# Track daily usage (resets each day)
-_usage_tracker = {
-    "date": None,
-    "requests": 0,
-}
+QUOTA_PROVIDER = "thenewsapi"
 MAX_DAILY_REQUESTS = 3
 
 
-def _check_rate_limit() -> bool:
-    """Check if we're within the daily rate limit."""
-    today = date.today()
-    if _usage_tracker["date"] != today:
-        _usage_tracker["date"] = today
-        _usage_tracker["requests"] = 0
-
-    return _usage_tracker["requests"] < MAX_DAILY_REQUESTS
-
-
-def _increment_usage():
-    """Increment the daily usage counter."""
-    _usage_tracker["requests"] += 1
-    remaining = MAX_DAILY_REQUESTS - _usage_tracker["requests"]
-    logger.info(f"TheNewsAPI usage: {_usage_tracker['requests']}/{MAX_DAILY_REQUESTS} today ({remaining} remaining)")
-
-
-def get_thenewsapi_usage() -> dict:
+async def get_thenewsapi_usage() -> dict:
     """Get current TheNewsAPI usage stats."""
-    today = date.today()
-    if _usage_tracker["date"] != today:
-        return {"requests": 0, "limit": MAX_DAILY_REQUESTS, "remaining": MAX_DAILY_REQUESTS}
-
-    remaining = MAX_DAILY_REQUESTS - _usage_tracker["requests"]
-    return {
-        "requests": _usage_tracker["requests"],
-        "limit": MAX_DAILY_REQUESTS,
-        "remaining": remaining,
-    }
+    return await quota_ledger.get_usage(QUOTA_PROVIDER, MAX_DAILY_REQUESTS)
 
 
 def parse_thenewsapi_date(date_str: str | None) -> datetime | None:
@@ -64,56 +37,66 @@ def generate_guid(url: str) -> str:
     return hashlib.md5(url.encode()).hexdigest()
 
 
-async def fetch_thenewsapi_articles() -> list[dict]:
+async def fetch_thenewsapi_articles() -> FetchResult:
     """Fetch articles from The News API."""
     if not settings.THENEWSAPI_ENABLED:
         logger.debug("TheNewsAPI is disabled")
-        return []
+        return FetchResult()
 
     if not settings.THENEWSAPI_KEY:
         logger.warning("TheNewsAPI key not configured")
-        return []
+        return FetchResult()
 
-    if not _check_rate_limit():
-        logger.info("TheNewsAPI daily limit reached (3 requests/day), skipping")
-        return []
+    reservation = await quota_ledger.reserve(QUOTA_PROVIDER, MAX_DAILY_REQUESTS)
+    if reservation is None:
+        logger.info(f"TheNewsAPI daily limit reached ({MAX_DAILY_REQUESTS} requests/day), skipping")
+        return FetchResult()
 
     logger.info("Fetching articles from TheNewsAPI")
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
+        try:
+            response = await get_http_client().get(
                 THENEWSAPI_BASE_URL,
+                source="thenewsapi",
                 params={
                     "api_token": settings.THENEWSAPI_KEY,
                     "language": "en",
                     "limit": 100,
                 },
             )
-            response.raise_for_status()
-            _increment_usage()
-
-            data = response.json()
-            articles = []
-
-            for item in data.get("data", []):
-                guid = item.get("uuid") or generate_guid(item.get("url", ""))
-                articles.append({
-                    "guid": guid,
-                    "title": item.get("title", ""),
-                    "summary": item.get("description", ""),
-                    "link": item.get("url", ""),
-                    "source_name": item.get("source", "TheNewsAPI"),
-                    "image_url": item.get("image_url"),
-                    "published": parse_thenewsapi_date(item.get("published_at")),
-                })
-
-            logger.info(f"TheNewsAPI: fetched {len(articles)} articles")
-            return articles
+        except httpx.TransportError:
+            # The request never reached the API
+            await quota_ledger.refund(reservation)
+            raise
+        await quota_ledger.commit(reservation)
+        logger.info(
+            f"TheNewsAPI usage: {reservation.count}/{MAX_DAILY_REQUESTS} today "
+            f"({MAX_DAILY_REQUESTS - reservation.count} remaining)"
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        articles = []
+
+        for item in data.get("data", []):
+            guid = item.get("uuid") or generate_guid(item.get("url", ""))
+            articles.append({
+                "guid": guid,
+                "title": item.get("title", ""),
+                "summary": item.get("description", ""),
+                "link": item.get("url", ""),
+                "source_name": item.get("source", "TheNewsAPI"),
+                "image_url": item.get("image_url"),
+                "published": parse_thenewsapi_date(item.get("published_at")),
+            })
+
+        logger.info(f"TheNewsAPI: fetched {len(articles)} articles")
+        return FetchResult(articles)
 
     except httpx.HTTPStatusError as e:
         logger.error(f"TheNewsAPI error: {e.response.status_code}")
-        return []
+        return FetchResult()
     except Exception as e:
         logger.error(f"TheNewsAPI fetch failed: {e}")
-        return []
+        return FetchResult()
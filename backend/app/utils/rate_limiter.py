@@ -0,0 +1,122 @@
+"""Async rate limiting for external APIs, one token bucket per limit.
+
+A RateLimiter combines buckets such as requests per minute, refilled
+continuously. slot() waits until every bucket has a token, takes one from
+each, and holds one of max_in_flight concurrency slots while the request
+runs. Several requests can therefore be in flight at once, as long as the
+per-minute budget allows. Waiters are served in arrival order.
+
+Buckets live in process memory and pace one process. Limits that must hold
+across workers and restarts (daily quotas, and Gemini's per-minute window)
+are kept in app.services.quota_ledger.
+
+When the provider answers 429 anyway, backoff() pauses every caller for the
+Retry-After delay (see retry_after()), so one limiter shared by all callers
+of an API keeps them all within its limits.
+"""
+import asyncio
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+_RETRY_DELAY_RE = re.compile(r"retry(?:_delay| in)\s*\{?\s*(?:seconds:\s*)?(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+class TokenBucket:
+    """capacity tokens, refilled continuously at capacity per period_seconds."""
+
+    def __init__(self, capacity: int, period_seconds: float):
+        self.capacity = capacity
+        self.rate = capacity / period_seconds
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> int:
+        self._refill()
+        return int(self._tokens)
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available."""
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def take(self) -> None:
+        self._refill()
+        self._tokens -= 1
+
+    def give_back(self) -> None:
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class RateLimiter:
+    """Token buckets plus a concurrency cap, shared by every caller of one API."""
+
+    def __init__(self, name: str, buckets: dict[str, TokenBucket], max_in_flight: int):
+        self.name = name
+        self.buckets = buckets
+        self._lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._blocked_until = 0.0
+
+    def remaining(self, bucket: str) -> int:
+        return self.buckets[bucket].available()
+
+    async def acquire(self) -> None:
+        """Wait for a token from every bucket and take them."""
+        async with self._lock:
+            while True:
+                wait = max([self._blocked_until - time.monotonic(), *(b.wait_time() for b in self.buckets.values())])
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            for bucket in self.buckets.values():
+                bucket.take()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a concurrency slot and one token from every bucket for one request."""
+        async with self._in_flight:
+            await self.acquire()
+            yield
+
+    def refund(self, bucket: str) -> None:
+        """Return a token, e.g. for a request the provider rejected without counting it."""
+        self.buckets[bucket].give_back()
+
+    def backoff(self, seconds: float) -> None:
+        """Hold every caller for the given time (after a 429)."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        logger.warning(f"{self.name} rate limited, pausing requests for {seconds:.0f}s")
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether an API error is a 429 / resource-exhausted answer."""
+    response = getattr(error, "response", None)
+    return (
+        getattr(error, "code", None) == 429
+        or getattr(response, "status_code", None) == 429
+        or type(error).__name__ == "ResourceExhausted"
+    )
+
+
+def retry_after(error: Exception) -> float | None:
+    """The delay a 429 error asks for: a Retry-After header or Gemini's retry_delay, if any."""
+    response = getattr(error, "response", None)
+    header = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    match = _RETRY_DELAY_RE.search(str(error))
+    return float(match.group(1)) if match else None
@@ -0,0 +1,181 @@
+"""Record/replay of external responses for offline pipeline runs.
+
+With REPLAY_MODE=record, every HTTP response fetched through the shared client
+and every Gemini response is written under REPLAY_FIXTURES_DIR. With
+REPLAY_MODE=replay, those fixtures are served instead and nothing leaves the
+machine, so the full pipeline can be profiled reproducibly.
+
+Fixtures are keyed by request identity with API keys removed, so recorded
+files never contain credentials. Time-dependent query parameters are left out
+of the key, so each fixture holds the latest recording of that request.
+Conditional headers are part of it, so a 304 recorded by a later run is kept
+apart from the full response of the first one. A conditional request with no
+fixture of its own is answered with the unconditional one.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that carry credentials and must not reach fixtures
+SECRET_PARAMS = {"api-key", "api_key", "api_token", "apikey", "key", "token"}
+
+# Time-dependent parameters (e.g. the Guardian watermark) left out of fixture
+# keys, so a replay at a later time still finds the recorded page
+VOLATILE_PARAMS = {"from-date", "to-date", "published_after", "published_before"}
+
+# Request headers that change the answer (a 304 instead of the body)
+CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+# Response headers worth keeping; everything else is transport detail
+KEPT_HEADERS = ("content-type", "etag", "last-modified", "retry-after")
+
+
+def replay_mode() -> str:
+    return settings.REPLAY_MODE.lower()
+
+
+def _fixtures_dir(kind: str) -> Path:
+    path = Path(settings.REPLAY_FIXTURES_DIR) / kind
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def redact_url(url: str) -> str:
+    """Drop credential parameters and sort the rest so equivalent requests match."""
+    parts = urlsplit(url)
+    params = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), ""))
+
+
+def _http_key(method: str, url: str, headers: httpx.Headers | None = None) -> str:
+    parts = urlsplit(redact_url(url))
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in VOLATILE_PARAMS]
+    stable = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), ""))
+    identity = f"{method.upper()} {stable}"
+    for name in CONDITIONAL_HEADERS:
+        if headers is not None and name in headers:
+            identity += f"\n{name}: {headers[name]}"
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Pass requests through to the network and save each response as a fixture."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self._inner.handle_async_request(request)
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        fixture = {
+            "method": request.method,
+            "url": redact_url(str(request.url)),
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS},
+            "elapsed_ms": round(elapsed_ms, 1),
+            "body": base64.b64encode(body).decode(),
+        }
+        path = _fixtures_dir("http") / f"{_http_key(request.method, str(request.url), request.headers)}.json"
+        await asyncio.to_thread(path.write_text, json.dumps(fixture))
+
+        return httpx.Response(
+            response.status_code,
+            headers=fixture["headers"],
+            content=body,
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serve recorded fixtures; unknown requests get a 404.
+
+    With REPLAY_LATENCY enabled each response is delayed by its recorded
+    latency, so concurrency behaves as it did against the live services.
+    """
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        directory = _fixtures_dir("http")
+        path = directory / f"{_http_key(request.method, str(request.url), request.headers)}.json"
+        if not path.exists():
+            # Validators from a replayed run that were never sent while recording
+            path = directory / f"{_http_key(request.method, str(request.url))}.json"
+        if not path.exists():
+            logger.warning(f"Replay: no fixture for {request.method} {redact_url(str(request.url))}")
+            return httpx.Response(404, request=request)
+
+        fixture = json.loads(await asyncio.to_thread(path.read_text))
+        if settings.REPLAY_LATENCY:
+            await asyncio.sleep(fixture.get("elapsed_ms", 0) / 1000)
+
+        return httpx.Response(
+            fixture["status"],
+            headers=fixture["headers"],
+            content=base64.b64decode(fixture["body"]),
+            request=request,
+        )
+
+
+def build_transport(http2: bool, limits: httpx.Limits) -> httpx.AsyncBaseTransport | None:
+    """Transport for the shared HTTP client, or None to use httpx's default."""
+    mode = replay_mode()
+    if mode == "record":
+        return RecordingTransport(httpx.AsyncHTTPTransport(http2=http2, limits=limits))
+    if mode == "replay":
+        return ReplayTransport()
+    return None
+
+
+def _article_key(article: dict) -> str:
+    identity = "\x00".join(str(article.get(k) or "") for k in ("title", "summary", "source"))
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+def save_ratings(articles: list[dict], items: list, elapsed_ms: float) -> None:
+    """Record the model's answer for each article of a request.
+
+    Answers are stored per article rather than per prompt, because batch
+    composition depends on the order sources finish in and differs between runs.
+    """
+    directory = _fixtures_dir("gemini")
+    for article, item in zip(articles, items):
+        fixture = {"title": article.get("title", ""), "elapsed_ms": round(elapsed_ms, 1), "item": item}
+        (directory / f"{_article_key(article)}.json").write_text(json.dumps(fixture))
+
+
+async def replay_ratings(articles: list[dict]) -> list:
+    """Recorded answers for the given articles; unknown articles get an empty item."""
+    directory = _fixtures_dir("gemini")
+    items, elapsed_ms = [], 0.0
+    for article in articles:
+        path = directory / f"{_article_key(article)}.json"
+        if not path.exists():
+            logger.warning(f"Replay: no recorded rating for '{article.get('title', '')[:50]}'")
+            items.append({})
+            continue
+        fixture = json.loads(await asyncio.to_thread(path.read_text))
+        items.append(fixture["item"])
+        elapsed_ms = max(elapsed_ms, fixture.get("elapsed_ms", 0))
+
+    if settings.REPLAY_LATENCY:
+        await asyncio.sleep(elapsed_ms / 1000)
+    return items
@@ -1,4 +1,5 @@
 import asyncio
+import fcntl
 import logging
 from datetime import datetime, timedelta
 
@@ -8,24 +9,55 @@ from sqlalchemy import delete, select
 
 from app.config import settings
 from app.database import async_session
-from app.models import Article
-from app.services.news_fetcher import fetch_and_store, ARTICLES_PER_BATCH
-from app.services.article_rater import get_rater
-from app.services.keyword_filter import pre_filter_article
-from app.services.article_selector import select_balanced_articles
+from app.models import Article, RatingQueue
+from app.services import rating_queue
+from app.services.news_fetcher import fetch_source
+from app.services.article_rater import BACKEND as RATER_BACKEND, QUOTA_RATIONALE, get_rater, needs_rerating
+from app.services.batch_classifier import classify_batch, reclassify_articles
+from app.services.batch_planner import get_planner
+from app.services.image_enricher import purge_image_cache
+from app.services.keyword_rules import get_rules, reload_rules
+from app.services.near_duplicates import resolve_waiting_duplicates
+from app.services.rating_cache import get_cached_ratings, purge_rating_cache
+from app.services.score_predictor import get_predictor
+from app.services.source_registry import check_quota_budget, get_enabled_sources
+from app.utils.text import clean_text, normalize_article
 
 logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
-
-async def scheduled_fetch() -> None:
-    """Fetch articles from RSS sources on schedule."""
-    logger.info("Scheduler: Starting scheduled fetch")
+# Open while this process holds SCHEDULER_LOCK_FILE
+_lock_file = None
+# Keyword rules version the re-evaluation job was last pointed at
+_rules_version: str | None = None
+
+
+def claim_scheduler() -> bool:
+    """Take the scheduler lock, so only one worker on the host runs the jobs.
+
+    The lock is released when its process exits, so a worker started to
+    replace a dead one takes over.
+    """
+    global _lock_file
+    handle = open(settings.SCHEDULER_LOCK_FILE, "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        logger.info("Scheduler: another worker runs the scheduled jobs")
+        return False
+    _lock_file = handle
+    return True
+
+
+async def scheduled_fetch(source_name: str) -> None:
+    """Fetch one source on its own schedule."""
+    logger.info(f"Scheduler: Starting scheduled fetch of {source_name}")
     async with async_session() as session:
-        result = await fetch_and_store(session)
+        result = await fetch_source(source_name, session)
         logger.info(
-            f"Scheduler: Fetch complete - fetched {result['fetched']}, new {result['new']}"
+            f"Scheduler: Fetch of {source_name} complete - fetched {result['fetched']}, new {result['new']}"
         )
 
 
@@ -35,6 +67,8 @@ async def cleanup_old_articles() -> None:
     cutoff_date = datetime.utcnow() - timedelta(days=14)
 
     async with async_session() as session:
+        old_articles = select(Article.id).where(Article.published_at < cutoff_date)
+        await session.execute(delete(RatingQueue).where(RatingQueue.article_id.in_(old_articles)))
         result = await session.execute(
             delete(Article).where(Article.published_at < cutoff_date)
         )
@@ -42,141 +76,238 @@ async def cleanup_old_articles() -> None:
         deleted_count = result.rowcount
         logger.info(f"Scheduler: Cleanup complete - deleted {deleted_count} old articles")
 
+        # Duplicates of deleted stories are rated on their own
+        await resolve_waiting_duplicates(session)
+
+    purged_count = await purge_image_cache()
+    logger.info(f"Scheduler: Purged {purged_count} expired og:image cache entries")
+
+    purged_count = await purge_rating_cache()
+    logger.info(f"Scheduler: Purged {purged_count} expired rating cache entries")
+
+
+def _rater_input(article: Article) -> dict:
+    """The dict the rater and rating cache take for a stored article."""
+    return {"title": clean_text(article.headline), "summary": clean_text(article.summary), "source": article.source_name}
+
 
 async def retry_failed_ratings() -> None:
-    """Retry rating articles that failed on previous attempts."""
+    """Rate articles from the rating queue, best first, while the daily quota lasts."""
     rater = get_rater()
+    predictor = get_predictor()
 
-    # Check if we have any API quota left
-    if not rater.can_rate():
+    # Check if we have any API quota left; the local predictor and rating cache work without it
+    if not await rater.can_rate() and predictor is None and not settings.RATING_CACHE_ENABLED:
         logger.info("Scheduler: Gemini daily limit reached, skipping retry")
         return
 
-    remaining = rater.get_remaining_requests()
+    remaining = await rater.get_remaining_requests()
     logger.info(f"Scheduler: Starting retry of failed ratings ({remaining} API calls remaining)")
 
+    totals = {"rated": 0, "predicted": 0, "cached": 0, "filtered": 0, "failed": 0}
+    while True:
+        token, entries = await rating_queue.claim(settings.RATING_QUEUE_CLAIM_SIZE)
+        if not entries:
+            if not any(totals.values()):
+                logger.info("Scheduler: No failed articles to retry")
+            break
+        logger.info(f"Scheduler: Claimed {len(entries)} queued articles")
+
+        done, failed = await _rate_claimed(entries, totals)
+        await rating_queue.ack(done)
+        await rating_queue.release(token, [e for e in entries if e.article_id not in done], failed)
+
+        # A short claim means the queue is drained; anything left untried means the quota is
+        if len(entries) < settings.RATING_QUEUE_CLAIM_SIZE or len(done) + len(failed) < len(entries):
+            break
+
+    logger.info(
+        f"Scheduler: Retry complete - {totals['rated']} rated, {totals['predicted']} predicted, "
+        f"{totals['cached']} from cache, {totals['filtered']} pre-filtered, {totals['failed']} failed"
+    )
+
+
+async def _rate_claimed(entries: list[RatingQueue], totals: dict) -> tuple[set[int], set[int]]:
+    """Rate the articles of claimed queue entries.
+
+    Returns the ids that no longer need a rating and the ids whose rating
+    was attempted and failed. Entries in neither were not tried.
+    """
+    rater = get_rater()
+    predictor = get_predictor()
+
     async with async_session() as session:
-        # Get unrated articles
         result = await session.execute(
-            select(Article)
-            .where(Article.rating_failed == True)
-            .order_by(Article.published_at.desc())
-            .limit(50)
+            select(Article).where(Article.id.in_([e.article_id for e in entries]))
         )
-        pending_articles = result.scalars().all()
-
-        if not pending_articles:
-            logger.info("Scheduler: No failed articles to retry")
-            return
-
-        logger.info(f"Scheduler: Found {len(pending_articles)} pending articles")
+        by_id = {article.id: article for article in result.scalars().all()}
+        # Deleted since, or rated by an ingest run in the meantime
+        done = {e.article_id for e in entries if e.article_id not in by_id or not by_id[e.article_id].rating_failed}
+        # Claim order is queue priority order
+        pending_articles = [by_id[e.article_id] for e in entries if e.article_id not in done]
 
         # Apply pre-filter first
         passed_filter = []
-        filtered_count = 0
 
+        # Rows stored before normalized_text existed are normalized once here
         for article in pending_articles:
-            filter_result = pre_filter_article(
-                article.headline,
-                article.summary or ""
-            )
-
-            if not filter_result["passed"]:
+            if article.normalized_text is None:
+                article.normalized_text = normalize_article(article.headline, article.summary)
+        verdicts = classify_batch([a.normalized_text for a in pending_articles])
+        for article, reason in zip(pending_articles, verdicts.reasons):
+            article.rules_version = verdicts.rules_version
+            if reason:
                 # Mark as filtered out, skip Gemini
                 article.is_rated = True
                 article.rating_failed = False
-                article.excluded_reason = filter_result["reason"]
-                filtered_count += 1
+                article.excluded_reason = reason
+                done.add(article.id)
+                totals["filtered"] += 1
             else:
                 passed_filter.append(article)
 
-        if filtered_count > 0:
-            logger.info(f"Scheduler: Pre-filtered {filtered_count} articles")
-
-        if not passed_filter:
-            await session.commit()
-            logger.info("Scheduler: No articles passed pre-filter")
-            return
-
-        # Convert to dicts for balanced selection
-        article_dicts = [
-            {
-                "id": a.id,
-                "source_name": a.source_name,
-                "published": a.published_at,
-            }
-            for a in passed_filter
-        ]
-
-        # Select articles based on remaining API quota (each call rates ARTICLES_PER_BATCH)
-        max_to_rate = rater.get_remaining_requests() * ARTICLES_PER_BATCH
-        selected_dicts = select_balanced_articles(article_dicts, min(len(passed_filter), max_to_rate))
-        selected_ids = {d["id"] for d in selected_dicts}
-
-        # Get the actual article objects for selected items
-        articles_to_rate = [a for a in passed_filter if a.id in selected_ids]
-
-        if not articles_to_rate:
-            await session.commit()
-            return
-
-        sources = set(a.source_name for a in articles_to_rate)
-        logger.info(f"Scheduler: Rating up to {len(articles_to_rate)} articles from {len(sources)} sources")
-
-        # Rate articles in batches (multiple articles per API call)
-        success_count = 0
-        for batch_start in range(0, len(articles_to_rate), ARTICLES_PER_BATCH):
-            if not rater.can_rate():
-                logger.info(f"Scheduler: Daily limit reached after {success_count} ratings")
-                break
-
-            batch = articles_to_rate[batch_start:batch_start + ARTICLES_PER_BATCH]
-            batch_input = [
-                {"title": a.headline, "summary": a.summary or "No summary", "source": a.source_name}
-                for a in batch
-            ]
-
+        # Score confident cases locally, leaving only uncertain ones for Gemini
+        if predictor is not None:
+            uncertain = []
+            for article in passed_filter:
+                prediction = predictor.predict(article.normalized_text, article.source_name)
+                if prediction.confident:
+                    article.hopefulness_score = prediction.score
+                    article.is_rated = True
+                    article.rating_failed = False
+                    article.rating_source = "local"
+                    done.add(article.id)
+                    totals["predicted"] += 1
+                else:
+                    uncertain.append(article)
+            passed_filter = uncertain
+
+        # Articles whose text was rated before don't need a request
+        uncached = []
+        cached = await get_cached_ratings([_rater_input(a) for a in passed_filter])
+        for article, rating in zip(passed_filter, cached):
+            if rating is None:
+                uncached.append(article)
+                continue
+            article.hopefulness_score = rating["score"]
+            article.excluded_reason = rating["excluded_reason"]
+            article.is_rated = True
+            article.rating_failed = False
+            article.rating_source = "cache"
+            done.add(article.id)
+            totals["cached"] += 1
+        passed_filter = uncached
+
+        # As many as the remaining quota can take at the current batch size
+        planner = get_planner()
+        articles_to_rate = passed_filter[:await rater.get_remaining_requests() * planner.max_articles]
+        if articles_to_rate:
+            sources = set(a.source_name for a in articles_to_rate)
+            logger.info(f"Scheduler: Rating up to {len(articles_to_rate)} articles from {len(sources)} sources")
+
+        # Rate articles in batches (multiple articles per API call). Up to
+        # GEMINI_MAX_IN_FLIGHT run at once; the rater's limiter paces them.
+        # Articles an answer skips are queued again for a later batch.
+        failed: set[int] = set()
+        queue = [(a, _rater_input(a)) for a in articles_to_rate]
+        rollovers: dict[int, int] = {}
+
+        async def rate(batch: list[tuple[Article, dict]]) -> None:
+            # A batch that raises counts as a failed attempt for its articles, so
+            # they back off instead of being released as untried
+            try:
+                await rate_batch(batch)
+            except Exception as e:
+                logger.error(f"Scheduler: Batch rating failed: {e}")
+                unrated = {article.id for article, _ in batch} - done - failed
+                failed.update(unrated)
+                totals["failed"] += len(unrated)
+
+        async def rate_batch(batch: list[tuple[Article, dict]]) -> None:
             logger.info(f"Scheduler: Batch rating {len(batch)} articles")
-            ratings = await rater.rate_articles_batch(batch_input)
+            ratings = await rater.rate_articles_batch([article_input for _, article_input in batch])
 
-            for article, rating in zip(batch, ratings):
+            for (article, article_input), rating in zip(batch, ratings):
+                if needs_rerating(rating) and rollovers.get(article.id, 0) < settings.RATING_MAX_ROLLOVERS:
+                    rollovers[article.id] = rollovers.get(article.id, 0) + 1
+                    queue.append((article, article_input))
+                    continue
                 score = rating.get("score")
                 if score is not None:
                     article.hopefulness_score = score
                     article.excluded_reason = rating.get("excluded_reason")
                     article.is_rated = True
                     article.rating_failed = False
-                    success_count += 1
+                    article.rating_source = RATER_BACKEND
+                    done.add(article.id)
+                    totals["rated"] += 1
                     logger.debug(f"Rated '{article.headline[:30]}': {score}")
+                elif rating.get("rationale") != QUOTA_RATIONALE:
+                    failed.add(article.id)
+                    totals["failed"] += 1
+
+        in_flight: set[asyncio.Task] = set()
+        while queue or in_flight:
+            if not queue or len(in_flight) >= settings.GEMINI_MAX_IN_FLIGHT:
+                finished, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    task.result()
+                continue
+            if not await rater.can_rate():
+                logger.info(f"Scheduler: Daily limit reached after {totals['rated']} ratings")
+                break
 
-            # Delay between batches to respect RPM limit (5 req/min)
-            if batch_start + ARTICLES_PER_BATCH < len(articles_to_rate):
-                await asyncio.sleep(15)
+            # Planned one batch at a time so each uses the latest batch size
+            size = len(planner.pack(queue, [article_input for _, article_input in queue])[0])
+            batch = queue[:size]
+            del queue[:size]
+            in_flight.add(asyncio.create_task(rate(batch)))
+        await asyncio.gather(*in_flight)
 
         await session.commit()
-        logger.info(
-            f"Scheduler: Retry complete - {success_count} rated, {filtered_count} pre-filtered"
-        )
+        await resolve_waiting_duplicates(session)
+    return done, failed
+
+
+async def refresh_keyword_rules() -> None:
+    """Swap in an edited keyword rules file and re-evaluate stored articles right away.
+
+    get_rules() may already have swapped it in while serving a request, so
+    this compares versions rather than relying on its own reload.
+    """
+    global _rules_version
+    reload_rules()
+    version = get_rules().version
+    if _rules_version is not None and version != _rules_version:
+        scheduler.modify_job("reevaluate_rules", next_run_time=datetime.now())
+    _rules_version = version
+
+
+async def reevaluate_articles() -> None:
+    """Re-apply the keyword rules to articles classified under an older version."""
+    totals = await reclassify_articles(chunk_size=settings.RULES_REEVALUATE_CHUNK_SIZE)
+    if totals["scanned"]:
+        logger.info(f"Scheduler: Re-evaluated {totals['scanned']} articles against the current keyword rules")
 
 
 def start_scheduler() -> None:
     """Start the scheduler with configured jobs."""
-    # Run initial fetch immediately on startup
-    scheduler.add_job(
-        scheduled_fetch,
-        id="initial_fetch",
-        name="Initial fetch on startup",
-        replace_existing=True,
-    )
-
-    # Add recurring fetch job
-    scheduler.add_job(
-        scheduled_fetch,
-        trigger=IntervalTrigger(hours=settings.FETCH_INTERVAL_HOURS),
-        id="fetch_articles",
-        name="Fetch articles from RSS sources",
-        replace_existing=True,
-    )
+    # One recurring fetch job per enabled source, each on its own interval,
+    # starting immediately on startup
+    sources = get_enabled_sources()
+    for spec in sources:
+        check_quota_budget(spec)
+        scheduler.add_job(
+            scheduled_fetch,
+            trigger=IntervalTrigger(minutes=spec.interval_minutes),
+            args=[spec.name],
+            id=f"fetch_{spec.name}",
+            name=f"Fetch articles from {spec.label}",
+            next_run_time=datetime.now(),
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+        )
 
     # Add cleanup job - run daily
     scheduler.add_job(
@@ -196,14 +327,44 @@ def start_scheduler() -> None:
         replace_existing=True,
     )
 
+    # Pick up keyword rule edits, and re-evaluate rows left on an older
+    # version (also after a restart with a new rules file)
+    scheduler.add_job(
+        refresh_keyword_rules,
+        trigger=IntervalTrigger(seconds=settings.KEYWORD_RULES_CHECK_SECONDS),
+        id="refresh_rules",
+        name="Reload keyword rules when the file changes",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        reevaluate_articles,
+        trigger=IntervalTrigger(hours=1),
+        id="reevaluate_rules",
+        name="Re-evaluate articles classified with older keyword rules",
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+
     scheduler.start()
+    schedule = ", ".join(f"{spec.name} every {spec.interval_minutes} min" for spec in sources)
     logger.info(
-        f"Scheduler started: fetching every {settings.FETCH_INTERVAL_HOURS} hours, "
-        "retry ratings every hour, cleanup daily"
+        f"Scheduler started: fetching {schedule or 'no sources'}; "
+        "retry ratings every hour, cleanup daily, "
+        f"keyword rules checked every {settings.KEYWORD_RULES_CHECK_SECONDS}s"
     )
 
 
 def shutdown_scheduler() -> None:
     """Shutdown the scheduler gracefully."""
+    global _lock_file
+    if not scheduler.running:
+        return
     scheduler.shutdown(wait=False)
+    if _lock_file is not None:
+        _lock_file.close()
+        _lock_file = None
     logger.info("Scheduler shutdown complete")
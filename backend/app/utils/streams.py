@@ -0,0 +1,89 @@
+import asyncio
+from contextlib import aclosing, suppress
+from typing import AsyncIterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _StageError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def buffered(stream: AsyncIterator[T], maxsize: int) -> AsyncIterator[T]:
+    """Run an async iterator in its own task, behind a bounded queue.
+
+    The producer runs ahead of the consumer by at most `maxsize` items and then
+    blocks, which gives backpressure between pipeline stages. Errors raised by
+    the producer are re-raised in the consumer.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    async def pump() -> None:
+        try:
+            async with aclosing(stream):
+                async for item in stream:
+                    await queue.put(item)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            await queue.put(_StageError(e))
+            return
+        await queue.put(_DONE)
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        # Tear down upstream stages before the error (or early exit) propagates
+        if not task.done():
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+
+async def batched(stream: AsyncIterator[T], size: int, max_wait: float | None = None) -> AsyncIterator[list[T]]:
+    """Group items into lists of up to `size`.
+
+    A partial batch is flushed once `max_wait` seconds pass with no new item,
+    so a slow upstream never holds finished items back for long.
+    """
+    iterator = stream.__aiter__()
+    batch: list[T] = []
+    pending = asyncio.ensure_future(iterator.__anext__())
+
+    try:
+        while True:
+            timeout = max_wait if batch else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield batch
+                batch = []
+                continue
+
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                break
+
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+            pending = asyncio.ensure_future(iterator.__anext__())
+    finally:
+        if not pending.done():
+            pending.cancel()
+            with suppress(asyncio.CancelledError, StopAsyncIteration):
+                await pending
+
+    if batch:
+        yield batch
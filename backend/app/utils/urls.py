@@ -0,0 +1,82 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only carry tracking/campaign state
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "ref", "ref_src", "cmp", "cmpid", "ocid", "smid", "guccounter",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def _clean_query(query: str, sort: bool = False) -> str:
+    params = [(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if not _is_tracking_param(k)]
+    return urlencode(sorted(params) if sort else params)
+
+
+def clean_url(url: str) -> str:
+    """Strip tracking parameters and the fragment, keeping the URL otherwise as published.
+
+    A URL that cannot be parsed (e.g. an unclosed IPv6 bracket) is returned unchanged.
+    """
+    if not url:
+        return url
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, _clean_query(parts.query), ""))
+
+
+def canonicalize_url(url: str) -> str:
+    """Reduce a URL to a canonical form for identity comparison.
+
+    Drops tracking parameters and the fragment, treats http and https as the
+    same, lowercases the host, drops a leading "www." and default ports, strips
+    a trailing slash, and sorts the remaining query parameters. The result is
+    for comparison only and may not be fetchable.
+
+    Raises ValueError for a URL that cannot be parsed, such as a non-numeric
+    port or an unclosed IPv6 bracket.
+    """
+    parts = urlsplit(url.strip())
+
+    scheme = parts.scheme.lower()
+    if scheme in DEFAULT_PORTS:
+        scheme = "https"
+
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal; hostname drops the brackets
+    port = parts.port
+    if port is not None and str(port) not in DEFAULT_PORTS.values():
+        host = f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    return urlunsplit((scheme, host, path, _clean_query(parts.query, sort=True), ""))
+
+
+def canonical_url_key(url: str) -> str | None:
+    """SHA-1 of the canonical URL, used as the article's unique URL key.
+
+    None for a missing or malformed URL; such articles are matched on guid only.
+    """
+    if not url or not url.strip():
+        return None
+    try:
+        canonical = canonicalize_url(url)
+    except ValueError:
+        return None
+    return hashlib.sha1(canonical.encode()).hexdigest()
@@ -0,0 +1 @@
+"""Standalone microbenchmarks (see benchmarks/run.py) and a Gemini stand-in server for load tests (benchmarks/standin.py)."""
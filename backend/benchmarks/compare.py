@@ -0,0 +1,53 @@
+"""Compare two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+
+Prints the per-article time of every case present in both files. Exits with
+status 1 when a case got slower by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> tuple[dict, dict[tuple[str, int], dict]]:
+    with open(path) as f:
+        report = json.load(f)
+    return report, {(r["name"], r["size"]): r for r in report["results"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="slowdown in percent counted as a regression")
+    args = parser.parse_args()
+
+    old_report, old = load(args.baseline)
+    new_report, new = load(args.candidate)
+    print(f"{old_report.get('commit') or args.baseline} -> {new_report.get('commit') or args.candidate}")
+    if old_report.get("platform") != new_report.get("platform"):
+        print("Warning: results come from different platforms")
+
+    regressions = 0
+    print(f"\n{'case':32} {'size':>9} {'before µs':>10} {'after µs':>10} {'change':>8}")
+    for key in sorted(old.keys() & new.keys(), key=lambda k: (k[1], k[0])):
+        before, after = old[key]["per_item_us"], new[key]["per_item_us"]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key[0]:32} {key[1]:>9,} {before:>10.2f} {after:>10.2f} {change:>+7.1f}%{flag}")
+
+    skipped = len(old.keys() ^ new.keys())
+    if skipped:
+        print(f"({skipped} case(s) present in only one file skipped)")
+
+    if regressions:
+        print(f"\n{regressions} case(s) slower by more than {args.threshold:.0f}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Microbenchmarks for the classification and rater hot paths.
+
+    python -m benchmarks.run                      # 10k, 100k and 1M articles
+    python -m benchmarks.run --sizes 10k,100k     # skip the slow 1M corpus
+    python -m benchmarks.run --only pre_filter    # cases whose name contains this
+    python -m benchmarks.compare OLD.json NEW.json
+
+Each case runs over a synthetic corpus (see benchmarks/corpus.py) several
+times; the fastest run is reported. Results are written as JSON to
+benchmarks/results/<commit>.json so runs on two commits can be compared.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable
+
+from app.services.article_rater import article_id, build_batch_prompt, parse_batch_response
+from app.services.batch_classifier import RECLASSIFY_CHUNK_SIZE, classify_batch
+from app.services.content_filter import calculate_hopefulness_score, detect_category
+from app.services.ingest_pipeline import ARTICLES_PER_BATCH
+from app.services.keyword_filter import pre_filter_article
+from app.services.keyword_rules import get_rules
+from app.utils.text import normalize_article
+from benchmarks.corpus import make_articles, make_batch_response
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+# Fewer repeats on bigger corpora; --repeat overrides
+DEFAULT_REPEATS = {10_000: 5, 100_000: 3, 1_000_000: 1}
+
+
+class Corpus:
+    """One synthetic corpus plus the derived inputs each case needs, built outside the timings."""
+
+    def __init__(self, size: int, seed: int):
+        self.articles = make_articles(size, seed)
+        self.normalized = [normalize_article(a["title"], a["summary"]) for a in self.articles]
+        self.batches = [
+            [{"title": a["title"], "summary": a["summary"], "source": a["source_name"]} for a in self.articles[i:i + ARTICLES_PER_BATCH]]
+            for i in range(0, size, ARTICLES_PER_BATCH)
+        ]
+        rng = random.Random(seed)
+        self.responses = [make_batch_response([article_id(a) for a in batch], rng) for batch in self.batches]
+
+
+def bench_pre_filter_article(corpus: Corpus) -> None:
+    for a in corpus.articles:
+        pre_filter_article(a["title"], a["summary"])
+
+
+def bench_detect_category(corpus: Corpus) -> None:
+    for a in corpus.articles:
+        detect_category(a["title"], a["summary"])
+
+
+def bench_calculate_hopefulness_score(corpus: Corpus) -> None:
+    for a in corpus.articles:
+        calculate_hopefulness_score(a["title"], a["summary"])
+
+
+def bench_classify_batch(corpus: Corpus) -> None:
+    # Chunked the way reclassify_articles() reads rows
+    for i in range(0, len(corpus.normalized), RECLASSIFY_CHUNK_SIZE):
+        classify_batch(corpus.normalized[i:i + RECLASSIFY_CHUNK_SIZE])
+
+
+def bench_build_batch_prompt(corpus: Corpus) -> None:
+    for batch in corpus.batches:
+        build_batch_prompt(batch)
+
+
+def bench_parse_batch_response(corpus: Corpus) -> None:
+    for text, batch in zip(corpus.responses, corpus.batches):
+        parse_batch_response(text, batch)
+
+
+CASES: dict[str, Callable[[Corpus], None]] = {
+    name.removeprefix("bench_"): fn for name, fn in globals().items() if name.startswith("bench_")
+}
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(sizes: list[int], only: str | None, repeat: int | None, seed: int) -> dict:
+    results = []
+    for size in sizes:
+        started = time.perf_counter()
+        corpus = Corpus(size, seed)
+        print(f"\n{size:,} articles (corpus built in {time.perf_counter() - started:.1f}s)")
+        for name, case in CASES.items():
+            if only and only not in name:
+                continue
+            timings = []
+            for _ in range(repeat or DEFAULT_REPEATS.get(size, 3)):
+                started = time.perf_counter()
+                case(corpus)
+                timings.append(time.perf_counter() - started)
+            best = min(timings)
+            results.append({
+                "name": name,
+                "size": size,
+                "repeats": len(timings),
+                "seconds_min": best,
+                "seconds_median": statistics.median(timings),
+                "per_item_us": best / size * 1e6,
+                "items_per_second": size / best if best else None,
+            })
+            print(f"  {name:32} {best:9.3f}s  {best / size * 1e6:8.2f} µs/article")
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    return {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rules_version": get_rules().version,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def parse_sizes(value: str) -> list[int]:
+    sizes = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        sizes.append(SIZES[part] if part in SIZES else int(part))
+    return sizes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k,100k,1m", help="comma-separated corpus sizes (10k, 100k, 1m or a number)")
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, help="runs per case (default depends on corpus size)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    report = run(parse_sizes(args.sizes), args.only, args.repeat, args.seed)
+
+    output = args.output
+    if not output:
+        name = (report["commit"] or "results") + ("-dirty" if report["dirty"] else "")
+        output = os.path.join(RESULTS_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
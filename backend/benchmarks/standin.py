@@ -0,0 +1,113 @@
+"""A local stand-in for the Gemini API, for load-testing ingestion offline.
+
+    python -m benchmarks.standin                                  # port 8765, Gemini-like defaults
+    python -m benchmarks.standin --latency 0 --error-rate 0       # as fast as possible
+    python -m benchmarks.standin --rpm 5 --drop-rate 0.1          # free-tier limits, lossy answers
+
+Point the app at it with RATER_BACKEND=http and RATER_HTTP_URL=http://127.0.0.1:8765,
+e.g. `python test_fetch.py --rater http --synthetic 10000 ...`.
+
+It serves generateContent and answers every rating prompt with the keyword
+heuristic (app.services.rater_backends.heuristic_answer). Before answering
+it waits a random, Gemini-like latency. It fails a share of requests with
+500s and 503s. It answers 429 with a Retry-After header past --rpm requests
+per minute, and at random at --rate-limit-rate. It also drops a share of
+batch items, which the rater must carry into its next batch. GET /stats
+reports what it has served.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.services.rater_backends import heuristic_answer
+from app.utils.rate_limiter import TokenBucket
+
+
+def _error(status: int, message: str, code: str, headers: dict | None = None) -> JSONResponse:
+    return JSONResponse(
+        {"error": {"code": status, "message": message, "status": code}},
+        status_code=status,
+        headers=headers,
+    )
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    app = FastAPI(title="Gemini stand-in")
+    rng = random.Random(args.seed)
+    bucket = TokenBucket(args.rpm, 60.0) if args.rpm else None
+    served: Counter = Counter()
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        served["requests"] += 1
+        body = await request.json()
+        prompt = body["contents"][-1]["parts"][-1]["text"]
+
+        if bucket is not None and bucket.available() < 1:
+            served["429"] += 1
+            return _error(429, "Resource has been exhausted (e.g. check quota).", "RESOURCE_EXHAUSTED",
+                          {"Retry-After": str(math.ceil(bucket.wait_time()))})
+        if bucket is not None:
+            bucket.take()
+        if rng.random() < args.rate_limit_rate:
+            served["429"] += 1
+            return _error(429, "Resource has been exhausted (e.g. check quota).", "RESOURCE_EXHAUSTED",
+                          {"Retry-After": str(args.retry_after)})
+
+        await asyncio.sleep(max(0.0, rng.gauss(args.latency, args.jitter)))
+        if rng.random() < args.error_rate:
+            status = rng.choice((500, 503))
+            served[str(status)] += 1
+            return _error(status, "The model is overloaded. Please try again later.", "UNAVAILABLE")
+
+        try:
+            answer = heuristic_answer(prompt)
+        except ValueError as e:
+            served["400"] += 1
+            return _error(400, str(e), "INVALID_ARGUMENT")
+        items = json.loads(answer)
+        if isinstance(items, list) and args.drop_rate:
+            kept = [item for item in items if rng.random() >= args.drop_rate]
+            served["dropped_items"] += len(items) - len(kept)
+            answer = json.dumps(kept)
+
+        served["200"] += 1
+        return {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": answer}]}, "finishReason": "STOP"}],
+            "modelVersion": model,
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return dict(served)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=2.0, help="mean seconds before answering")
+    parser.add_argument("--jitter", type=float, default=0.7, help="standard deviation of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="share of requests failed with 500/503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered 429 at random")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before answering 429 (0: no limit)")
+    parser.add_argument("--retry-after", type=int, default=10, help="Retry-After seconds on random 429s")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of batch items left out of answers")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
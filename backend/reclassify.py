@@ -0,0 +1,42 @@
+"""Re-apply the keyword rules to stored articles.
+
+    python reclassify.py          # rows classified under an older rules version
+    python reclassify.py --all    # every row
+
+The running app does this on its own after the rules file changes; this is
+for doing it offline. Categories are recomputed, unrated articles the
+pre-filter now rejects are marked filtered, and keyword-filtered articles
+that now pass go back to the rating retry queue.
+"""
+import argparse
+import asyncio
+import time
+
+from app.database import engine, init_db
+from app.services.batch_classifier import reclassify_articles
+from app.services.keyword_rules import get_rules
+
+
+async def main(only_stale: bool):
+    print("Initializing database...")
+    await init_db()
+
+    started = time.perf_counter()
+    rules = get_rules()
+    print(f"Keyword rules version {rules.version}")
+    totals = await reclassify_articles(only_stale=only_stale)
+    await engine.dispose()
+
+    print(f"Articles scanned: {totals['scanned']}")
+    print(f"Normalized: {totals['normalized']}")
+    print(f"Recategorized: {totals['recategorized']}")
+    print(f"Newly filtered: {totals['filtered']}")
+    print(f"Returned to rating queue: {totals['unfiltered']}")
+    print(f"Took {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", help="re-evaluate every article, not only stale ones")
+    args = parser.parse_args()
+    asyncio.run(main(only_stale=not args.all))
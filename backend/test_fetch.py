@@ -1,20 +1,114 @@
+"""Run one full fetch through the ingest pipeline and print what happened.
+
+    python test_fetch.py                           # live run against .env settings
+    python test_fetch.py --record fixtures         # live run, saving every response
+    python test_fetch.py --replay fixtures --db sqlite+aiosqlite:///./bench.db --no-pacing
+    python test_fetch.py --synthetic 10000 --rater http --db sqlite+aiosqlite:///./load.db --no-pacing
+
+Replay runs need no network access or API keys, so the pipeline can be
+benchmarked on recorded data. Synthetic runs feed generated articles
+(benchmarks/corpus.py) instead of the real sources, to measure throughput
+at many times the real volume. Rate them with --rater heuristic, or with
+--rater http against `python -m benchmarks.standin` for Gemini-like
+latency, errors and 429s. Use a fresh --db for each replay or synthetic
+run, otherwise everything is deduplicated against the previous run.
+"""
+import argparse
 import asyncio
-from app.database import async_session, init_db
-from app.services.news_fetcher import fetch_and_store
+import os
+import time
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="DIR", help="save every HTTP and Gemini response under DIR")
+    mode.add_argument("--replay", metavar="DIR", help="serve responses recorded under DIR instead of the network")
+    parser.add_argument("--db", metavar="URL", help="database URL to use instead of DATABASE_URL")
+    parser.add_argument("--latency", action="store_true", help="replay each response after its recorded delay")
+    parser.add_argument("--no-pacing", action="store_true", help="lift the Gemini per-minute and daily limits")
+    parser.add_argument("--rater", choices=("gemini", "heuristic", "http"), help="rater backend instead of RATER_BACKEND")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="ingest N generated articles instead of the real sources")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the --synthetic corpus")
+    return parser.parse_args()
+
+
+def apply_overrides(args: argparse.Namespace) -> None:
+    """Settings are read at import time, so overrides go into the environment first."""
+    if args.record:
+        os.environ["REPLAY_MODE"] = "record"
+        os.environ["REPLAY_FIXTURES_DIR"] = args.record
+    elif args.replay:
+        os.environ["REPLAY_MODE"] = "replay"
+        os.environ["REPLAY_FIXTURES_DIR"] = args.replay
+        # Let enabled sources run without real keys; they are never sent
+        for key in ("GEMINI_API_KEY", "GUARDIAN_API_KEY", "THENEWSAPI_KEY"):
+            if not os.environ.get(key):
+                os.environ[key] = "replay"
+    if args.db:
+        os.environ["DATABASE_URL"] = args.db
+    if args.latency:
+        os.environ["REPLAY_LATENCY"] = "true"
+    if args.no_pacing:
+        os.environ["GEMINI_REQUESTS_PER_MINUTE"] = "1000000"
+        os.environ["GEMINI_REQUESTS_PER_DAY"] = "1000000"
+    if args.rater:
+        os.environ["RATER_BACKEND"] = args.rater
+
 
+def synthetic_source(size: int, seed: int):
+    """A source fetcher returning size generated articles with links and images, so nothing is fetched."""
+    from app.services.fetch_cache import FetchResult
+    from benchmarks.corpus import make_articles
 
-async def main():
+    async def fetch() -> FetchResult:
+        articles = make_articles(size, seed)
+        for article in articles:
+            article["guid"] = f"synthetic-{seed}-{article['guid']}"
+            article["link"] = f"https://example.org/{article['guid']}"
+            article["image_url"] = f"https://example.org/{article['guid']}.jpg"
+        return FetchResult(articles)
+
+    return "Synthetic", fetch
+
+
+async def main(args: argparse.Namespace):
+    from app.config import settings
+    from app.database import async_session, engine, init_db
+    from app.services.http_client import http_clients
+    from app.services.news_fetcher import fetch_and_store, run_fetchers
+
+    print(f"Mode: {settings.REPLAY_MODE}  Rater: {settings.RATER_BACKEND}  Database: {settings.DATABASE_URL}")
     print("Initializing database...")
     await init_db()
 
     print("Fetching and storing articles...\n")
 
+    started = time.perf_counter()
     async with async_session() as session:
-        result = await fetch_and_store(session)
+        if args.synthetic:
+            result = await run_fetchers([synthetic_source(args.synthetic, args.seed)], session)
+        else:
+            result = await fetch_and_store(session)
+    elapsed = time.perf_counter() - started
+
+    await http_clients.stop()
+    await engine.dispose()
 
     print(f"Total articles fetched: {result['fetched']}")
     print(f"New articles stored: {result['new']}")
+    print(f"Throughput: {result['fetched'] / elapsed:.0f} articles/s over {elapsed:.1f}s")
+
+    print("\nBy source:")
+    for name, count in result["by_source"].items():
+        print(f"  {name:<30} {count:>5}")
+
+    print("\nStage time (seconds):")
+    for stage, seconds in result["stage_seconds"].items():
+        print(f"  {stage:<30} {seconds:>8.3f}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    apply_overrides(args)
+    asyncio.run(main(args))
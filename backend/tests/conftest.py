@@ -0,0 +1,41 @@
+"""Tests run against a throwaway SQLite database.
+
+Settings are read when app is first imported, so the environment is set up
+here before any test module imports it. Each test gets empty tables.
+"""
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+
+_db_dir = tempfile.mkdtemp(prefix="bwn-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/test.db"
+os.environ["RATER_BACKEND"] = "heuristic"
+os.environ["KEYWORD_RULES_PATH"] = str(Path(__file__).parent.parent / "app" / "rules" / "keyword_rules.json")
+
+import pytest  # noqa: E402
+
+from app.database import Base, engine, init_db  # noqa: E402
+
+
+async def _clear_tables() -> None:
+    async with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
+    await engine.dispose()
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion on a fresh event loop, with the schema created."""
+
+    async def with_db(coro):
+        await init_db()
+        try:
+            return await coro
+        finally:
+            # Pooled aiosqlite connections belong to this loop
+            await engine.dispose()
+
+    yield lambda coro: asyncio.run(with_db(coro))
+    asyncio.run(_clear_tables())
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from app.services.article_rater import (
+    INVALID_RATIONALE,
+    MISSING_RATIONALE,
+    article_id,
+    needs_rerating,
+    parse_batch_response,
+)
+
+ARTICLES = [
+    {"title": "Reef recovers", "summary": "Coral returns", "source": "A"},
+    {"title": "New vaccine", "summary": "Trial succeeds", "source": "B"},
+    {"title": "Solar record", "summary": "Grid milestone", "source": "C"},
+]
+IDS = [article_id(a) for a in ARTICLES]
+
+
+def item(id: str, score, **fields) -> dict:
+    return {"id": id, "score": score, "excluded_reason": None, "rationale": "ok", **fields}
+
+
+def test_items_are_matched_by_id_not_position():
+    answer = json.dumps([item(IDS[2], 30), item(IDS[0], 90), item(IDS[1], 60)])
+
+    assert [r["score"] for r in parse_batch_response(answer, ARTICLES)] == [90, 60, 30]
+
+
+def test_ids_are_matched_case_and_whitespace_insensitively():
+    answer = json.dumps([item(f" {IDS[0].upper()} ", 80)])
+
+    assert parse_batch_response(answer, ARTICLES[:1])[0]["score"] == 80
+
+
+def test_missing_and_invalid_items_are_marked_for_rerating():
+    answer = json.dumps([item(IDS[0], 70), item(IDS[1], 150)])
+
+    ratings = parse_batch_response(answer, ARTICLES)
+
+    assert ratings[0]["score"] == 70 and not needs_rerating(ratings[0])
+    assert ratings[1] == {"score": None, "excluded_reason": None, "rationale": INVALID_RATIONALE}
+    assert ratings[2] == {"score": None, "excluded_reason": None, "rationale": MISSING_RATIONALE}
+    assert needs_rerating(ratings[1]) and needs_rerating(ratings[2])
+
+
+def test_unknown_ids_are_ignored_and_the_first_duplicate_wins():
+    answer = json.dumps([item("ffffffff", 10), item(IDS[0], 55), item(IDS[0], 99)])
+
+    assert parse_batch_response(answer, ARTICLES[:1])[0]["score"] == 55
+
+
+def test_excluded_reason_is_kept():
+    answer = json.dumps([item(IDS[0], 5, excluded_reason="sports")])
+
+    assert parse_batch_response(answer, ARTICLES[:1])[0]["excluded_reason"] == "sports"
+
+
+@pytest.mark.parametrize("wrap", [lambda items: {"ratings": items}, lambda items: items[0]])
+def test_wrapped_array_and_lone_object_are_accepted(wrap):
+    answer = json.dumps(wrap([item(IDS[0], 65)]))
+
+    assert parse_batch_response(answer, ARTICLES[:1])[0]["score"] == 65
+
+
+@pytest.mark.parametrize("answer", ["not json", "42", '"text"'])
+def test_answers_without_an_array_raise(answer):
+    with pytest.raises(ValueError):
+        parse_batch_response(answer, ARTICLES)
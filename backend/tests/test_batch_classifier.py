@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from app.database import async_session
+from app.models import Article, RatingQueue
+from app.services.batch_classifier import classify_batch, presence_matrix, reclassify_articles
+from app.services.content_filter import calculate_hopefulness_score, detect_category, should_include
+from app.services.keyword_filter import pre_filter_article
+from app.services.keyword_rules import get_rules
+from app.utils.text import normalize_article
+
+ARTICLES = [
+    ("Solar breakthrough could cure grid woes", "A new community project improves climate resilience"),
+    ("Three killed in shooting downtown", "Police say the attack was planned"),
+    ("Celebrity gossip: the week in review", "Influencer drama and a viral video"),
+    ("Refugee aid convoy reaches the border", "Rescue teams discover survivors and recover supplies"),
+    ("Council meeting postponed", ""),
+    ("War and murder dominate the news", "Death and attack reported, but a vaccine breakthrough offers hope"),
+    ("", ""),
+]
+
+
+def test_batch_matches_per_article_functions():
+    texts = [normalize_article(title, summary) for title, summary in ARTICLES]
+
+    batch = classify_batch(texts)
+
+    assert batch.rules_version == get_rules().version
+    for i, (title, summary) in enumerate(ARTICLES):
+        verdict = pre_filter_article(title, summary)
+        assert bool(batch.passed[i]) == verdict["passed"], title
+        assert batch.reasons[i] == verdict["reason"], title
+        assert batch.categories[i] == detect_category(title, summary), title
+        assert batch.scores[i] == pytest.approx(calculate_hopefulness_score(title, summary)), title
+        assert bool(batch.include[i]) == should_include(title, summary), title
+
+
+def test_empty_batch():
+    batch = classify_batch([])
+
+    assert batch.reasons == [] and batch.categories == []
+    assert batch.scores.shape == (0,)
+
+
+def test_presence_matrix_marks_distinct_keywords_once():
+    matcher = get_rules().matcher
+    presence = presence_matrix(["solar solar solar", "nothing here"], matcher)
+
+    assert presence.shape == (2, len(matcher.vocabulary))
+    assert presence[0].sum() == 1 and presence[1].sum() == 0
+    assert np.all(presence.data == 1)
+
+
+async def reclassify_stored(*rows: dict) -> tuple[dict, dict[str, Article], list[int]]:
+    async with async_session() as session:
+        session.add_all(
+            Article(guid=row["headline"], source_url=row["headline"], source_name="Test", summary="", **row)
+            for row in rows
+        )
+        await session.commit()
+
+    totals = await reclassify_articles(chunk_size=2)
+
+    async with async_session() as session:
+        articles = {a.headline: a for a in (await session.execute(select(Article))).scalars().all()}
+        queued = (await session.execute(select(RatingQueue.article_id))).scalars().all()
+    return totals, articles, list(queued)
+
+
+def test_reclassify_updates_stale_rows_only(run):
+    version = get_rules().version
+    totals, articles, queued = run(reclassify_stored(
+        # Now pre-filtered, waiting for a rating: filtered and dequeued
+        dict(headline="Two killed in crash", rating_failed=True, rules_version="old"),
+        # Filtered by an older keyword that no longer matches: back to the queue
+        dict(headline="Community garden opens", is_rated=True, excluded_reason="keyword_violence:garden", rules_version="old"),
+        # Rated by Gemini: only the category changes
+        dict(headline="Solar farm powers a town", is_rated=True, hopefulness_score=8, category="general"),
+        # Already on the current version: left alone
+        dict(headline="Robot helps surgeons", category="general", rules_version=version),
+    ))
+
+    assert totals["scanned"] == 3
+    assert (totals["filtered"], totals["unfiltered"], totals["recategorized"]) == (1, 1, 3)
+
+    crash = articles["Two killed in crash"]
+    assert (crash.is_rated, crash.rating_failed, crash.excluded_reason) == (True, False, "keyword_violence:killed")
+    garden = articles["Community garden opens"]
+    assert (garden.is_rated, garden.rating_failed, garden.excluded_reason) == (False, True, None)
+    assert queued == [garden.id]
+    solar = articles["Solar farm powers a town"]
+    assert (solar.category, solar.hopefulness_score, solar.rules_version) == ("environment", 8, version)
+    assert solar.normalized_text == normalize_article(solar.headline, "")
+    assert articles["Robot helps surgeons"].category == "general"
@@ -0,0 +1,89 @@
+import pytest
+
+from app.config import settings
+from app.services import batch_planner
+from app.services.batch_planner import INITIAL_BATCH_ARTICLES, BatchPlanner, article_tokens, estimate_tokens
+
+SHORT = {"title": "Reef recovers", "summary": "Divers count new growth", "source": "BBC"}
+
+
+def long_article(chars: int) -> dict:
+    return {"title": "Long read", "summary": "x" * chars, "source": "The Guardian"}
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Budgets small enough to reason about; returns a fresh planner."""
+    monkeypatch.setattr(settings, "RATING_BATCH_MIN_ARTICLES", 2)
+    monkeypatch.setattr(settings, "RATING_BATCH_MAX_ARTICLES", 12)
+    monkeypatch.setattr(settings, "RATING_BATCH_INPUT_TOKENS", 100_000)
+    monkeypatch.setattr(settings, "RATING_BATCH_OUTPUT_TOKENS", 100_000)
+    return BatchPlanner()
+
+
+def test_estimates_grow_with_text():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcde") == 2
+    assert article_tokens(long_article(4040)) - article_tokens(long_article(40)) == 1000
+    # A missing summary is sent as a placeholder
+    assert article_tokens({"title": "t", "summary": None, "source": "s"}) > article_tokens({"title": "t", "summary": "x", "source": "s"})
+
+
+def test_pack_fills_to_the_article_cap(limits):
+    items = list(range(25))
+
+    batches = limits.pack(items, [SHORT] * len(items))
+
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [i for b in batches for i in b] == items
+
+
+def test_pack_respects_the_input_token_budget(limits, monkeypatch):
+    budget = batch_planner._PROMPT_OVERHEAD + 2 * article_tokens(long_article(2000))
+    monkeypatch.setattr(settings, "RATING_BATCH_INPUT_TOKENS", budget)
+    inputs = [long_article(2000), long_article(2000), SHORT, long_article(2000), long_article(100_000)]
+
+    batches = limits.pack(list(range(len(inputs))), inputs)
+
+    # The oversized article still gets a batch of its own
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+def test_pack_respects_the_output_token_budget(limits, monkeypatch):
+    monkeypatch.setattr(settings, "RATING_BATCH_OUTPUT_TOKENS", 3 * settings.RATING_OUTPUT_TOKENS_PER_ARTICLE)
+
+    assert [len(b) for b in limits.pack(list(range(7)), [SHORT] * 7)] == [3, 3, 1]
+
+
+def test_cap_grows_after_complete_full_batches_only(limits):
+    limits.record(INITIAL_BATCH_ARTICLES, INITIAL_BATCH_ARTICLES)
+    assert limits.max_articles == INITIAL_BATCH_ARTICLES + 1
+
+    # A short batch answered in full says nothing about larger ones
+    limits.record(4, 4)
+    assert limits.max_articles == INITIAL_BATCH_ARTICLES + 1
+
+    for _ in range(5):
+        limits.record(limits.max_articles, limits.max_articles)
+    assert limits.max_articles == settings.RATING_BATCH_MAX_ARTICLES
+
+
+def test_cap_drops_to_the_answered_count_and_halves_on_garbage(limits):
+    limits.record(10, 7)
+    assert limits.max_articles == 7
+
+    limits.record(7, None)
+    assert limits.max_articles == 3
+
+    limits.record(3, None)
+    limits.record(3, 0)
+    assert limits.max_articles == settings.RATING_BATCH_MIN_ARTICLES
+
+
+def test_initial_cap_stays_within_limits(monkeypatch):
+    monkeypatch.setattr(settings, "RATING_BATCH_MAX_ARTICLES", 4)
+    assert BatchPlanner().max_articles == 4
+
+    monkeypatch.setattr(settings, "RATING_BATCH_MIN_ARTICLES", 15)
+    monkeypatch.setattr(settings, "RATING_BATCH_MAX_ARTICLES", 25)
+    assert BatchPlanner().max_articles == 15
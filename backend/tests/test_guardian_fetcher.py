@@ -0,0 +1,172 @@
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+
+from app.config import settings
+from app.services import guardian_fetcher
+from app.services.fetch_cache import SourceStateUpdate, get_source_state, hash_content, save_source_state
+
+KEY = "guardian:science"
+WATERMARK = datetime(2026, 3, 1, 8, 0)
+
+
+def page(*published: str, pages: int = 1) -> httpx.Response:
+    results = [
+        {"id": f"science/{p}", "webTitle": f"Story {p}", "webUrl": f"https://g.co/{p}", "webPublicationDate": p}
+        for p in published
+    ]
+    return httpx.Response(200, json={"response": {"pages": pages, "results": results}}, headers={"ETag": '"v2"'})
+
+
+class FakeApi:
+    """Stands in for _fetch_page: answers pages in order and records each request."""
+
+    def __init__(self, *responses: httpx.Response):
+        self.responses = list(responses)
+        self.requests: list[tuple[dict, dict]] = []
+
+    async def __call__(self, section, params, headers, semaphore):
+        self.requests.append((params, headers))
+        return self.responses.pop(0)
+
+
+def fetch(monkeypatch, api: FakeApi, state: SourceStateUpdate | None = None):
+    monkeypatch.setattr(guardian_fetcher, "_fetch_page", api)
+
+    async def scenario():
+        if state is not None:
+            await save_source_state(state)
+        return await guardian_fetcher.fetch_guardian_section("science", asyncio.Semaphore(1))
+
+    return scenario()
+
+
+def test_first_fetch_pages_oldest_first_and_moves_the_watermark(run, monkeypatch):
+    api = FakeApi(page("2026-03-01T09:00:00Z", pages=2), page("2026-03-01T10:30:00+01:00", pages=2))
+
+    result = run(fetch(monkeypatch, api))
+
+    assert [a["guid"] for a in result.articles] == ["science/2026-03-01T09:00:00Z", "science/2026-03-01T10:30:00+01:00"]
+    assert api.requests[0][0]["order-by"] == "oldest"
+    assert "page" not in api.requests[0][0] and api.requests[1][0]["page"] == 2
+    [state] = result.states
+    assert (state.key, state.etag, state.watermark) == (KEY, '"v2"', datetime(2026, 3, 1, 9, 30))
+
+
+def test_fetch_resumes_from_the_stored_watermark_with_validators(run, monkeypatch):
+    api = FakeApi(page("2026-03-01T09:00:00Z"))
+
+    run(fetch(monkeypatch, api, SourceStateUpdate(KEY, '"v1"', None, "old", watermark=WATERMARK)))
+
+    params, headers = api.requests[0]
+    assert params["from-date"] == "2026-03-01T08:00:00Z"
+    assert headers == {"If-None-Match": '"v1"'}
+
+
+def test_page_cap_stops_the_run_and_keeps_the_watermark_at_the_last_page(run, monkeypatch):
+    monkeypatch.setattr(settings, "GUARDIAN_MAX_PAGES_PER_SECTION", 1)
+    api = FakeApi(page("2026-03-01T09:00:00Z", pages=5))
+
+    result = run(fetch(monkeypatch, api))
+
+    assert len(api.requests) == 1
+    assert result.states[0].watermark == datetime(2026, 3, 1, 9, 0)
+
+
+def test_watermark_never_moves_back(run, monkeypatch):
+    # from-date has day granularity, so earlier stories of the same day come back
+    api = FakeApi(page("2026-03-01T07:00:00Z"))
+
+    result = run(fetch(monkeypatch, api, SourceStateUpdate(KEY, None, None, None, watermark=WATERMARK)))
+
+    assert len(result.articles) == 1
+    assert result.states[0].watermark == WATERMARK
+
+
+def test_not_modified_saves_only_new_validators(run, monkeypatch):
+    stored = SourceStateUpdate(KEY, '"v1"', "Sun, 01 Mar 2026 08:00:00 GMT", "abc", watermark=WATERMARK)
+
+    same = run(fetch(monkeypatch, FakeApi(httpx.Response(304)), stored))
+    renewed = run(fetch(monkeypatch, FakeApi(httpx.Response(304, headers={"ETag": '"v2"'})), stored))
+
+    assert same.articles == [] and same.states == []
+    [update] = renewed.states
+    assert (update.etag, update.last_modified) == ('"v2"', "Sun, 01 Mar 2026 08:00:00 GMT")
+    assert update.content_hash is None and update.watermark is None
+
+
+def test_unchanged_body_saves_new_validators_but_keeps_the_watermark(run, monkeypatch):
+    response = page("2026-03-01T09:00:00Z")
+    stored = SourceStateUpdate(KEY, '"v1"', None, hash_content(response.content), watermark=WATERMARK)
+
+    async def scenario():
+        result = await fetch(monkeypatch, FakeApi(response), stored)
+        for update in result.states:
+            await save_source_state(update)
+        return result, await get_source_state(KEY)
+
+    result, state = run(scenario())
+
+    assert result.articles == []
+    assert (state.etag, state.content_hash, state.watermark) == ('"v2"', stored.content_hash, WATERMARK)
+
+
+def test_results_page_parsing():
+    data = json.loads(page("2026-03-01T09:00:00Z").content)
+    data["response"]["results"][0]["fields"] = {"headline": "Better headline", "standfirst": "Intro", "thumbnail": "t.jpg"}
+
+    [article] = guardian_fetcher._parse_results(data)
+
+    assert (article["title"], article["summary"], article["image_url"]) == ("Better headline", "Intro", "t.jpg")
+    assert article["source_name"] == "The Guardian"
+
+
+class FakeClient:
+    """Answers every section with one story after a short delay, tracking concurrency."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def get(self, url, *, source, params=None, headers=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        section = url.rsplit("/", 1)[-1]
+        # Cross-posted stories appear in several sections under the same id
+        published = "2026-03-01T09:00:00Z" if section in ("world", "science") else f"2026-03-01T10:00:00Z-{section}"
+        return httpx.Response(
+            200,
+            json={"response": {"pages": 1, "results": [{"id": published, "webTitle": section, "webPublicationDate": None}]}},
+            request=httpx.Request("GET", url),
+        )
+
+
+def test_sections_are_fetched_in_parallel_within_the_concurrency_limit(run, monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(guardian_fetcher, "get_http_client", lambda: client)
+    monkeypatch.setattr(settings, "GUARDIAN_API_KEY", "test")
+    monkeypatch.setattr(settings, "GUARDIAN_ENABLED", True)
+    monkeypatch.setattr(settings, "GUARDIAN_MAX_CONCURRENCY", 2)
+
+    result = run(guardian_fetcher.fetch_guardian_articles())
+
+    assert client.peak == 2
+    assert len(result.articles) == len(guardian_fetcher.GUARDIAN_SECTIONS) - 1
+    assert sorted(s.key for s in result.states) == sorted(f"guardian:{s}" for s in guardian_fetcher.GUARDIAN_SECTIONS)
+
+
+def test_sections_stop_when_the_daily_quota_is_used_up(run, monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(guardian_fetcher, "get_http_client", lambda: client)
+    monkeypatch.setattr(guardian_fetcher, "MAX_DAILY_REQUESTS", 2)
+    monkeypatch.setattr(settings, "GUARDIAN_API_KEY", "test")
+    monkeypatch.setattr(settings, "GUARDIAN_ENABLED", True)
+
+    result = run(guardian_fetcher.fetch_guardian_articles())
+
+    assert len(result.states) == 2
+    assert run(guardian_fetcher.get_guardian_usage())["requests"] == 2
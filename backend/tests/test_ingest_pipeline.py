@@ -0,0 +1,164 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import async_session
+from app.models import Article, RatingQueue, SourceState
+from app.services import ingest_pipeline
+from app.services.article_rater import ArticleRater
+from app.services.fetch_cache import FetchResult, SourceStateUpdate
+from app.services.ingest_pipeline import PipelineStats, filter_stage, rate_stage, run_pipeline
+from app.utils.streams import batched, buffered
+
+PUBLISHED = datetime(2026, 3, 1, 9, 0)
+
+
+def article(guid: str, title: str, summary: str = "", link: str | None = None) -> dict:
+    return {
+        "guid": guid,
+        "title": title,
+        "summary": summary,
+        "link": link or f"https://news.example.com/{guid}",
+        "published": PUBLISHED,
+        # Set, so the enrich stage has no og:image to look up
+        "image_url": f"https://news.example.com/{guid}.jpg",
+        "source_name": "Example",
+    }
+
+
+async def items(*values):
+    for value in values:
+        yield value
+
+
+async def collect(stream) -> list:
+    return [item async for item in stream]
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setattr(settings, "PREDICTOR_ENABLED", False)
+
+
+def test_buffered_keeps_order_and_reraises_upstream_errors():
+    async def failing():
+        yield 1
+        yield 2
+        raise RuntimeError("source broke")
+
+    assert asyncio.run(collect(buffered(items(1, 2, 3), 1))) == [1, 2, 3]
+    with pytest.raises(RuntimeError, match="source broke"):
+        asyncio.run(collect(buffered(failing(), 1)))
+
+
+def test_batched_flushes_partial_groups():
+    async def slow():
+        yield 1
+        yield 2
+        await asyncio.sleep(0.05)
+        yield 3
+
+    assert asyncio.run(collect(batched(items(1, 2, 3, 4, 5), 2))) == [[1, 2], [3, 4], [5]]
+    assert asyncio.run(collect(batched(slow(), 10, max_wait=0.01))) == [[1, 2], [3]]
+
+
+def test_filter_stage_tags_rejected_articles_and_keeps_the_scan():
+    stats = PipelineStats()
+    articles = [article("a", "Three killed in shooting"), article("b", "Volunteers plant a forest")]
+
+    out = asyncio.run(collect(filter_stage(items(*articles), stats)))
+
+    assert [a.get("_filter_reason") for a in out] == ["keyword_violence:killed", None]
+    assert out[1]["normalized_text"] and out[1]["_matches"] is not None
+    assert stats.filtered == 1
+
+
+def test_rate_stage_passes_skipped_articles_through_and_rates_the_rest(run):
+    stats = PipelineStats()
+    skipped = {**article("a", "Filtered"), "_filter_reason": "keyword_violence:killed"}
+    pending = [article(str(i), f"Community project number {i} succeeds") for i in range(3)]
+
+    out = run(collect(rate_stage(items(skipped, *pending), stats)))
+
+    assert out[0] is skipped
+    assert sorted(a["guid"] for a in out[1:]) == ["0", "1", "2"]
+    assert all(a["is_rated"] and a["rating_source"] == "heuristic" for a in out[1:])
+    assert stats.rated == 3
+
+
+async def ingest(*sources) -> tuple[PipelineStats, list[Article], list[str], list[int]]:
+    async with async_session() as session:
+        stats = await run_pipeline(list(sources), session)
+    async with async_session() as session:
+        stored = (await session.execute(select(Article).order_by(Article.guid))).scalars().all()
+        states = (await session.execute(select(SourceState.key))).scalars().all()
+        queued = (await session.execute(select(RatingQueue.article_id))).scalars().all()
+    return stats, list(stored), list(states), list(queued)
+
+
+def source(name: str, *articles: dict, state: str | None = None):
+    async def fetch() -> FetchResult:
+        states = [SourceStateUpdate(state, '"v1"', None, "hash")] if state else []
+        return FetchResult([dict(a) for a in articles], states)
+
+    return name, fetch
+
+
+def test_pipeline_stores_new_articles_once_and_then_saves_source_state(run):
+    async def broken() -> FetchResult:
+        raise RuntimeError("feed down")
+
+    stats, stored, states, queued = run(ingest(
+        source(
+            "one",
+            article("hope", "Volunteers plant a million trees", "The community forest will recover the valley"),
+            article("grim", "Three killed in shooting downtown"),
+            state="rss:one",
+        ),
+        source(
+            "two",
+            # Same guid, and the same page behind a tracking link
+            article("hope", "Volunteers plant a million trees"),
+            article("hope-copy", "Tree planting", link="https://www.news.example.com/hope/?utm_source=rss"),
+            state="rss:two",
+        ),
+        ("broken", broken),
+    ))
+
+    assert (stats.fetched, stats.new, stats.filtered, stats.stored) == (4, 2, 1, 2)
+    assert [a.guid for a in stored] == ["grim", "hope"]
+    grim, hope = stored
+    assert (grim.is_rated, grim.rating_failed, grim.excluded_reason) == (True, False, "keyword_violence:killed")
+    assert hope.is_rated and hope.rating_source == "heuristic" and hope.category
+    assert hope.rules_version and hope.normalized_text and hope.canonical_key
+    assert queued == []
+    assert sorted(states) == ["rss:one", "rss:two"]
+
+
+def test_failed_run_saves_no_source_state(run, monkeypatch):
+    async def failing_persist(articles, session, stats):
+        async for _ in articles:
+            raise RuntimeError("database went away")
+
+    monkeypatch.setattr(ingest_pipeline, "persist_stage", failing_persist)
+
+    with pytest.raises(RuntimeError):
+        run(ingest(source("one", article("hope", "Volunteers plant trees"), state="rss:one")))
+
+    assert run(ingest())[2] == []
+
+
+def test_articles_are_left_pending_and_queued_without_quota(run, monkeypatch):
+    async def out_of_quota(self) -> bool:
+        return False
+
+    monkeypatch.setattr(ArticleRater, "can_rate", out_of_quota)
+
+    stats, stored, _, queued = run(ingest(source("one", article("hope", "Volunteers plant a million trees"))))
+
+    assert stats.pending == 1
+    assert (stored[0].is_rated, stored[0].rating_failed) == (False, True)
+    assert queued == [stored[0].id]
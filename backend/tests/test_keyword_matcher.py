@@ -0,0 +1,84 @@
+from app.services.keyword_filter import check_keywords, pre_filter_article
+from app.services.keyword_matcher import KeywordMatcher, scan_article
+from app.services.keyword_rules import parse_rules
+from app.utils.text import normalize_article, tokenize
+
+MATCHER = KeywordMatcher(
+    {
+        "grief": ["rip", "passed away", "died"],
+        "hope": ["improve", "study", "kidnap", "new"],
+    },
+    inflect=True,
+)
+
+
+def found(text: str, group: str) -> set[str]:
+    return MATCHER.scan(text).keywords(group)
+
+
+def test_keywords_match_whole_words_only():
+    assert found("A trip to the coast", "grief") == set()
+    assert found("Fans say RIP to the old stadium", "grief") == {"rip"}
+
+
+def test_multi_word_keywords_match_as_phrases():
+    assert found("The actor passed away on Sunday", "grief") == {"passed away"}
+    assert found("The bill passed; he went away", "grief") == set()
+
+
+def test_inflections_of_the_last_word_match():
+    assert found("Air quality improved and keeps improving", "hope") == {"improve"}
+    assert found("Two studies agree", "hope") == {"study"}
+    assert found("The kidnapped sailors were freed", "hope") == {"kidnap"}
+
+
+def test_short_words_are_not_inflected():
+    assert found("Breaking news from the council", "hope") == set()
+    assert found("A new park opens", "hope") == {"new"}
+
+
+def test_first_prefers_the_earliest_listed_keyword_and_count_is_distinct():
+    matches = MATCHER.scan("He died, RIP, and rip again")
+
+    assert matches.first("grief") == "rip"
+    assert matches.count("grief") == 2
+    assert [(hit.keyword, hit.start, hit.end) for hit in matches.hits] == [("died", 1, 2), ("rip", 2, 3), ("rip", 4, 5)]
+    assert matches.first("hope") is None
+
+
+def test_scan_columns_agrees_with_scan():
+    text = normalize_article("The actor passed away", "A new study of reefs improved hopes")
+    columns = MATCHER.scan_columns(text.split())
+    matches = MATCHER.scan_tokens(text.split())
+
+    assert {MATCHER.vocabulary[c] for c in columns} == {(hit.group, hit.keyword) for hit in matches.hits}
+
+
+def test_check_keywords_matches_like_ingest():
+    assert check_keywords("Storms destroyed the pier", ["destroy", "flood"]) == "destroy"
+    assert check_keywords("Destroyer docks in port", ["destroy"]) is None
+    assert check_keywords("Nothing to see", []) is None
+
+
+def test_pre_filter_reports_the_first_negative_category_then_trivial():
+    rules = parse_rules({
+        "version": "t",
+        "filter": {"negative": {"violence": ["attack"], "death": ["died"]}, "trivial": {"celebrity": ["gossip"]}},
+        "score": {"positive": {}, "negative": {"weight": 0.0, "keywords": []}},
+        "categories": {},
+    })
+
+    def reason(title: str) -> str | None:
+        return pre_filter_article(title, "", rules=rules)["reason"]
+
+    assert reason("Man died after attack") == "keyword_violence:attack"
+    assert reason("Celebrity gossip as singer died") == "keyword_death:died"
+    assert reason("Celebrity gossip roundup") == "keyword_trivial:gossip"
+    assert pre_filter_article("Volunteers rebuild a school", "", rules=rules) == {"passed": True, "reason": None}
+
+
+def test_scan_article_uses_normalized_tokens():
+    matches = scan_article("Reef <b>IMPROVES</b>", "", MATCHER)
+
+    assert matches.keywords("hope") == {"improve"}
+    assert tokenize("Reef IMPROVES!") == ["reef", "improves"]
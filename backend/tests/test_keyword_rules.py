@@ -0,0 +1,70 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.services import keyword_rules
+
+RULES = json.loads((Path(__file__).parent.parent / "app" / "rules" / "keyword_rules.json").read_text())
+
+
+@pytest.fixture
+def rules_file(tmp_path, monkeypatch):
+    """A private copy of the rules file, loaded as if the process had just started."""
+    path = tmp_path / "rules.json"
+
+    def write(version, **changes) -> None:
+        path.write_text(json.dumps({**RULES, **changes, "version": version}))
+        # Bump the mtime, as a save a second later would
+        stamp = path.stat().st_mtime + 1
+        os.utime(path, (stamp, stamp))
+
+    write("1")
+    monkeypatch.setattr(settings, "KEYWORD_RULES_PATH", str(path))
+    monkeypatch.setattr(keyword_rules, "_current", None)
+    monkeypatch.setattr(keyword_rules, "_loaded_stat", None)
+    monkeypatch.setattr(keyword_rules, "_checked_at", 0.0)
+    return write
+
+
+def test_get_rules_loads_on_first_use(rules_file):
+    rules = keyword_rules.get_rules()
+
+    assert rules.version == "1"
+    assert set(rules.categories) == set(RULES["categories"])
+    assert keyword_rules.get_rules() is rules
+
+
+def test_get_rules_picks_up_an_edit_after_the_check_interval(rules_file, monkeypatch):
+    monkeypatch.setattr(settings, "KEYWORD_RULES_CHECK_SECONDS", 3600)
+    first = keyword_rules.get_rules()
+    rules_file("2")
+
+    assert keyword_rules.get_rules() is first
+
+    monkeypatch.setattr(settings, "KEYWORD_RULES_CHECK_SECONDS", 0)
+    assert keyword_rules.get_rules().version == "2"
+
+
+def test_reload_rules_only_swaps_when_the_file_changed(rules_file):
+    assert keyword_rules.reload_rules() is True
+    assert keyword_rules.reload_rules() is False
+
+    rules_file("2")
+    assert keyword_rules.reload_rules() is True
+    assert keyword_rules.get_rules().version == "2"
+
+
+def test_invalid_edit_keeps_the_rules_in_use(rules_file):
+    keyword_rules.reload_rules()
+    rules_file("2", score={"positive": {"high": {"weight": 1.0, "keywords": "not a list"}}})
+
+    assert keyword_rules.reload_rules() is False
+    assert keyword_rules.get_rules().version == "1"
+
+
+def test_parse_rules_requires_a_version():
+    with pytest.raises(ValueError):
+        keyword_rules.parse_rules({**RULES, "version": " "})
@@ -0,0 +1,116 @@
+from sqlalchemy import select
+
+from app.database import async_session
+from app.models import Article, RatingQueue
+from app.services.near_duplicates import (
+    FINGERPRINT_BITS,
+    NearDuplicateIndex,
+    hamming_distance,
+    resolve_waiting_duplicates,
+    simhash,
+    to_signed,
+)
+
+STORY = ("Scientists restore coral reef in record time", "Divers replanted thousands of corals off the coast")
+
+
+def flip(fingerprint: int, *bits: int) -> int:
+    for bit in bits:
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def test_simhash_is_stable_and_close_for_rewordings():
+    reworded = simhash("Scientists restore a coral reef in record time!", STORY[1])
+    unrelated = simhash("Local council approves new parking rules", "The vote passed after a long debate")
+
+    assert simhash(*STORY) == simhash(*STORY)
+    assert hamming_distance(simhash(*STORY), reworded) < hamming_distance(simhash(*STORY), unrelated)
+
+
+def test_to_signed_fits_a_bigint_and_keeps_the_bits():
+    fingerprint = (1 << FINGERPRINT_BITS) - 1
+    signed = to_signed(fingerprint)
+
+    assert -(1 << 63) <= signed < 1 << 63
+    assert signed & fingerprint == fingerprint
+    assert to_signed(5) == 5
+
+
+def test_index_finds_fingerprints_within_max_distance():
+    index = NearDuplicateIndex(max_distance=3)
+    fingerprint = simhash(*STORY)
+    index.add("story", fingerprint)
+
+    assert index.find(fingerprint) == "story"
+    assert index.find(flip(fingerprint, 0, 20, 63)) == "story"
+    # One flipped bit in each of the four bands is past max_distance
+    assert index.find(flip(fingerprint, 0, 20, 40, 63)) is None
+
+
+def test_index_returns_the_closest_match():
+    index = NearDuplicateIndex(max_distance=3)
+    fingerprint = simhash(*STORY)
+    index.add("farther", flip(fingerprint, 1, 2))
+    index.add("closer", flip(fingerprint, 1))
+
+    assert index.find(fingerprint) == "closer"
+    assert len(index) == 2
+
+
+async def add(guid: str, **fields) -> None:
+    async with async_session() as session:
+        session.add(Article(
+            guid=guid, headline=guid, summary="", source_url=guid, canonical_key=guid, source_name="Source",
+            **{"is_rated": False, "rating_failed": False, **fields},
+        ))
+        await session.commit()
+
+
+async def state() -> tuple[dict, set]:
+    async with async_session() as session:
+        articles = {
+            row.guid: row
+            for row in (await session.execute(
+                select(Article.guid, Article.duplicate_of, Article.is_rated, Article.rating_failed, Article.hopefulness_score)
+            )).all()
+        }
+        queued = set((await session.execute(
+            select(Article.guid).join(RatingQueue, RatingQueue.article_id == Article.id)
+        )).scalars().all())
+    return articles, queued
+
+
+def test_duplicates_inherit_a_rated_representatives_score(run):
+    async def scenario():
+        await add("rated", is_rated=True, hopefulness_score=80)
+        await add("copy", duplicate_of="rated")
+        await add("pending")
+        await add("copy of pending", duplicate_of="pending")
+        async with async_session() as session:
+            inherited = await resolve_waiting_duplicates(session)
+        return inherited, await state()
+
+    inherited, (articles, queued) = run(scenario())
+
+    assert inherited == 1
+    assert articles["copy"].is_rated and articles["copy"].hopefulness_score == 80
+    assert articles["copy of pending"].duplicate_of == "pending" and not articles["copy of pending"].is_rated
+    assert queued == set()
+
+
+def test_duplicates_of_deleted_or_unscored_representatives_are_queued(run):
+    async def scenario():
+        await add("filtered", is_rated=True, excluded_reason="keyword_sports:match")
+        await add("copy of filtered", duplicate_of="filtered")
+        await add("copy of deleted", duplicate_of="deleted")
+        async with async_session() as session:
+            await resolve_waiting_duplicates(session)
+        return await state()
+
+    articles, queued = run(scenario())
+
+    for guid in ("copy of filtered", "copy of deleted"):
+        assert articles[guid].duplicate_of is None
+        assert articles[guid].rating_failed
+    assert queued == {"copy of filtered", "copy of deleted"}
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.database import async_session
+from app.models import ApiRateWindow
+from app.services import quota_ledger
+
+
+def test_reserve_stops_at_the_limit(run):
+    async def scenario():
+        reservations = [await quota_ledger.reserve("gemini", 3) for _ in range(4)]
+        return reservations, await quota_ledger.get_usage("gemini", 3)
+
+    reservations, usage = run(scenario())
+
+    assert [r.count for r in reservations[:3]] == [1, 2, 3]
+    assert reservations[3] is None
+    assert usage == {"requests": 3, "limit": 3, "remaining": 0, "in_flight": 3}
+
+
+def test_zero_limit_reserves_nothing(run):
+    assert run(quota_ledger.reserve("gemini", 0)) is None
+
+
+def test_commit_counts_a_request_and_refund_frees_it(run):
+    async def scenario():
+        kept = await quota_ledger.reserve("guardian", 2)
+        returned = await quota_ledger.reserve("guardian", 2)
+        await quota_ledger.commit(kept)
+        await quota_ledger.refund(returned)
+        usage = await quota_ledger.get_usage("guardian", 2)
+        return usage, await quota_ledger.reserve("guardian", 2)
+
+    usage, again = run(scenario())
+
+    assert usage == {"requests": 1, "limit": 2, "remaining": 1, "in_flight": 0}
+    assert again is not None
+
+
+def test_providers_are_counted_separately(run):
+    async def scenario():
+        await quota_ledger.reserve("guardian", 1)
+        return await quota_ledger.reserve("thenewsapi", 1), await quota_ledger.remaining("guardian", 1)
+
+    other, remaining = run(scenario())
+
+    assert other is not None
+    assert remaining == 0
+
+
+def test_concurrent_reservations_never_exceed_the_limit(run):
+    async def scenario():
+        return await asyncio.gather(*(quota_ledger.reserve("gemini", 10) for _ in range(30)))
+
+    reservations = run(scenario())
+
+    granted = [r for r in reservations if r is not None]
+    assert len(granted) == 10
+    assert sorted(r.count for r in granted) == list(range(1, 11))
+
+
+def test_minute_slots_stop_at_the_limit_and_reopen_next_minute(run):
+    async def scenario():
+        waits = [await quota_ledger.take_minute_slot("gemini", 2) for _ in range(3)]
+        # Another worker's window from a minute ago does not count
+        async with async_session() as session:
+            await session.execute(update(ApiRateWindow).values(window_start=datetime.utcnow() - timedelta(minutes=1)))
+            await session.commit()
+        return waits, await quota_ledger.take_minute_slot("gemini", 2)
+
+    waits, reopened = run(scenario())
+
+    assert waits[:2] == [0.0, 0.0]
+    assert 0 < waits[2] <= 60
+    assert reopened == 0.0
+
+
+def test_minute_slots_are_counted_per_provider(run):
+    async def scenario():
+        return [await quota_ledger.take_minute_slot(provider, 1) for provider in ("gemini", "heuristic", "gemini")]
+
+    gemini, heuristic, gemini_again = run(scenario())
+
+    assert gemini == heuristic == 0.0
+    assert gemini_again > 0
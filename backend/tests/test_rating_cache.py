@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import async_session
+from app.models import RatingCache, RatingCacheCounter
+from app.services import rating_cache
+from app.services.rating_cache import cache_ratings, get_cache_stats, get_cached_ratings, purge_rating_cache, rating_key
+
+REEF = {"title": "Coral reef recovers", "summary": "Divers count new growth", "source": "BBC"}
+PARK = {"title": "City opens a new park", "summary": "", "source": "Guardian"}
+
+
+def rating(score: int | None, reason: str | None = None) -> dict:
+    return {"score": score, "excluded_reason": reason, "rationale": "because" if score is not None else "Error: x"}
+
+
+def test_rating_key_ignores_formatting_but_not_source():
+    key = rating_key(REEF["title"], REEF["summary"], REEF["source"])
+
+    assert rating_key("  CORAL reef recovers!", "Divers count new growth.", "BBC") == key
+    assert rating_key(REEF["title"], REEF["summary"], "Reuters") != key
+    assert len(key) == 64
+
+
+def test_cached_ratings_are_returned_in_order_and_failures_are_not_stored(run):
+    async def scenario():
+        await cache_ratings([REEF, PARK], [rating(8), rating(None)])
+        return await get_cached_ratings([PARK, REEF, REEF])
+
+    reef = {"score": 8, "excluded_reason": None, "rationale": "because"}
+    assert run(scenario()) == [None, reef, reef]
+
+
+def test_caching_the_same_text_again_keeps_the_last_rating(run):
+    async def scenario():
+        await cache_ratings([REEF], [rating(8)])
+        await cache_ratings([REEF], [rating(3, "politics")])
+        async with async_session() as session:
+            return (await session.execute(select(RatingCache))).scalars().all()
+
+    entries = run(scenario())
+
+    assert [(e.score, e.excluded_reason) for e in entries] == [(3, "politics")]
+
+
+def test_stats_count_hits_and_misses_in_the_database(run):
+    async def scenario():
+        await cache_ratings([REEF], [rating(8)])
+        await get_cached_ratings([REEF, PARK])
+        await get_cached_ratings([PARK])
+        await get_cached_ratings([REEF])
+        return await get_cache_stats()
+
+    stats = run(scenario())
+
+    assert stats["prompt_version"] == rating_cache.PROMPT_VERSION
+    assert (stats["entries"], stats["total_hits"]) == (1, 2)
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 2, 0.5)
+
+
+def test_disabled_cache_neither_answers_nor_counts(run, monkeypatch):
+    async def scenario():
+        await cache_ratings([REEF], [rating(8)])
+        monkeypatch.setattr(settings, "RATING_CACHE_ENABLED", False)
+        answers = await get_cached_ratings([REEF])
+        return answers, await get_cache_stats()
+
+    answers, stats = run(scenario())
+
+    assert answers == [None]
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (0, 0, None)
+
+
+def test_purge_drops_stale_entries_and_other_prompt_versions(run):
+    async def scenario():
+        await cache_ratings([REEF, PARK], [rating(8), rating(6)])
+        await get_cached_ratings([REEF])
+        async with async_session() as session:
+            session.add(RatingCacheCounter(prompt_version="old", hits=5, misses=5))
+            await session.execute(
+                update(RatingCache)
+                .where(RatingCache.key == rating_key(PARK["title"], PARK["summary"], PARK["source"]))
+                .values(created_at=datetime.utcnow() - timedelta(days=settings.RATING_CACHE_TTL_DAYS + 1))
+            )
+            await session.commit()
+        purged = await purge_rating_cache()
+        async with async_session() as session:
+            counters = (await session.execute(select(RatingCacheCounter.prompt_version))).scalars().all()
+        return purged, await get_cached_ratings([REEF, PARK]), counters
+
+    purged, answers, counters = run(scenario())
+
+    assert purged == 1
+    assert answers[0]["score"] == 8 and answers[1] is None
+    assert counters == [rating_cache.PROMPT_VERSION]
@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import async_session
+from app.models import Article, RatingQueue
+from app.services import rating_queue
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+async def add_articles(*specs: tuple[str, str, datetime]) -> list[Article]:
+    """Store pending articles from (headline, source, published) and queue them."""
+    async with async_session() as session:
+        articles = [
+            Article(
+                guid=headline, headline=headline, summary="", source_url=headline, canonical_key=headline,
+                source_name=source, published_at=published, rating_failed=True,
+            )
+            for headline, source, published in specs
+        ]
+        session.add_all(articles)
+        await session.flush()
+        await rating_queue.enqueue(session, articles)
+        await session.commit()
+    return articles
+
+
+async def queue_rows() -> dict[str, RatingQueue]:
+    async with async_session() as session:
+        result = await session.execute(select(Article.headline, RatingQueue).join(Article, Article.id == RatingQueue.article_id))
+        return {headline: entry for headline, entry in result.all()}
+
+
+def test_newer_articles_and_quieter_sources_come_first(run):
+    async def scenario():
+        await add_articles(
+            ("busy newest", "Busy", NOW),
+            ("busy newer", "Busy", NOW - timedelta(minutes=30)),
+            ("busy new", "Busy", NOW - timedelta(minutes=40)),
+            ("quiet", "Quiet", NOW - timedelta(minutes=50)),
+            ("old", "Quiet", NOW - timedelta(days=2)),
+        )
+        _, entries = await rating_queue.claim(10)
+        return [e.article_id for e in entries], await queue_rows()
+
+    claimed, rows = run(scenario())
+
+    # Each Busy article queued before another costs it an hour, so the
+    # 50-minute-old Quiet story overtakes the two older Busy ones
+    order = {entry.article_id: headline for headline, entry in rows.items()}
+    assert [order[i] for i in claimed] == ["busy newest", "quiet", "busy newer", "busy new", "old"]
+
+
+def test_enqueue_skips_articles_already_queued(run):
+    async def scenario():
+        (article,) = await add_articles(("story", "Source", NOW))
+        async with async_session() as session:
+            added = await rating_queue.enqueue(session, [article])
+            await session.commit()
+        return added, await queue_rows()
+
+    added, rows = run(scenario())
+
+    assert added == 0
+    assert list(rows) == ["story"]
+
+
+def test_claimed_entries_are_leased_to_one_worker(run):
+    async def scenario():
+        await add_articles(*((f"story {i}", "Source", NOW - timedelta(hours=i)) for i in range(10)))
+        first_token, first = await rating_queue.claim(4)
+        second_token, second = await rating_queue.claim(10)
+        return first_token, first, second_token, second, await rating_queue.claim(10)
+
+    first_token, first, second_token, second, (_, third) = run(scenario())
+
+    assert len(first) == 4 and len(second) == 6 and third == []
+    assert not {e.article_id for e in first} & {e.article_id for e in second}
+    assert {e.lease_token for e in first} == {first_token}
+    assert {e.lease_token for e in second} == {second_token}
+
+
+def test_concurrent_claims_never_share_an_entry(run):
+    async def scenario():
+        await add_articles(*((f"story {i}", "Source", NOW - timedelta(hours=i)) for i in range(12)))
+        return await asyncio.gather(*(rating_queue.claim(5) for _ in range(4)))
+
+    claims = run(scenario())
+
+    claimed = [e.article_id for _, entries in claims for e in entries]
+    assert len(claimed) == len(set(claimed)) == 12
+
+
+def test_release_backs_off_failures_and_frees_untried_entries(run):
+    async def scenario():
+        await add_articles(("failed", "Source", NOW), ("untried", "Source", NOW - timedelta(hours=1)))
+        token, entries = await rating_queue.claim(10)
+        failed = {e.article_id for e in entries if e.article_id == entries[0].article_id}
+        released_at = datetime.utcnow()
+        await rating_queue.release(token, entries, failed)
+        _, reclaimed = await rating_queue.claim(10)
+        return released_at, await queue_rows(), reclaimed
+
+    released_at, rows, reclaimed = run(scenario())
+
+    failed, untried = rows["failed"], rows["untried"]
+    assert failed.attempts == 1 and untried.attempts == 0
+    assert failed.available_at >= released_at + timedelta(minutes=settings.RATING_QUEUE_BACKOFF_MINUTES)
+    assert [e.article_id for e in reclaimed] == [untried.article_id]
+
+
+def test_release_leaves_entries_another_worker_has_since_claimed(run):
+    async def scenario():
+        await add_articles(("story", "Source", NOW))
+        stale_token, stale = await rating_queue.claim(10)
+        # The first worker's lease runs out and a second worker claims the entry
+        async with async_session() as session:
+            await session.execute(update(RatingQueue).values(available_at=datetime.utcnow() - timedelta(seconds=1)))
+            await session.commit()
+        token, _ = await rating_queue.claim(10)
+        await rating_queue.release(stale_token, stale, {stale[0].article_id})
+        return token, await queue_rows()
+
+    token, rows = run(scenario())
+
+    assert rows["story"].lease_token == token
+    assert rows["story"].attempts == 0
+
+
+def test_ack_removes_entries(run):
+    async def scenario():
+        articles = await add_articles(("rated", "Source", NOW), ("waiting", "Source", NOW))
+        await rating_queue.ack([articles[0].id])
+        return await queue_rows()
+
+    assert list(run(scenario())) == ["waiting"]
+
+
+def test_backoff_doubles_up_to_the_cap():
+    base = timedelta(minutes=settings.RATING_QUEUE_BACKOFF_MINUTES)
+    cap = timedelta(hours=settings.RATING_QUEUE_MAX_BACKOFF_HOURS)
+
+    assert rating_queue.backoff(1) == base
+    assert rating_queue.backoff(2) == 2 * base
+    assert rating_queue.backoff(3) == 4 * base
+    assert rating_queue.backoff(30) == cap
@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.utils.replay import RecordingTransport, ReplayTransport, redact_url
+
+FEED = "https://api.example.com/feed?api-key=secret&from-date=2026-03-01&q=hope"
+
+
+@pytest.fixture(autouse=True)
+def fixtures_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "REPLAY_FIXTURES_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "REPLAY_LATENCY", False)
+    return tmp_path
+
+
+def live_feed(request: httpx.Request) -> httpx.Response:
+    """A server that honours If-None-Match for ETag "v1"."""
+    if request.headers.get("If-None-Match") == '"v1"':
+        return httpx.Response(304, headers={"ETag": '"v1"'})
+    return httpx.Response(200, headers={"ETag": '"v1"', "Set-Cookie": "x=1"}, content=b"<rss/>")
+
+
+def get(transport: httpx.AsyncBaseTransport, url: str = FEED, **headers: str) -> httpx.Response:
+    async def send():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get(url, headers=headers)
+
+    return asyncio.run(send())
+
+
+def record(url: str = FEED, **headers: str) -> httpx.Response:
+    return get(RecordingTransport(httpx.MockTransport(live_feed)), url, **headers)
+
+
+def test_redact_url_drops_credentials_and_sorts_params():
+    assert redact_url(FEED) == "https://api.example.com/feed?from-date=2026-03-01&q=hope"
+
+
+def test_recorded_fixtures_hold_no_credentials_or_transport_headers(fixtures_dir):
+    record()
+
+    [fixture] = (fixtures_dir / "http").iterdir()
+    text = fixture.read_text()
+    assert "secret" not in text and "Set-Cookie" not in text
+
+
+def test_replay_serves_the_recording_at_a_later_watermark():
+    record()
+
+    response = get(ReplayTransport(), FEED.replace("2026-03-01", "2026-03-02"))
+
+    assert (response.status_code, response.content, response.headers["ETag"]) == (200, b"<rss/>", '"v1"')
+
+
+def test_recorded_304_does_not_replace_the_full_response():
+    record()
+    assert record(**{"If-None-Match": '"v1"'}).status_code == 304
+
+    assert get(ReplayTransport()).status_code == 200
+    assert get(ReplayTransport(), **{"If-None-Match": '"v1"'}).status_code == 304
+
+
+def test_conditional_request_without_its_own_fixture_gets_the_full_response():
+    record()
+
+    assert get(ReplayTransport(), **{"If-None-Match": '"v0"'}).status_code == 200
+
+
+def test_unknown_request_is_a_404():
+    assert get(ReplayTransport(), "https://api.example.com/other").status_code == 404
@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+
+from app.services import rss_fetcher
+from app.services.fetch_cache import SourceStateUpdate, get_source_state, hash_content, save_source_state
+
+SOURCE = {"name": "Good Feed", "url": "https://feed.example.com/rss"}
+KEY = f"rss:{SOURCE['url']}"
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Good Feed</title>
+<item><title>Reef recovers</title><link>https://feed.example.com/reef</link>
+<guid>reef-1</guid><description>Divers count new growth</description>
+<pubDate>Sun, 01 Mar 2026 09:00:00 GMT</pubDate>
+<enclosure url="https://feed.example.com/reef.jpg" type="image/jpeg" length="1"/></item>
+</channel></rss>"""
+
+
+class FakeServer:
+    """Serves FEED with ETag "v1" and honours If-None-Match, recording request headers."""
+
+    def __init__(self, etag: str = '"v1"'):
+        self.etag = etag
+        self.sent: list[dict] = []
+
+    async def get(self, url, *, source, headers=None):
+        self.sent.append(dict(headers or {}))
+        request = httpx.Request("GET", url)
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return httpx.Response(304, request=request)
+        return httpx.Response(200, content=FEED, headers={"ETag": self.etag}, request=request)
+
+
+def fetch_twice(monkeypatch, server: FakeServer):
+    """Fetch, save the returned state as the pipeline would, and fetch again."""
+    monkeypatch.setattr(rss_fetcher, "get_http_client", lambda: server)
+
+    async def scenario():
+        results = []
+        for _ in range(2):
+            result = await rss_fetcher.fetch_rss_feed(SOURCE, asyncio.Semaphore(1))
+            for update in result.states:
+                await save_source_state(update)
+            results.append(result)
+        return results, await get_source_state(KEY)
+
+    return scenario()
+
+
+def test_first_fetch_parses_the_feed_and_returns_its_validators(run, monkeypatch):
+    (first, _), state = run(fetch_twice(monkeypatch, FakeServer()))
+
+    [article] = first.articles
+    assert (article["guid"], article["source_name"], article["image_url"]) == (
+        "reef-1", "Good Feed", "https://feed.example.com/reef.jpg",
+    )
+    assert (state.etag, state.content_hash) == ('"v1"', hash_content(FEED))
+
+
+def test_second_fetch_sends_validators_and_skips_a_304(run, monkeypatch):
+    server = FakeServer()
+
+    (_, second), _ = run(fetch_twice(monkeypatch, server))
+
+    assert server.sent == [{}, {"If-None-Match": '"v1"'}]
+    assert second.articles == [] and second.states == []
+
+
+def test_same_body_under_a_new_etag_is_skipped_but_the_etag_is_saved(run, monkeypatch):
+    server = FakeServer()
+
+    async def scenario():
+        await save_source_state(SourceStateUpdate(KEY, '"v0"', None, hash_content(FEED)))
+        return await fetch_twice(monkeypatch, server)
+
+    (first, second), state = run(scenario())
+
+    assert first.articles == [] and second.articles == []
+    assert server.sent[1] == {"If-None-Match": '"v1"'}
+    assert state.etag == '"v1"'
+
+
+def test_server_error_returns_nothing_and_saves_nothing(run, monkeypatch):
+    class Broken:
+        async def get(self, url, *, source, headers=None):
+            return httpx.Response(503, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(rss_fetcher, "get_http_client", lambda: Broken())
+
+    result = run(rss_fetcher.fetch_rss_feed(SOURCE, asyncio.Semaphore(1)))
+
+    assert result.articles == [] and result.states == []
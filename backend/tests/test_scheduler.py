@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.database import async_session
+from app.models import Article, RatingQueue
+from app.services import rating_queue
+from app.utils import scheduler
+
+HEADLINES = ["Volunteers plant a community garden", "Rescued turtles return to the sea"]
+
+
+class BrokenRater:
+    """Has quota, but every batch request raises."""
+
+    calls = 0
+
+    async def can_rate(self) -> bool:
+        return True
+
+    async def get_remaining_requests(self) -> int:
+        return 10
+
+    async def rate_articles_batch(self, articles: list[dict]) -> list[dict]:
+        BrokenRater.calls += 1
+        raise RuntimeError("connection reset")
+
+
+async def retry_with_broken_rater() -> list[RatingQueue]:
+    async with async_session() as session:
+        articles = [
+            Article(
+                guid=headline, headline=headline, summary="", source_url=headline, canonical_key=headline,
+                source_name="Test", published_at=datetime.utcnow(), rating_failed=True,
+            )
+            for headline in HEADLINES
+        ]
+        session.add_all(articles)
+        await session.flush()
+        await rating_queue.enqueue(session, articles)
+        await session.commit()
+
+    await scheduler.retry_failed_ratings()
+
+    async with async_session() as session:
+        return list((await session.execute(select(RatingQueue))).scalars().all())
+
+
+def test_failing_batch_backs_off_instead_of_releasing_untried(run, monkeypatch):
+    monkeypatch.setattr(scheduler, "get_rater", BrokenRater)
+    monkeypatch.setattr(scheduler, "get_predictor", lambda: None)
+    monkeypatch.setattr(scheduler.settings, "RATING_CACHE_ENABLED", False)
+
+    entries = run(retry_with_broken_rater())
+
+    assert BrokenRater.calls >= 1
+    assert len(entries) == len(HEADLINES)
+    assert all(e.attempts == 1 and e.lease_token is None for e in entries)
+    assert all(e.available_at > datetime.utcnow() for e in entries)
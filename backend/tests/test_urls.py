@@ -0,0 +1,78 @@
+import pytest
+
+from app.services.ingest_pipeline import PipelineStats, dedupe_stage
+from app.utils.urls import canonical_url_key, canonicalize_url, clean_url
+
+MALFORMED = ["http://example.com:abc/x", "http://[::1/x", "http://example.com:99999/x"]
+
+
+async def chunks(*articles: dict):
+    yield list(articles)
+
+
+def test_clean_url_strips_tracking_params_and_fragment():
+    url = "https://example.com/story?utm_source=feed&id=7&fbclid=abc&ref=home#comments"
+
+    assert clean_url(url) == "https://example.com/story?id=7"
+
+
+def test_clean_url_keeps_scheme_host_and_param_order():
+    url = "http://WWW.Example.com/a/?b=2&a=1"
+
+    assert clean_url(url) == url
+
+
+def test_canonicalize_url_normalizes_host_scheme_and_trailing_slash():
+    variants = [
+        "https://example.com/story",
+        "http://www.example.com/story/",
+        "HTTPS://Example.COM:443/story?utm_medium=rss",
+        "http://example.com:80/story#top",
+    ]
+
+    assert {canonicalize_url(url) for url in variants} == {"https://example.com/story"}
+
+
+def test_canonicalize_url_sorts_query_and_keeps_other_ports():
+    assert canonicalize_url("https://example.com/?b=2&a=1") == "https://example.com/?a=1&b=2"
+    assert canonicalize_url("https://example.com:8443/x") == "https://example.com:8443/x"
+
+
+def test_canonicalize_url_keeps_ipv6_brackets():
+    assert canonicalize_url("http://[::1]:8080/a/") == "https://[::1]:8080/a"
+    assert canonicalize_url("https://[2001:DB8::1]/a") == "https://[2001:db8::1]/a"
+
+
+@pytest.mark.parametrize("url", MALFORMED)
+def test_malformed_urls_have_no_key(url):
+    with pytest.raises(ValueError):
+        canonicalize_url(url)
+    assert canonical_url_key(url) is None
+    assert clean_url(url) == url
+
+
+def test_canonical_url_key_matches_equivalent_links():
+    assert canonical_url_key("https://example.com/a?utm_source=x") == canonical_url_key("http://www.example.com/a/")
+    assert canonical_url_key("https://example.com/a") != canonical_url_key("https://example.com/b")
+    assert canonical_url_key("") is None
+    assert canonical_url_key("   ") is None
+
+
+def test_dedupe_falls_back_to_guid_for_malformed_links(run):
+    stats = PipelineStats()
+    articles = [
+        {"guid": "a", "link": "http://[::1/x"},
+        {"guid": "b", "link": "http://[::1/x"},
+        {"guid": "a", "link": "http://[::1/x"},
+        {"guid": "c", "link": "https://example.com/story?utm_source=x"},
+        {"guid": "d", "link": "https://www.example.com/story/"},
+    ]
+
+    async def collect():
+        return [article async for article in dedupe_stage(chunks(*articles), stats)]
+
+    kept = run(collect())
+
+    assert [a["guid"] for a in kept] == ["a", "b", "c"]
+    assert [a["canonical_key"] for a in kept[:2]] == [None, None]
+    assert kept[2]["link"] == "https://example.com/story"
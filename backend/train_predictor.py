@@ -0,0 +1,42 @@
+"""Train the local score predictor from articles rated by Gemini.
+
+    python train_predictor.py
+
+Writes PREDICTOR_MODEL_PATH; running workers pick the new model up on their
+next fetch. Retrain as more ratings accumulate.
+"""
+import asyncio
+import time
+
+from app.config import settings
+from app.database import engine, init_db
+from app.services.score_predictor import load_training_rows, train
+
+
+async def main():
+    print("Initializing database...")
+    await init_db()
+
+    rows = await load_training_rows()
+    await engine.dispose()
+    print(f"Gemini-rated articles: {len(rows)}")
+    if len(rows) < settings.PREDICTOR_MIN_TRAINING_ROWS:
+        print(f"Need at least {settings.PREDICTOR_MIN_TRAINING_ROWS} to train, skipping")
+        return
+
+    started = time.perf_counter()
+    report = await asyncio.to_thread(
+        train, rows, settings.RATING_THRESHOLD, settings.PREDICTOR_MIN_PRECISION, settings.PREDICTOR_MODEL_PATH
+    )
+
+    print(f"Trained on {report['train_rows']}, evaluated on {report['holdout_rows']} in {time.perf_counter() - started:.1f}s")
+    print(f"Held-out accuracy: {report['holdout_accuracy']:.1%}")
+    print(f"Confident when P(score >= threshold) is below {report['lower']:.3f} or above {report['upper']:.3f}")
+    print(f"Coverage (articles skipping Gemini): {report['coverage']:.1%}")
+    print(f"Accuracy on those: {report['confident_accuracy']:.1%}")
+    print(f"Score mean absolute error: {report['score_mae']:.1f}")
+    print(f"Saved to {settings.PREDICTOR_MODEL_PATH}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())